@@ -17,6 +17,7 @@ make || exit 1
 mkdir -p /backend/out
 mv ryzenadj /backend/out/ryzenadj || exit 1
 chmod +x /backend/out/ryzenadj || exit 1
+mv libryzenadj.so /backend/out/libryzenadj.so || exit 1
 mv ../LICENSE /backend/out/LICENSE-ryzenadj || exit 1
 
 cd /backend
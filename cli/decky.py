@@ -10,6 +10,8 @@ from jobs.logger import LoggerOpener
 from jobs.utils import Utils
 from jobs.setup import Setup
 from jobs.translations import TranslationUpdater
+from jobs.benchmark import Benchmark
+from jobs.simulate import Simulator
 
 class JobManager:
     def __init__(self):
@@ -28,6 +30,14 @@ class JobManager:
             TranslationUpdater().update_translations()
             return
 
+        if "bench" in options or "bench-save" in options:
+            Benchmark().run(save_baseline="bench-save" in options)
+            return
+
+        if "simulate" in options:
+            Simulator().run()
+            return
+
         if "deploy" in options or "setup" in options:
             Setup().check_settings()
 
@@ -0,0 +1,293 @@
+import builtins
+import glob
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from jobs.simulation import Simulation, SimulatedDevice
+from jobs.utils import Utils
+
+
+class SyscallCounter:
+    """Counts file syscalls issued by the backend while enabled"""
+
+    def __init__(self):
+        self.counts = {"open": 0, "read": 0, "write": 0}
+        self.__originals = {}
+
+    def __wrap(self, module, name, kind):
+        original = getattr(module, name)
+        self.__originals[(module, name)] = original
+
+        def wrapper(*args, **kwargs):
+            self.counts[kind] += 1
+            return original(*args, **kwargs)
+
+        setattr(module, name, wrapper)
+
+    def __enter__(self):
+        self.__wrap(builtins, "open", "open")
+        self.__wrap(os, "open", "open")
+        self.__wrap(os, "pread", "read")
+        self.__wrap(os, "read", "read")
+        self.__wrap(os, "pwrite", "write")
+        self.__wrap(os, "write", "write")
+        return self
+
+    def __exit__(self, *_):
+        for (module, name), original in self.__originals.items():
+            setattr(module, name, original)
+
+
+class BenchmarkWorker:
+    """Runs every benchmark case for one simulated device"""
+
+    def __init__(self, device):
+        self.simulation = Simulation(device)
+        self.simulation.install()
+
+        # pylint: disable=import-outside-toplevel
+        from utils.sysfs import SYSFS
+        from utils.performance.cpu import CPU_PERFORMANCE
+        from utils.performance.gpu import GPU_PERFORMANCE
+        from utils.performance.profile import PROFILE_APPLIER
+
+        self.sysfs = SYSFS
+        self.cpu = CPU_PERFORMANCE
+        self.gpu = GPU_PERFORMANCE
+        self.profiles = PROFILE_APPLIER
+
+        self.cpu.initialize()
+        self.gpu.initialize()
+        self.p_cores, self.e_cores = self.cpu.get_cores_count()
+
+    def verify(self):
+        # Parser and setter checks against the captured pp_od_clk_voltage sample
+        low, high = self.simulation.device.spec["sclk"]
+        state = self.gpu.get_state()
+        if state != {"level": "auto", "sclk": [low, high], "sclk_range": [low, high]}:
+            raise Exception(f"Unexpected GPU state parsed from sample: {state}")
+
+        self.gpu.set_gpu_frequency_range(low + 100, high)
+        state = self.gpu.get_state()
+        if state["level"] != "manual" or state["sclk"] != [low + 100, high]:
+            raise Exception(f"GPU state not updated after set: {state}")
+
+        writes = self.sysfs.get_stats()["writes"]
+        self.gpu.set_gpu_frequency_range(low + 100, high)
+        self.gpu.set_gpu_frequency_range(low - 100, high + 100)
+        if self.gpu.get_state()["sclk"] != [low, high]:
+            raise Exception("GPU frequency range not clamped to OD_RANGE")
+        # No-op set writes nothing, clamped set stages "s 0" only plus the commit
+        if self.sysfs.get_stats()["writes"] - writes != 2:
+            raise Exception("GPU setter wrote unchanged values")
+
+    def __restore_gpu(self):
+        # Writes replace the fixture file, put back what the driver would report
+        with open(self.simulation.path("/sys/class/drm/card0/device/pp_od_clk_voltage"), "w") as f:
+            f.write(self.simulation.device.od_clk_voltage())
+
+    def __profile(self, i):
+        high = i % 2 == 0
+        sclk_min, sclk_max = self.simulation.device.spec["sclk"]
+        return {
+            "cpu": {
+                "boost": high,
+                "governor": "performance" if high else "powersave",
+                "epp": "performance" if high else "power",
+                "scheduler": "",
+                "acpi": "performance" if high else "low-power",
+                "tdp": {"spl": 25 if high else 8, "sppl": 30 if high else 10, "fppl": 35 if high else 12},
+                "pcores": self.p_cores,
+                "ecores": self.e_cores if high else 0,
+                "smt": high,
+            },
+            "gpu": {"min": sclk_min, "max": sclk_max if high else sclk_min + 400},
+        }
+
+    def __partial_profile(self, i):
+        # Neither side has every core online, so bringing all of them up first is pure churn
+        profile = self.__profile(i)
+        profile["cpu"]["pcores"] = max(1, self.p_cores - 1 if i % 2 else self.p_cores // 2)
+        profile["cpu"]["ecores"] = self.e_cores // 2
+        profile["cpu"]["smt"] = True
+        return profile
+
+    def cases(self):
+        return {
+            "set_governor": (200, lambda i: self.cpu.set_governor("performance" if i % 2 else "powersave")),
+            "set_epp": (200, lambda i: self.cpu.set_epp("performance" if i % 2 else "power")),
+            "enable_cores": (100, lambda i: self.cpu.enable_cores(max(1, self.p_cores // 2 if i % 2 else self.p_cores), 0 if i % 2 else self.e_cores, i % 2 == 0)),
+            "set_tdp": (100, lambda i: self.cpu.set_tdp(*((8, 10, 12) if i % 2 else (25, 30, 35)))),
+            "set_gpu_frequency_range": (100, lambda i: self.gpu.set_gpu_frequency_range(800, 1600 if i % 2 else 2000)),
+            "profile_switch": (20, lambda i: self.profiles.apply(self.__profile(i))),
+            "profile_switch_cores": (20, lambda i: self.profiles.apply(self.__partial_profile(i))),
+        }
+
+    def measure(self, iterations, fn):
+        latencies = []
+        counter = SyscallCounter()
+        stats = self.sysfs.get_stats()
+        for i in range(iterations):
+            self.__restore_gpu()
+            with counter:
+                t0 = time.perf_counter()
+                fn(i)
+                latencies.append((time.perf_counter() - t0) * 1000)
+        after = self.sysfs.get_stats()
+
+        latencies.sort()
+        return {
+            "iterations": iterations,
+            "median_ms": round(statistics.median(latencies), 4),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 4),
+            "syscalls": {k: round(v / iterations, 1) for k, v in counter.counts.items()},
+            "sysfs_writes": round((after["writes"] - stats["writes"]) / iterations, 1),
+            "sysfs_skipped": round((after["skipped_writes"] - stats["skipped_writes"]) / iterations, 1),
+        }
+
+    def __reset_device(self):
+        # Every logging variant starts with all cores online and the same cpufreq settings
+        self.profiles.reset()
+        self.cpu.enable_cores(self.p_cores, self.e_cores, True)
+        self.cpu.set_governor("powersave")
+        self.cpu.set_epp("balance_performance")
+
+    def __legacy_logging(self, name, fn):
+        # Old path: one f-string debug line per file, built and written synchronously
+        logger = sys.modules["decky"].logger
+        policies = sorted(glob.glob(self.simulation.path("/sys/devices/system/cpu/cpufreq/policy[0-9]*")))
+        onlines = sorted(glob.glob(self.simulation.path("/sys/devices/system/cpu/cpu[0-9]*/online")))
+        files = {
+            "set_governor": [f"{p}/scaling_governor" for p in policies],
+            "enable_cores": onlines,
+            "profile_switch": [
+                f"{p}/{attr}" for attr in ("boost", "scaling_governor", "energy_performance_preference") for p in policies
+            ] + onlines,
+        }[name]
+
+        def run(i):
+            for path in files:
+                logger.debug(f"Setting {name} value by writing to {path}")
+            fn(i)
+
+        return run
+
+    def logging_cases(self):
+        # pylint: disable=import-outside-toplevel
+        from plugin_logger import PluginLogger
+
+        logger = sys.modules["decky"].logger
+        cases = self.cases()
+        names = ("set_governor", "enable_cores", "profile_switch")
+        results = {}
+
+        logger.setLevel(logging.DEBUG)
+        for name in names:
+            iterations, fn = cases[name]
+            self.__reset_device()
+            results[f"{name}[debug,legacy]"] = self.measure(iterations, self.__legacy_logging(name, fn))
+        for name in names:
+            self.__reset_device()
+            results[f"{name}[debug]"] = self.measure(*cases[name])
+
+        PluginLogger.configure_logger()
+        logger.setLevel(logging.DEBUG)
+        try:
+            for name in names:
+                self.__reset_device()
+                results[f"{name}[debug,queued]"] = self.measure(*cases[name])
+        finally:
+            PluginLogger.stop()
+        logger.setLevel(logging.INFO)
+        return results
+
+    def run(self):
+        try:
+            self.verify()
+            results = {name: self.measure(iterations, fn) for name, (iterations, fn) in self.cases().items()}
+            results.update(self.logging_cases())
+            return results
+        finally:
+            self.simulation.cleanup()
+
+
+class Benchmark:
+    THRESHOLD = 1.2
+
+    def __init__(self):
+        self.results_file = os.path.join(Utils.log_dir, "benchmark.json")
+        self.baseline_file = os.path.join(Utils.plugin_dir, "cli", "benchmark-baseline.json")
+
+    def __run_device(self, device):
+        # Backend modules resolve paths at import time, so every device needs a fresh interpreter
+        out_file = os.path.join(Utils.log_dir, f"benchmark-{device}.json")
+        output = subprocess.run(
+            [sys.executable, "-m", "jobs.benchmark", device, out_file],
+            cwd=Utils.plugin_dir,
+            env={**os.environ, "PYTHONPATH": os.path.join(Utils.plugin_dir, "cli")},
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if output.returncode != 0:
+            print(output.stderr)
+            raise Exception(f"Benchmark for '{device}' failed")
+        with open(out_file) as f:
+            return json.load(f)
+
+    def __regressions(self, results):
+        if not os.path.exists(self.baseline_file):
+            return []
+
+        with open(self.baseline_file) as f:
+            baseline = json.load(f)
+
+        found = []
+        for device, cases in results.items():
+            for name, current in cases.items():
+                previous = baseline.get(device, {}).get(name)
+                if previous is None:
+                    continue
+                if current["median_ms"] > previous["median_ms"] * Benchmark.THRESHOLD:
+                    found.append(f"{device}/{name}: median {previous['median_ms']}ms -> {current['median_ms']}ms")
+                for kind, count in current["syscalls"].items():
+                    if count > previous["syscalls"].get(kind, 0) * Benchmark.THRESHOLD:
+                        found.append(f"{device}/{name}: {kind} syscalls {previous['syscalls'].get(kind, 0)} -> {count}")
+        return found
+
+    def run(self, save_baseline=False):
+        os.makedirs(Utils.log_dir, exist_ok=True)
+        results = {}
+        for device in SimulatedDevice.DEVICES:
+            print(f"Benchmarking {device}...", flush=True)
+            results[device] = self.__run_device(device)
+            for name, r in results[device].items():
+                syscalls = " ".join(f"{k}={v}" for k, v in r["syscalls"].items())
+                print(f"    {name:<26} median {r['median_ms']:>9.4f}ms  p95 {r['p95_ms']:>9.4f}ms  {syscalls}  writes={r['sysfs_writes']} skipped={r['sysfs_skipped']}")
+
+        with open(self.results_file, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved at {self.results_file}")
+
+        if save_baseline:
+            with open(self.baseline_file, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"Baseline saved at {self.baseline_file}")
+            return
+
+        regressions = self.__regressions(results)
+        if regressions:
+            print("\nRegressions over baseline:")
+            for r in regressions:
+                print("    " + r)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    worker_results = BenchmarkWorker(sys.argv[1]).run()
+    with open(sys.argv[2], "w") as out:
+        json.dump(worker_results, out)
@@ -0,0 +1,70 @@
+"""Stand-in for the busctl calls the plugin makes to systemd, acting on the simulated cgroupfs"""
+
+import os
+import sys
+
+ROOT = os.path.join(os.environ["ALLY_SYSFS_ROOT"], "sys/fs/cgroup")
+
+
+def parse_properties(args):
+    count = int(args.pop(0))
+    props = {}
+    for _ in range(count):
+        name = args.pop(0)
+        signature = args.pop(0)
+        if signature.startswith("a"):
+            size = int(args.pop(0))
+            props[name] = [int(args.pop(0)) for _ in range(size)]
+        else:
+            props[name] = args.pop(0)
+    return props
+
+
+def cpu_list(mask):
+    return ",".join(
+        str(byte * 8 + bit) for byte, value in enumerate(mask) for bit in range(8) if value & (1 << bit)
+    )
+
+
+def write(unit, file, value):
+    with open(os.path.join(ROOT, unit, file), "w") as f:
+        f.write(f"{value}\n")
+
+
+def set_properties(unit, props):
+    # Same files systemd would write for these unit properties
+    if "CPUWeight" in props:
+        write(unit, "cpu.weight", props["CPUWeight"])
+    if "IOWeight" in props:
+        write(unit, "io.weight", f"default {props['IOWeight']}")
+    if "CPUQuotaPerSecUSec" in props:
+        write(unit, "cpu.max", f"{int(props['CPUQuotaPerSecUSec']) // 10} 100000")
+    if "AllowedCPUs" in props:
+        write(unit, "cpuset.cpus", cpu_list(props["AllowedCPUs"]))
+
+
+def main(argv):
+    # busctl call <destination> <path> <interface> <method> <signature> <args...>
+    method = argv[4]
+    args = argv[6:]
+    unit = args.pop(0)
+    if method == "StartTransientUnit":
+        args.pop(0)
+        props = parse_properties(args)
+        if os.path.exists(os.path.join(ROOT, unit)):
+            print(f"Unit {unit} was already loaded or has a fragment file.", file=sys.stderr)
+            return 1
+        os.makedirs(os.path.join(ROOT, unit))
+        write(unit, "cgroup.procs", "\n".join(str(p) for p in props.get("PIDs", [])))
+        set_properties(unit, props)
+    elif method == "SetUnitProperties":
+        args.pop(0)
+        set_properties(unit, parse_properties(args))
+    else:
+        print(f"Unknown method {method}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,60 @@
+"""Stand-in for libryzenadj, used by the simulator to drive RyzenAdjEngine without an SMU"""
+
+
+class StubRyzenAdjLib:
+    """In-memory stand-in for libryzenadj, emulating the SMU limits and PM table"""
+
+    def __init__(self, reject_first: int = 0):
+        self.limits = {"stapm": 0, "fast": 0, "slow": 0}
+        self.table = dict(self.limits)
+        self.calls = 0
+        self.__reject = reject_first
+
+    def init_ryzenadj(self):
+        return 1
+
+    def cleanup_ryzenadj(self, _ry):
+        return None
+
+    def init_table(self, _ry):
+        return 0
+
+    def refresh_table(self, _ry):
+        self.table = dict(self.limits)
+        return 0
+
+    def __set(self, key, value):
+        self.calls += 1
+        # Emulate firmware silently ignoring the first writes after a state change
+        if self.__reject > 0:
+            self.__reject -= 1
+            return 0
+        self.limits[key] = value
+        return 0
+
+    def set_stapm_limit(self, _ry, value):
+        return self.__set("stapm", value)
+
+    def set_fast_limit(self, _ry, value):
+        return self.__set("fast", value)
+
+    def set_slow_limit(self, _ry, value):
+        return self.__set("slow", value)
+
+    def set_tctl_temp(self, _ry, _value):
+        return 0
+
+    def set_apu_skin_temp_limit(self, _ry, _value):
+        return 0
+
+    def set_dgpu_skin_temp_limit(self, _ry, _value):
+        return 0
+
+    def get_stapm_limit(self, _ry):
+        return self.table["stapm"] / 1000
+
+    def get_fast_limit(self, _ry):
+        return self.table["fast"] / 1000
+
+    def get_slow_limit(self, _ry):
+        return self.table["slow"] / 1000
@@ -0,0 +1,481 @@
+import asyncio
+import os
+import random
+import shutil
+import sys
+from jobs.ryzenadj_standin import StubRyzenAdjLib
+from jobs.simulation import Simulation
+
+
+class GpuGovernorScenarios:
+    """Feeds synthetic game load to the GPU governor and checks it settles"""
+
+    LIMITS = (800, 2700)
+    DURATION = 120.0
+
+    # name: [(start time, MHz of work the game needs), ...]
+    LOADS = {
+        "light": [(0, 600)],
+        "heavy": [(0, 2600)],
+        "medium": [(0, 1300)],
+        "step": [(0, 500), (40, 2200), (80, 700)],
+    }
+
+    # Changes allowed per scenario, a settled governor needs about two per load change
+    MAX_WRITES = 12
+
+    def __init__(self, noise=5.0, seed=1):
+        # pylint: disable=import-outside-toplevel
+        from utils.performance.gpu_governor import GpuGovernor
+
+        self.governor_class = GpuGovernor
+        self.noise = noise
+        self.random = random.Random(seed)
+
+    def __demand(self, load, now):
+        return [mhz for start, mhz in load if start <= now][-1]
+
+    def run_one(self, load):
+        governor = self.governor_class()
+        governor.reset(*self.LIMITS)
+        low, high = self.LIMITS
+        ceiling = high
+        writes = 0
+        settled_at = None
+
+        now = 0.0
+        while now < self.DURATION:
+            demand = self.__demand(load, now)
+            busy = min(100.0, demand / ceiling * 100 + self.random.gauss(0, self.noise))
+            new_ceiling = governor.decide(max(0.0, busy), now)
+            if new_ceiling is not None:
+                ceiling = new_ceiling
+                writes += 1
+                settled_at = now
+            now += governor.INTERVAL
+
+        demand = self.__demand(load, now)
+        # Settled ceiling keeps utilization between the thresholds, or sits at a limit
+        util = demand / ceiling * 100
+        converged = (
+            governor.DOWN_THRESHOLD - self.noise <= util <= governor.UP_THRESHOLD + self.noise
+            or (ceiling == high and util > governor.UP_THRESHOLD)
+            or (ceiling == low and util < governor.DOWN_THRESHOLD)
+        )
+        return {
+            "ceiling": ceiling,
+            "utilization": round(util, 1),
+            "writes": writes,
+            "last_change_s": settled_at,
+            "converged": converged,
+        }
+
+    def run(self):
+        failures = []
+        print("GPU governor")
+        for name, load in self.LOADS.items():
+            r = self.run_one(load)
+            print(f"    {name:<8} ceiling {r['ceiling']:>5} MHz  util {r['utilization']:>5}%  writes {r['writes']:>3}  last change {'never' if r['last_change_s'] is None else str(r['last_change_s']) + 's'}")
+            if not r["converged"]:
+                failures.append(f"gpu/{name}: did not converge ({r['utilization']}% at {r['ceiling']} MHz)")
+            if r["writes"] > self.MAX_WRITES:
+                failures.append(f"gpu/{name}: {r['writes']} writes exceeds {self.MAX_WRITES}")
+        return failures
+
+
+class TdpControllerScenarios:
+    """Replays load traces through a simple APU power/thermal model with the TDP controller"""
+
+    PROFILE = (25, 30, 35)
+    DURATION = 240.0
+
+    # name: (ambient C, [(start time, W the game would draw with no limit), ...])
+    TRACES = {
+        "idle": (30, [(0, 5)]),
+        "indie": (30, [(0, 10)]),
+        "aaa": (30, [(0, 24)]),
+        "burst": (30, [(t, 6 if (t // 30) % 2 == 0 else 24) for t in range(0, 240, 30)]),
+        "heatwave": (38, [(0, 28)]),
+    }
+
+    # Plant: a limit above demand still costs some power as clocks race ahead,
+    # package and skin temperatures follow power with first-order lags
+    WASTE = 0.25
+    BOOST_OFF_POWER = 0.85
+    PKG_C_PER_W = 2.2
+    PKG_TAU = 20.0
+    SKIN_C_PER_W = 0.5
+    SKIN_TAU = 120.0
+
+    MAX_WRITES = 40
+    MAX_DEFICIT = 10.0
+
+    def __init__(self, noise=5.0, seed=1):
+        # pylint: disable=import-outside-toplevel
+        from utils.performance.cpu import CPU_PERFORMANCE
+        from utils.performance.tdp_controller import TdpController
+
+        self.controller_class = TdpController
+        self.floor = CPU_PERFORMANCE.get_tdp_ranges()["spl"][0]
+        self.noise = noise
+        self.random = random.Random(seed)
+
+    def __demand(self, trace, now):
+        return [watts for start, watts in trace if start <= now][-1]
+
+    def run_one(self, ambient, trace, adaptive):
+        controller = self.controller_class()
+        controller.reset(self.PROFILE, self.floor, True)
+        spl = self.PROFILE[0]
+        boost = True
+        pkg = skin = float(ambient)
+        energy = work = done = 0.0
+        writes = boost_writes = 0
+        max_pkg = 0.0
+        hot_tail = []
+
+        step = controller.INTERVAL
+        now = 0.0
+        while now < self.DURATION:
+            demand = self.__demand(trace, now) * (1.0 if boost else self.BOOST_OFF_POWER)
+            power = min(spl, demand + self.WASTE * max(0.0, spl - demand))
+            util = min(100.0, demand / spl * 100 + self.random.gauss(0, self.noise))
+
+            energy += power * step
+            work += demand * step
+            done += min(demand, spl) * step
+            pkg += (ambient + self.PKG_C_PER_W * power - pkg) * step / self.PKG_TAU
+            skin += (ambient + self.SKIN_C_PER_W * power - skin) * step / self.SKIN_TAU
+            max_pkg = max(max_pkg, pkg)
+            if now >= self.DURATION - 60:
+                hot_tail.append(pkg)
+
+            if adaptive:
+                limits, new_boost = controller.decide(max(0.0, util), 0.0, pkg, skin, now)
+                if limits is not None:
+                    spl = limits[0]
+                    writes += 1
+                if new_boost is not None:
+                    boost = new_boost
+                    boost_writes += 1
+            now += step
+
+        return {
+            "energy_wh": energy / 3600,
+            "deficit": 100 * (1 - done / work),
+            "writes": writes,
+            "boost_writes": boost_writes,
+            "spl": spl,
+            "max_pkg": max_pkg,
+            "tail_pkg": sum(hot_tail) / len(hot_tail),
+        }
+
+    def run(self):
+        failures = []
+        print("TDP controller")
+        for name, (ambient, trace) in self.TRACES.items():
+            fixed = self.run_one(ambient, trace, False)
+            r = self.run_one(ambient, trace, True)
+            saved = 100 * (1 - r["energy_wh"] / fixed["energy_wh"])
+            print(f"    {name:<8} energy {r['energy_wh']:.3f}/{fixed['energy_wh']:.3f} Wh ({saved:+.1f}% saved)  deficit {r['deficit']:>4.1f}%  spl {r['spl']:>2}W  writes {r['writes']:>3}  boost {r['boost_writes']}  pkg max {r['max_pkg']:.0f}C tail {r['tail_pkg']:.0f}C (fixed {fixed['tail_pkg']:.0f}C)")
+            if r["energy_wh"] > fixed["energy_wh"] * 1.001:
+                failures.append(f"tdp/{name}: uses more energy than the fixed profile")
+            if r["writes"] + r["boost_writes"] > self.MAX_WRITES:
+                failures.append(f"tdp/{name}: {r['writes'] + r['boost_writes']} writes exceeds {self.MAX_WRITES}")
+            hot = fixed["tail_pkg"] > self.controller_class.THERMAL_TARGET
+            if hot and r["tail_pkg"] > self.controller_class.THERMAL_TARGET + 1:
+                failures.append(f"tdp/{name}: package held at {r['tail_pkg']:.0f}C")
+            if not hot and r["deficit"] > fixed["deficit"] + self.MAX_DEFICIT:
+                failures.append(f"tdp/{name}: delivered {r['deficit']:.1f}% less work")
+        return failures
+
+
+class CoreParkingScenarios:
+    """Replays CPU demand through the core parker on the simulated sysfs tree"""
+
+    DURATION = 120.0
+    TICKS = 100
+
+    # name: [(start time, busy CPUs the workload needs), ...]
+    LOADS = {
+        "menu": [(0, 0.5)],
+        "game": [(0, 4.0)],
+        "loading": [(t, 0.5 if (t // 20) % 2 == 0 else 7.0) for t in range(0, 120, 20)],
+    }
+
+    MAX_WRITES = 80
+
+    def __init__(self, simulation):
+        # pylint: disable=import-outside-toplevel
+        from utils.performance.core_parker import CoreParker
+        from utils.performance.cpu import CPU_PERFORMANCE
+
+        self.simulation = simulation
+        self.cpu = CPU_PERFORMANCE
+        self.parker_class = CoreParker
+        self.cpu.initialize()
+        self.profile = (len(self.cpu.p_cores), len(self.cpu.c_cores), True)
+        # Floors as a profile would set them, one E-core kept where there is a cluster
+        self.floors = (2, 1 if self.cpu.c_cores else 0)
+
+    def __demand(self, load, now):
+        return [cpus for start, cpus in load if start <= now][-1]
+
+    def __online(self):
+        online = [0]
+        for cpu in range(1, self.simulation.device.threads):
+            with open(self.simulation.path(f"/sys/devices/system/cpu/cpu{cpu}/online")) as f:
+                if f.read().strip() == "1":
+                    online.append(cpu)
+        return online
+
+    def __write_stat(self, counters):
+        lines = ["cpu  0 0 0 0 0 0 0 0 0 0"] + [
+            f"cpu{cpu} {busy} 0 0 {idle} 0 0 0 0 0 0" for cpu, (busy, idle) in sorted(counters.items())
+        ]
+        with open(self.simulation.path("/proc/stat"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def run_one(self, load):
+        self.cpu.enable_cores(*self.profile)
+        parker = self.parker_class()
+        parker.reset(*self.profile, *self.floors)
+        counters = {}
+        online_sum = 0
+        starved = longest_starved = 0
+
+        now = 0.0
+        while now < self.DURATION:
+            online = self.__online()
+            demand = self.__demand(load, now)
+            share = min(1.0, demand / len(online))
+            for cpu in online:
+                busy, idle = counters.get(cpu, (0, 0))
+                counters[cpu] = (busy + round(share * self.TICKS), idle + self.TICKS - round(share * self.TICKS))
+            # Offline CPUs drop out of /proc/stat
+            self.__write_stat({cpu: counters[cpu] for cpu in online})
+
+            online_sum += len(online)
+            starved = starved + 1 if demand > len(online) else 0
+            longest_starved = max(longest_starved, starved)
+
+            parker.sample(now)
+            now += parker.INTERVAL
+
+        stats = parker.get_stats()
+        return {
+            "writes": stats["hotplug_writes"],
+            "changes": stats["parks"] + stats["unparks"],
+            "online_avg": online_sum / (self.DURATION / parker.INTERVAL),
+            "online_end": len(self.__online()),
+            "floor_kept": all(
+                core in self.__online()
+                for core in self.cpu.p_cores[: self.floors[0]] + self.cpu.c_cores[: self.floors[1]]
+            ),
+            "starved": longest_starved,
+        }
+
+    def run(self):
+        failures = []
+        total = sum(len([c] + self.cpu.smt_map.get(c, [])) for c in self.cpu.p_cores + self.cpu.c_cores)
+        print(f"Core parker ({self.profile[0]}P + {self.profile[1]}E, {total} CPUs, floor {self.floors[0]}P + {self.floors[1]}E)")
+        for name, load in self.LOADS.items():
+            r = self.run_one(load)
+            print(f"    {name:<8} online avg {r['online_avg']:>4.1f} end {r['online_end']:>2}  level changes {r['changes']:>3}  hotplug writes {r['writes']:>3}  longest starved {r['starved']} samples")
+            if r["writes"] > self.MAX_WRITES:
+                failures.append(f"parking/{name}: {r['writes']} hotplug writes exceeds {self.MAX_WRITES}")
+            if r["starved"] > 1:
+                failures.append(f"parking/{name}: demand exceeded online CPUs for {r['starved']} samples")
+            if not r["floor_kept"]:
+                failures.append(f"parking/{name}: parked below the profile minimum cores")
+        self.cpu.enable_cores(*self.profile)
+        return failures
+
+
+class RyzenAdjScenarios:
+    """Drives the libryzenadj engine against a stand-in SMU that ignores early writes"""
+
+    LIMITS = (15, 20, 25)
+
+    # name: (writes the SMU ignores before accepting them, attempts expected)
+    CASES = {"clean": (0, 1), "retry": (2, 2), "ignored": (100, 3)}
+
+    def __init__(self):
+        # pylint: disable=import-outside-toplevel
+        from utils.performance.cpu.ryzenadj_lib import RyzenAdjEngine
+
+        self.engine_class = RyzenAdjEngine
+
+    def run_one(self, reject):
+        lib = StubRyzenAdjLib(reject_first=reject)
+        engine = self.engine_class("/nonexistent/libryzenadj.so", lib)
+        opened = engine.open()
+        result = engine.set_limits(*self.LIMITS)
+        calls = lib.calls
+        # Same limits again are already in the PM table, nothing is written
+        again = engine.set_limits(*self.LIMITS)
+        readback = engine.read_limits()
+        engine.close()
+        return {
+            "opened": opened,
+            "attempts": result["attempts"],
+            "verified": result["verified"],
+            "writes": calls,
+            "rewrites": lib.calls - calls,
+            "again": again["attempts"],
+            "readback": readback,
+        }
+
+    def run(self):
+        failures = []
+        spl, sppt, fppt = self.LIMITS
+        print("RyzenAdj engine")
+        for name, (reject, attempts) in self.CASES.items():
+            r = self.run_one(reject)
+            print(f"    {name:<8} attempts {r['attempts']}  verified {r['verified']}  writes {r['writes']:>2}  readback {r['readback']}")
+            if not r["opened"]:
+                failures.append(f"ryzenadj/{name}: engine did not open the stand-in library")
+            if name == "ignored":
+                if r["verified"] or r["attempts"] != attempts:
+                    failures.append(f"ryzenadj/{name}: ignored limits reported as {r['verified']} after {r['attempts']} attempts")
+                continue
+            if not r["verified"] or r["attempts"] != attempts:
+                failures.append(f"ryzenadj/{name}: verified {r['verified']} after {r['attempts']} attempts")
+            if r["readback"] != {"stapm": spl, "fast": fppt, "slow": sppt}:
+                failures.append(f"ryzenadj/{name}: readback {r['readback']}")
+            if r["again"] != 0 or r["rewrites"] != 0:
+                failures.append(f"ryzenadj/{name}: unchanged limits written again")
+        return failures
+
+
+class GameSliceScenarios:
+    """Runs a fake game process tree through the watcher into the stand-in cgroup scopes"""
+
+    # Far above real pids, so pidfd_open fails and the watcher polls /proc like on old kernels
+    GAME = 4190001
+    THREADS = 24
+    ORIGIN = "user.slice/app.slice"
+
+    def __init__(self, simulation):
+        # pylint: disable=import-outside-toplevel
+        from utils.game_watcher import GameWatcher
+        from utils.performance.cgroups import CgroupSlices
+        from utils.performance.cpu import CPU_PERFORMANCE
+
+        self.simulation = simulation
+        self.watcher_class = GameWatcher
+        self.slices_class = CgroupSlices
+        self.cpu = CPU_PERFORMANCE
+
+    def __spawn(self, pid, ppid, comm, threads=1, origin=ORIGIN):
+        proc = self.simulation.path(f"/proc/{pid}")
+        os.makedirs(f"{proc}/task", exist_ok=True)
+        for tid in range(pid, pid + threads):
+            os.makedirs(f"{proc}/task/{tid}", exist_ok=True)
+        with open(f"{proc}/stat", "w") as f:
+            f.write(f"{pid} ({comm}) S {ppid} {pid} {pid} 0 -1\n")
+        with open(f"{proc}/comm", "w") as f:
+            f.write(comm + "\n")
+        with open(f"{proc}/cgroup", "w") as f:
+            f.write(f"0::/{origin}\n")
+
+    def __procs(self, name):
+        with open(self.simulation.path(f"/sys/fs/cgroup/{name}/cgroup.procs")) as f:
+            return sorted(int(p) for p in f.read().split())
+
+    def __read(self, name, file):
+        with open(self.simulation.path(f"/sys/fs/cgroup/{name}/{file}")) as f:
+            return f.read().strip()
+
+    async def __play(self, slices, watcher):
+        game = self.GAME
+        self.__spawn(100, 1, "steam")
+        self.__spawn(101, 100, "steamwebhelper", 30)
+        # Started from a session scope that is gone by the time the game exits
+        self.__spawn(102, 101, "steamwebhelper", 12, f"{self.ORIGIN}/session-gone.scope")
+        self.__spawn(103, 100, "fossilize_repla", 8)
+        self.__spawn(game, 100, "game.exe", self.THREADS)
+        self.__spawn(game + 100, game, "wineserver", 4)
+
+        slices.configure(True)
+        await watcher.start(game, slices.apply_game_processes, slices.reset_game, by_process=True)
+        started = (self.__procs(self.slices_class.GAME), self.__procs(self.slices_class.BACKGROUND))
+
+        # Child started mid-game, picked up by the next scan
+        self.__spawn(game + 200, game, "crashhandler", 2)
+        await asyncio.sleep(0.6)
+        spawned = self.__procs(self.slices_class.GAME)
+        stats = slices.get_stats()
+
+        for pid in (game, game + 100, game + 200):
+            shutil.rmtree(self.simulation.path(f"/proc/{pid}"))
+        await asyncio.sleep(0.6)
+        running = watcher.get_stats()["running"]
+        return started, spawned, stats, running
+
+    def run(self):
+        failures = []
+        slices = self.slices_class()
+        watcher = self.watcher_class()
+        game = self.GAME
+        fast, efficiency = self.cpu.get_l3_clusters()
+
+        started, spawned, stats, running = asyncio.run(self.__play(slices, watcher))
+        game_pids, background_pids = started
+        restored = self.__procs(self.ORIGIN)
+        threads = self.THREADS + 4 + 2
+
+        print("Game cgroup scopes")
+        print(f"    game     {len(spawned)} processes ({threads} threads) in {stats['game_moved']} moves, CPUs {self.__read(self.slices_class.GAME, 'cpuset.cpus')}")
+        print(f"    background {len(background_pids)} processes in {stats['background_moved']} moves, CPUs {self.__read(self.slices_class.BACKGROUND, 'cpuset.cpus')}")
+        print(f"    restored {slices.get_stats()['restored']} processes after exit")
+
+        if not slices.available():
+            failures.append("cgroups: stand-in cgroupfs or busctl not detected")
+        if game_pids != [game, game + 100]:
+            failures.append(f"cgroups: game scope has {game_pids} at start")
+        if background_pids != [101, 102, 103]:
+            failures.append(f"cgroups: background scope has {background_pids}")
+        if spawned != [game, game + 100, game + 200]:
+            failures.append(f"cgroups: new child not moved, game scope has {spawned}")
+        if stats["game_moved"] != 3 or stats["background_moved"] != 3:
+            failures.append(f"cgroups: expected one move per process, got {stats['game_moved']} + {stats['background_moved']}")
+        if self.__read(self.slices_class.GAME, "cpu.weight") != "1000":
+            failures.append("cgroups: game scope weight not set")
+        if self.__read(self.slices_class.BACKGROUND, "cpu.max") != "200000 100000":
+            failures.append("cgroups: background scope not capped at two CPUs")
+        if self.__read(self.slices_class.GAME, "cpuset.cpus") != ",".join(str(c) for c in fast):
+            failures.append("cgroups: game scope not on the fast L3 cluster")
+        if self.__read(self.slices_class.BACKGROUND, "cpuset.cpus") != ",".join(str(c) for c in efficiency):
+            failures.append("cgroups: background scope not on the efficiency L3 cluster")
+        if running:
+            failures.append("cgroups: watcher still running after the game exited")
+        if restored != [101, 102, 103, game, game + 100, game + 200]:
+            failures.append(f"cgroups: origin cgroup has {restored} after exit")
+        return failures
+
+
+class Simulator:
+    """Runs backend control loops against synthetic workloads"""
+
+    def run(self):
+        simulation = Simulation("z2e")
+        simulation.install()
+        try:
+            failures = []
+            for scenarios in (
+                GpuGovernorScenarios(),
+                TdpControllerScenarios(),
+                CoreParkingScenarios(simulation),
+                RyzenAdjScenarios(),
+                GameSliceScenarios(simulation),
+            ):
+                failures += scenarios.run()
+        finally:
+            simulation.cleanup()
+
+        if failures:
+            print("\nFailed checks:")
+            for f in failures:
+                print("    " + f)
+            sys.exit(1)
@@ -0,0 +1,235 @@
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import types
+from jobs.utils import Utils
+
+
+class SimulatedDevice:
+    # clusters: physical cores per L3 complex, smallest complex is detected as P-cores
+    DEVICES = {
+        "z1e": {
+            "model": "AMD Ryzen Z1 Extreme w/ Radeon 780M Graphics",
+            "clusters": [8],
+            "smt": True,
+            "sclk": [800, 2700],
+            "od_sample": "phoenix",
+        },
+        "z2e": {
+            "model": "AMD Ryzen AI Z2 Extreme w/ Radeon 890M",
+            "clusters": [3, 5],
+            "smt": True,
+            "sclk": [600, 2900],
+            "od_sample": "strix",
+        },
+        "z2a": {
+            "model": "AMD Ryzen Z2 A",
+            "clusters": [4],
+            "smt": True,
+            "sclk": [800, 1600],
+            "od_sample": "vangogh",
+        },
+        "stress64": {
+            "model": "AMD Ryzen Z9 Simulated 64-Thread",
+            "clusters": [16, 16],
+            "smt": True,
+            "sclk": [600, 2900],
+            "od_sample": "strix",
+        },
+    }
+
+    KERNEL = "6.17.2-2-cachyos-simulated"
+    SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples")
+
+    def __init__(self, name):
+        self.name = name
+        self.spec = SimulatedDevice.DEVICES[name]
+        self.physical = sum(self.spec["clusters"])
+        self.threads = self.physical * (2 if self.spec["smt"] else 1)
+
+    @staticmethod
+    def __write(path, value):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(str(value) + "\n")
+
+    @staticmethod
+    def __cpu_list(cpus):
+        ranges = []
+        for cpu in sorted(cpus):
+            if ranges and ranges[-1][1] == cpu - 1:
+                ranges[-1][1] = cpu
+            else:
+                ranges.append([cpu, cpu])
+        return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+    def siblings(self, core):
+        # Linux enumerates every physical core first and SMT siblings after them
+        if not self.spec["smt"]:
+            return [core]
+        return [core, core + self.physical]
+
+    def od_clk_voltage(self):
+        # Captured from the amdgpu driver on the matching APU, in automatic mode
+        sample = os.path.join(SimulatedDevice.SAMPLES_DIR, "pp_od_clk_voltage." + self.spec["od_sample"])
+        with open(sample) as f:
+            return f.read().strip()
+
+    def build(self, root):
+        cpu_dir = os.path.join(root, "sys/devices/system/cpu")
+
+        first = 0
+        for cluster in self.spec["clusters"]:
+            cores = list(range(first, first + cluster))
+            first += cluster
+            l3 = self.__cpu_list([t for c in cores for t in self.siblings(c)])
+            for core in cores:
+                for cpu in self.siblings(core):
+                    self.__build_cpu(cpu_dir, cpu, self.__cpu_list(self.siblings(core)), l3)
+
+        self.__write(f"{cpu_dir}/smt/control", "on" if self.spec["smt"] else "notsupported")
+        self.__write(f"{cpu_dir}/online", f"0-{self.threads - 1}")
+        self.__write(f"{root}/sys/firmware/acpi/platform_profile", "balanced")
+
+        armoury = f"{root}/sys/class/firmware-attributes/asus-armoury/attributes"
+        for attr, current, low, high in (
+            ("ppt_pl1_spl", 15, 5, 30),
+            ("ppt_pl2_sppt", 15, 5, 43),
+            ("ppt_pl3_fppt", 15, 5, 53),
+        ):
+            self.__write(f"{armoury}/{attr}/current_value", current)
+            self.__write(f"{armoury}/{attr}/min_value", low)
+            self.__write(f"{armoury}/{attr}/max_value", high)
+        self.__write(f"{armoury}/mcu_powersave/current_value", 0)
+
+        wmi = f"{root}/sys/devices/platform/asus-nb-wmi"
+        for attr in ("ppt_pl1_spl", "ppt_pl2_sppt", "ppt_fppt", "mcu_powersave"):
+            self.__write(f"{wmi}/{attr}", 15 if attr.startswith("ppt") else 0)
+
+        battery = f"{root}/sys/class/power_supply/BAT0"
+        self.__write(f"{battery}/power_now", 12500000)
+        self.__write(f"{battery}/capacity", 80)
+        self.__write(f"{battery}/charge_control_end_threshold", 100)
+        self.__write(f"{root}/sys/class/power_supply/AC0/online", 0)
+
+        gpu = f"{root}/sys/class/drm/card0/device"
+        self.__write(f"{gpu}/pp_od_clk_voltage", self.od_clk_voltage())
+        self.__write(f"{gpu}/power_dpm_force_performance_level", "auto")
+        self.__write(f"{gpu}/gpu_busy_percent", 35)
+
+        amdgpu = f"{root}/sys/class/hwmon/hwmon0"
+        self.__write(f"{amdgpu}/name", "amdgpu")
+        self.__write(f"{amdgpu}/power1_average", 14000000)
+        self.__write(f"{amdgpu}/temp1_input", 55000)
+        self.__write(f"{amdgpu}/freq1_input", 1600000000)
+        k10temp = f"{root}/sys/class/hwmon/hwmon1"
+        self.__write(f"{k10temp}/name", "k10temp")
+        self.__write(f"{k10temp}/temp1_input", 62000)
+        self.__write(f"{root}/sys/class/thermal/thermal_zone0/type", "acpitz")
+        self.__write(f"{root}/sys/class/thermal/thermal_zone0/temp", 38000)
+
+        self.__write(f"{root}/proc/sys/kernel/osrelease", SimulatedDevice.KERNEL)
+        self.__write(
+            f"{root}/proc/cpuinfo",
+            "\n".join(
+                f"processor\t: {cpu}\nmodel name\t: {self.spec['model']}\n"
+                for cpu in range(self.threads)
+            ),
+        )
+        self.__write(
+            f"{root}/proc/stat",
+            "\n".join(
+                ["cpu  0 0 0 0 0 0 0 0 0 0"]
+                + [f"cpu{cpu} 0 0 0 0 0 0 0 0 0 0" for cpu in range(self.threads)]
+            ),
+        )
+
+        # Stand-in cgroup v2 root, systemd is played by the busctl stand-in
+        cgroup = f"{root}/sys/fs/cgroup"
+        self.__write(f"{cgroup}/cgroup.controllers", "cpuset cpu io memory pids")
+        self.__write(f"{cgroup}/cgroup.subtree_control", "cpuset cpu io memory pids")
+        self.__write(f"{cgroup}/cgroup.procs", 1)
+        self.__write(f"{cgroup}/user.slice/app.slice/cgroup.procs", "")
+
+    def __build_cpu(self, cpu_dir, cpu, siblings, l3):
+        path = f"{cpu_dir}/cpu{cpu}"
+        if cpu != 0:
+            self.__write(f"{path}/online", 1)
+
+        # cpuN/cpufreq is a link to its policy, as in the kernel
+        policy = f"{cpu_dir}/cpufreq/policy{cpu}"
+        self.__write(f"{policy}/boost", 1)
+        self.__write(f"{policy}/scaling_governor", "powersave")
+        self.__write(f"{policy}/energy_performance_preference", "balance_performance")
+        self.__write(f"{policy}/scaling_cur_freq", 1400000)
+        self.__write(f"{policy}/affected_cpus", cpu)
+        os.makedirs(path, exist_ok=True)
+        os.symlink(f"../cpufreq/policy{cpu}", f"{path}/cpufreq")
+
+        self.__write(f"{path}/topology/cluster_cpus_list", siblings)
+        for index, (level, ctype, shared) in enumerate(
+            (
+                ("1", "Data", siblings),
+                ("1", "Instruction", siblings),
+                ("2", "Unified", siblings),
+                ("3", "Unified", l3),
+            )
+        ):
+            self.__write(f"{path}/cache/index{index}/level", level)
+            self.__write(f"{path}/cache/index{index}/type", ctype)
+            self.__write(f"{path}/cache/index{index}/shared_cpu_list", shared)
+
+
+class Simulation:
+    """Runs backend modules against a generated sysfs tree in this process"""
+
+    def __init__(self, device):
+        self.device = SimulatedDevice(device)
+        self.root = tempfile.mkdtemp(prefix=f"ally-sim-{device}-")
+        self.sysfs = os.path.join(self.root, "fs")
+        self.device.build(self.sysfs)
+
+    def install(self):
+        # Must run before any backend module is imported, paths are resolved at import
+        os.environ["ALLY_SYSFS_ROOT"] = self.sysfs
+
+        for name in ("settings", "runtime", "logs", "home"):
+            os.makedirs(os.path.join(self.root, name), exist_ok=True)
+        with open(os.path.join(self.root, "settings", "plugin.json"), "w") as f:
+            f.write("{}")
+
+        # Same setup as Decky: one synchronous file handler on the plugin logger
+        logger = logging.getLogger("ally-sim")
+        logger.addHandler(logging.FileHandler(os.path.join(self.root, "logs", "plugin.log")))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+        decky = types.ModuleType("decky")
+        decky.logger = logger
+        decky.DECKY_PLUGIN_NAME = Utils.plugin_name
+        decky.DECKY_PLUGIN_DIR = Utils.plugin_dir
+        decky.DECKY_PLUGIN_SETTINGS_DIR = os.path.join(self.root, "settings")
+        decky.DECKY_PLUGIN_RUNTIME_DIR = os.path.join(self.root, "runtime")
+        decky.DECKY_PLUGIN_LOG_DIR = os.path.join(self.root, "logs")
+        decky.DECKY_PLUGIN_LOG = os.path.join(self.root, "logs", "plugin.log")
+        decky.DECKY_USER_HOME = os.path.join(self.root, "home")
+        decky.DECKY_HOME = os.path.join(self.root, "home")
+        sys.modules["decky"] = decky
+
+        sys.path.insert(0, os.path.join(Utils.plugin_dir, "py_modules"))
+
+        bin_dir = os.path.join(self.root, "bin")
+        os.makedirs(bin_dir, exist_ok=True)
+        standin = os.path.join(os.path.dirname(os.path.abspath(__file__)), "busctl_standin.py")
+        with open(os.path.join(bin_dir, "busctl"), "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{standin}" "$@"\n')
+        os.chmod(os.path.join(bin_dir, "busctl"), 0o755)
+        os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
+
+    def path(self, path):
+        return self.sysfs + path
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -1,8 +1,7 @@
 # pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods, disable=consider-using-with
 
-import os
+import asyncio
 import shutil
-from time import sleep
 from plugin_config import PluginConfig
 from plugin_logger import PluginLogger
 from plugin_update import PluginUpdate
@@ -10,8 +9,21 @@ from utils.sdtdp import SDTDP
 from utils.hardware import HARDWARE
 from utils.performance.cpu import CPU_PERFORMANCE
 from utils.performance.gpu import GPU_PERFORMANCE
+from utils.performance.gpu_governor import GPU_GOVERNOR
+from utils.performance.tdp_controller import TDP_CONTROLLER
+from utils.performance.core_parker import CORE_PARKER, CoreParker
+from utils.performance.affinity import AFFINITY
+from utils.performance.cgroups import CGROUPS
 from utils.performance.scx_sched import SCX_SCHED
+from utils.performance.profile import PROFILE_APPLIER
 from utils.miscelanea import MISCELANEA
+from utils.icon_cache import ICON_CACHE
+from utils.icon_store import ICON_STORE
+from utils.hw_service import HW_SERVICE
+from utils.sysfs import SYSFS
+from utils.game_watcher import GAME_WATCHER
+from utils.startup import STARTUP
+from utils.telemetry import TELEMETRY
 
 import decky  # pylint: disable=import-error
 
@@ -22,13 +34,50 @@ class Plugin:
     # Lifecycle
 
     async def _main(self):
-        PluginLogger.configure_logger()
+        STARTUP.run("logger", PluginLogger.configure_logger)
         decky.logger.info("Running " + decky.DECKY_PLUGIN_NAME)
-        if not os.path.exists(MISCELANEA.ICONS_PATH):
-            os.makedirs(MISCELANEA.ICONS_PATH, exist_ok=True)
+        self.hardware_init = asyncio.create_task(self.__initialize_hardware())
+
+    async def __initialize_hardware(self):
+        """Initialize hardware backends concurrently in the background"""
+        await asyncio.gather(
+            HW_SERVICE.run(
+                HW_SERVICE.CPU, STARTUP.run, "cpu", CPU_PERFORMANCE.initialize
+            ),
+            HW_SERVICE.run(
+                HW_SERVICE.GPU, STARTUP.run, "gpu", GPU_PERFORMANCE.initialize
+            ),
+            HW_SERVICE.run(
+                HW_SERVICE.SCHEDULER, STARTUP.run, "scheduler", SCX_SCHED.initialize
+            ),
+        )
 
     async def _unload(self):
         decky.logger.info("Unloading " + decky.DECKY_PLUGIN_NAME)
+        await GAME_WATCHER.stop()
+        await TELEMETRY.stop()
+        await GPU_GOVERNOR.stop()
+        await TDP_CONTROLLER.stop()
+        await CORE_PARKER.stop()
+        PluginConfig.flush()
+        ICON_STORE.flush()
+        # Last job on the CPU lane, so no TDP write is still using the SMU handle
+        await HW_SERVICE.run(HW_SERVICE.CPU, CPU_PERFORMANCE.shutdown)
+        HW_SERVICE.shutdown()
+        SYSFS.close_handles()
+        PluginLogger.stop()
+
+    async def on_resume(self):
+        """Drop cached hardware state, firmware may have reset it while suspended"""
+        decky.logger.debug("Executing: on_resume()")
+        SYSFS.invalidate()
+        GPU_PERFORMANCE.invalidate()
+        CPU_PERFORMANCE.invalidate()
+        PROFILE_APPLIER.reset()
+
+    async def get_startup_report(self):
+        """Get backend startup phase timings"""
+        return STARTUP.get_report()
 
     async def _migration(self):
         decky.logger.info("Migrating plugin configuration")
@@ -45,6 +94,15 @@ class Plugin:
         decky.logger.debug("Executing: set_config(%s, %s)", key, str(value))
         PluginConfig.set_config(key, value)
 
+    async def set_configs(self, entries: dict):
+        """Set several plugin config entries at once"""
+        decky.logger.debug("Executing: set_configs(%s)", str(entries))
+        PluginConfig.set_configs(entries)
+
+    async def get_config_stats(self):
+        """Get plugin config read/write counters"""
+        return PluginConfig.get_stats()
+
     # Logger
     async def log(self, level: str, msg: str) -> int:
         """Write line to log"""
@@ -53,30 +111,98 @@ class Plugin:
     async def get_plugin_log(self) -> str:
         """Get plugin log file content"""
         decky.logger.debug("Executing: get_plugin_log()")
-        return PluginLogger.get_plugin_log()
+        return await HW_SERVICE.run(HW_SERVICE.STORAGE, PluginLogger.get_plugin_log)
+
+    async def get_plugin_log_page(
+        self, offset: int = 0, limit: int = 200, min_level: str = "DEBUG"
+    ):
+        """Get page of current session log entries, newest first"""
+        return await HW_SERVICE.run(
+            HW_SERVICE.STORAGE,
+            PluginLogger.get_plugin_log_page,
+            offset,
+            limit,
+            min_level,
+        )
+
+    # Telemetry
+    async def get_telemetry(self, since_seq: int = 0):
+        """Get telemetry samples taken after since_seq, sampling while this keeps being called"""
+        await TELEMETRY.start()
+        return TELEMETRY.get_since(since_seq)
 
     # HARDWARE
+    async def get_sysfs_stats(self):
+        """Get sysfs cache counters"""
+        return SYSFS.get_stats()
+
     async def set_charge_limit(self, limit: int):
         """Set device charge limit"""
-        HARDWARE.set_charge_limit(limit)
+        await HW_SERVICE.run(HW_SERVICE.POWER, HARDWARE.set_charge_limit, limit)
 
     async def set_mcu_powersave(self, enabled: bool):
         """Set MCU power save mode"""
-        HARDWARE.set_mcu_powersave(enabled)
+        await HW_SERVICE.run(HW_SERVICE.POWER, HARDWARE.set_mcu_powersave, enabled)
+
+    # Profile
+    async def apply_profile(self, profile: dict):
+        """Apply CPU/GPU profile, writing only what changed"""
+        decky.logger.debug("Executing: apply_profile(%s)", str(profile))
+        cpu = profile.get("cpu")
+        gpu = profile.get("gpu")
+        if gpu:
+            # No sample may land after the applier. Turning auto off changes the
+            # target so the applier rewrites the band, auto mode rewrites it itself
+            await GPU_GOVERNOR.stop(restore=False)
+        if cpu and not cpu.get("adaptive_tdp", False):
+            # Put profile limits back before the applier compares against them
+            await TDP_CONTROLLER.stop()
+        if cpu:
+            # Applier skips cores it believes are already set, so unpark first
+            await CORE_PARKER.stop()
+        result = await HW_SERVICE.run(
+            (HW_SERVICE.CPU, HW_SERVICE.GPU, HW_SERVICE.SCHEDULER),
+            PROFILE_APPLIER.apply,
+            profile,
+        )
+        if gpu:
+            await GPU_GOVERNOR.configure(gpu["min"], gpu["max"], gpu.get("auto", False))
+        if cpu and cpu.get("adaptive_tdp", False):
+            tdp = cpu["tdp"]
+            await TDP_CONTROLLER.configure(
+                (tdp["spl"], tdp["sppl"], tdp["fppl"]), bool(cpu["boost"]), True
+            )
+        if cpu:
+            policy = CGROUPS if CGROUPS.available() else AFFINITY
+            await HW_SERVICE.run(
+                HW_SERVICE.PROCESS, policy.configure, cpu.get("pin_game", False)
+            )
+        if cpu and cpu.get("core_parking", False):
+            await CORE_PARKER.configure(
+                cpu["pcores"],
+                cpu["ecores"],
+                cpu["smt"],
+                True,
+                cpu.get("parking_min_pcores", CoreParker.DEFAULT_MIN_P_CORES),
+                cpu.get("parking_min_ecores", CoreParker.DEFAULT_MIN_E_CORES),
+            )
+        return result
 
     # CPU
     async def set_governor(self, governor: str):
         """Set CPU governor"""
-        return CPU_PERFORMANCE.set_governor(governor)
+        return await HW_SERVICE.run(
+            HW_SERVICE.CPU, CPU_PERFORMANCE.set_governor, governor
+        )
 
     async def set_epp(self, epp: str):
         """Set CPU epp"""
-        return CPU_PERFORMANCE.set_epp(epp)
+        return await HW_SERVICE.run(HW_SERVICE.CPU, CPU_PERFORMANCE.set_epp, epp)
 
     async def set_platform_profile(self, prof: str):
         """Set CPU platform profile"""
-        CPU_PERFORMANCE.set_platform_profile(prof)
-        sleep(0.1)
+        await HW_SERVICE.run(HW_SERVICE.CPU, CPU_PERFORMANCE.set_platform_profile, prof)
+        await asyncio.sleep(0.1)
 
     async def get_cpu_impl(self):
         """Set CPU manager id"""
@@ -85,65 +211,119 @@ class Plugin:
     async def get_tdp_ranges(self):
         """Get CPU TDP ranges"""
         try:
-            return CPU_PERFORMANCE.get_tdp_ranges()
+            return await HW_SERVICE.run(HW_SERVICE.CPU, CPU_PERFORMANCE.get_tdp_ranges)
         except Exception as e:
             decky.logger.error(e)
 
+    async def get_tdp_controller_stats(self):
+        """Get adaptive TDP controller state and counters"""
+        return TDP_CONTROLLER.get_stats()
+
     async def set_tdp(self, spl: int, sppl: int, fppl: int):
         """Set CPU TDP"""
         try:
-            CPU_PERFORMANCE.set_tdp(spl, sppl, fppl)
+            await TDP_CONTROLLER.stop(restore=False)
+            await HW_SERVICE.run(
+                HW_SERVICE.CPU, CPU_PERFORMANCE.set_tdp, spl, sppl, fppl
+            )
         except Exception as e:
             decky.logger.error(e)
 
     async def set_cpu_boost(self, enabled: bool):
         """Set CPU boost"""
-        CPU_PERFORMANCE.set_cpu_boost(enabled)
+        await TDP_CONTROLLER.stop(restore=False)
+        await HW_SERVICE.run(HW_SERVICE.CPU, CPU_PERFORMANCE.set_cpu_boost, enabled)
 
     async def set_smt(self, enabled: bool):
         """Set CPU multithreading status"""
-        CPU_PERFORMANCE.set_smt(enabled)
-        sleep(0.1)
+        await CORE_PARKER.stop(restore=False)
+        await HW_SERVICE.run(HW_SERVICE.CPU, CPU_PERFORMANCE.set_smt, enabled)
+        await asyncio.sleep(0.1)
 
     async def renice(self, pid: int):
-        """Renice processes"""
-        CPU_PERFORMANCE.renice(pid)
+        """Renice process tree and keep watching it for new children"""
+        try:
+            if CGROUPS.available():
+                return await GAME_WATCHER.start(
+                    pid, CGROUPS.apply_game_processes, CGROUPS.reset_game, by_process=True
+                )
+            return await GAME_WATCHER.start(
+                pid,
+                AFFINITY.apply_game_threads,
+                AFFINITY.reset_game,
+                on_gone=AFFINITY.forget_game_threads,
+            )
+        except Exception as e:
+            decky.logger.error(f"Error while renicing: {e}")
+            return None
+
+    async def get_game_watcher_stats(self):
+        """Get process watcher counters"""
+        return GAME_WATCHER.get_stats()
+
+    async def get_affinity_stats(self):
+        """Get game affinity pinning state and counters"""
+        return AFFINITY.get_stats()
+
+    async def get_cgroup_stats(self):
+        """Get game and background cgroup slices state and counters"""
+        return CGROUPS.get_stats()
 
     async def get_cores_count(self):
         """Get CPU cores count"""
-        return CPU_PERFORMANCE.get_cores_count()
+        return await HW_SERVICE.run(HW_SERVICE.CPU, CPU_PERFORMANCE.get_cores_count)
+
+    async def get_core_parker_stats(self):
+        """Get core parker state and counters"""
+        return CORE_PARKER.get_stats()
 
     async def enable_cores(self, p_cores, e_cores, smt):
         """Enable CPU Cores"""
-        return CPU_PERFORMANCE.enable_cores(p_cores, e_cores, smt)
+        await CORE_PARKER.stop(restore=False)
+        return await HW_SERVICE.run(
+            HW_SERVICE.CPU, CPU_PERFORMANCE.enable_cores, p_cores, e_cores, smt
+        )
 
     # Schedulers
     async def get_schedulers(self):
         """Get all available schedulers"""
-        return SCX_SCHED.available
+        return await HW_SERVICE.run(HW_SERVICE.SCHEDULER, lambda: SCX_SCHED.available)
 
     async def set_scheduler(self, scheduler: str):
         """Activate scheduler"""
-        SCX_SCHED.start(scheduler)
+        await HW_SERVICE.run(HW_SERVICE.SCHEDULER, SCX_SCHED.start, scheduler)
 
     async def stop_scheduler(self):
         """Stop scheduler if running"""
-        SCX_SCHED.stop()
+        await HW_SERVICE.run(HW_SERVICE.SCHEDULER, SCX_SCHED.stop)
 
     # GPU
     async def get_gpu_frequency_range(self):
         """Get GPU freq range"""
-        return GPU_PERFORMANCE.get_gpu_frequency_range()
+        return await HW_SERVICE.run(
+            HW_SERVICE.GPU, GPU_PERFORMANCE.get_gpu_frequency_range
+        )
+
+    async def get_gpu_state(self):
+        """Get GPU overdrive state"""
+        return await HW_SERVICE.run(HW_SERVICE.GPU, GPU_PERFORMANCE.get_state)
+
+    async def get_gpu_governor_stats(self):
+        """Get auto GPU governor state and counters"""
+        return GPU_GOVERNOR.get_stats()
 
     async def set_gpu_frequency_range(self, min_freq: int, max_freq: int):
         """Set GPU freq range"""
-        return GPU_PERFORMANCE.set_gpu_frequency_range(min_freq, max_freq)
+        await GPU_GOVERNOR.stop(restore=False)
+        return await HW_SERVICE.run(
+            HW_SERVICE.GPU, GPU_PERFORMANCE.set_gpu_frequency_range, min_freq, max_freq
+        )
 
     # Plugin update
     async def ota_update(self):
         """trigger ota update"""
         try:
-            return PluginUpdate.ota_update()
+            return await HW_SERVICE.run(HW_SERVICE.NETWORK, PluginUpdate.ota_update)
         except Exception as e:
             decky.logger.error(e)
             return False
@@ -165,27 +345,44 @@ class Plugin:
         """Disable SDTDP"""
         src = SDTDP.plugin_dir
         dst = decky.DECKY_PLUGIN_DIR + "/SimpleDeckyTDP"
-        shutil.move(src, dst)
+        await HW_SERVICE.run(HW_SERVICE.STORAGE, shutil.move, src, dst)
         decky.logger.info(f"Moved '{src}' to '{dst}'")
         return True
 
     # Miscelanea
     async def get_icon_for_app(self, app_id: str):
         """Get icon for app"""
-        return MISCELANEA.get_icon_for_app(app_id)
+        return await HW_SERVICE.run(
+            HW_SERVICE.STORAGE, MISCELANEA.get_icon_for_app, app_id
+        )
+
+    async def get_icons_for_apps(self, app_ids: list[str]):
+        """Get icons for several apps in one call"""
+        return await HW_SERVICE.run(
+            HW_SERVICE.STORAGE, MISCELANEA.get_icons_for_apps, app_ids
+        )
+
+    async def get_icon_cache_stats(self):
+        """Get icon cache counters and store usage"""
+        return {"cache": ICON_CACHE.get_stats(), "store": ICON_STORE.get_stats()}
 
     async def save_icon_for_app(self, app_id: str, img: str):
         """Save icon for app"""
-        return MISCELANEA.save_icon_for_app(app_id, img)
+        return await HW_SERVICE.run(
+            HW_SERVICE.STORAGE, MISCELANEA.save_icon_for_app, app_id, img
+        )
 
     async def boot_bios(self):
         """Boot into BIOS/UEFI"""
-        return MISCELANEA.boot_bios()
+        return await HW_SERVICE.run(HW_SERVICE.SYSTEM, MISCELANEA.boot_bios)
 
     async def boot_windows(self):
         """Boot into windows"""
-        return MISCELANEA.boot_windows()
+        return await HW_SERVICE.run(HW_SERVICE.SYSTEM, MISCELANEA.boot_windows)
 
     async def windows_present(self):
         """Check if windows is installed"""
-        return MISCELANEA.get_windows_uefi_entry() is not None
+        entry = await HW_SERVICE.run(
+            HW_SERVICE.SYSTEM, MISCELANEA.get_windows_uefi_entry
+        )
+        return entry is not None
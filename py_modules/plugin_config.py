@@ -3,6 +3,7 @@
 import os
 from pathlib import Path
 import json
+import threading
 
 import decky  # pylint: disable=import-error
 
@@ -14,6 +15,73 @@ class PluginConfig:
     config_dir = Path(decky.DECKY_PLUGIN_SETTINGS_DIR)
     cfg_property_file = config_dir / "plugin.json"
 
+    FLUSH_DELAY = 0.5
+
+    __data: dict | None = None
+    __stamp: tuple[int, int] | None = None
+    __dirty = False
+    __timer: threading.Timer | None = None
+    __lock = threading.RLock()
+    __stats = {"reads": 0, "reloads": 0, "writes": 0, "flushes": 0}
+
+    @staticmethod
+    def __load() -> dict:
+        """Get in-memory configuration, reloading only if the file changed"""
+        with PluginConfig.__lock:
+            PluginConfig.__stats["reads"] += 1
+            if PluginConfig.__dirty:
+                return PluginConfig.__data
+
+            st = os.stat(PluginConfig.cfg_property_file)
+            stamp = (st.st_mtime_ns, st.st_size)
+            if PluginConfig.__data is None or stamp != PluginConfig.__stamp:
+                with open(
+                    PluginConfig.cfg_property_file, "r", encoding="utf-8"
+                ) as json_file:
+                    PluginConfig.__data = json.load(json_file)
+                PluginConfig.__stamp = stamp
+                PluginConfig.__stats["reloads"] += 1
+            return PluginConfig.__data
+
+    @staticmethod
+    def __schedule_flush():
+        """Mark configuration as modified and write it after FLUSH_DELAY"""
+        with PluginConfig.__lock:
+            PluginConfig.__dirty = True
+            PluginConfig.__stats["writes"] += 1
+            if PluginConfig.__timer is None:
+                PluginConfig.__timer = threading.Timer(
+                    PluginConfig.FLUSH_DELAY, PluginConfig.flush
+                )
+                PluginConfig.__timer.daemon = True
+                PluginConfig.__timer.start()
+
+    @staticmethod
+    def flush():
+        """Write pending changes to file atomically"""
+        with PluginConfig.__lock:
+            if PluginConfig.__timer is not None:
+                PluginConfig.__timer.cancel()
+                PluginConfig.__timer = None
+            if not PluginConfig.__dirty:
+                return
+
+            tmp_file = PluginConfig.cfg_property_file.with_suffix(".json.tmp")
+            with open(tmp_file, "w", encoding="utf-8") as json_file:
+                json.dump(PluginConfig.__data, json_file, indent=4)
+            os.replace(tmp_file, PluginConfig.cfg_property_file)
+
+            st = os.stat(PluginConfig.cfg_property_file)
+            PluginConfig.__stamp = (st.st_mtime_ns, st.st_size)
+            PluginConfig.__dirty = False
+            PluginConfig.__stats["flushes"] += 1
+
+    @staticmethod
+    def get_stats():
+        """Get configuration read/write counters"""
+        with PluginConfig.__lock:
+            return {**PluginConfig.__stats, "pending": PluginConfig.__dirty}
+
     @staticmethod
     def convert_value(value):
         """Convert value from json to python typing"""
@@ -47,9 +115,11 @@ class PluginConfig:
     @staticmethod
     def get_config():
         """Get configuration from file"""
-        with open(PluginConfig.cfg_property_file, "r", encoding="utf-8") as json_file:
-            config_data = json.load(json_file)
+        with PluginConfig.__lock:
+            return PluginConfig.__flatten(PluginConfig.__load())
 
+    @staticmethod
+    def __flatten(config_data):
         flat_config = {}
 
         stack = [(config_data, "")]
@@ -69,29 +139,33 @@ class PluginConfig:
     @staticmethod
     def set_config(key: str, value):
         """Set configuration entry"""
-        value = PluginConfig.convert_value(value)
-        with open(PluginConfig.cfg_property_file, "r+", encoding="utf-8") as json_file:
-            data = json.load(json_file)
+        PluginConfig.set_configs({key: value})
 
-            keys = key.split(".")
-            d = data
-
-            for k in keys[:-1]:
-                if k not in d:
-                    d[k] = {}
-                d = d[k]
+    @staticmethod
+    def set_configs(entries: dict):
+        """Set several configuration entries with a single deferred write"""
+        with PluginConfig.__lock:
+            data = PluginConfig.__load()
+
+            for key, value in entries.items():
+                value = PluginConfig.convert_value(value)
+                keys = key.split(".")
+                d = data
+
+                for k in keys[:-1]:
+                    if k not in d:
+                        d[k] = {}
+                    d = d[k]
 
-            d[keys[-1]] = value
+                d[keys[-1]] = value
 
-            json_file.seek(0)
-            json.dump(data, json_file, indent=4)
-            json_file.truncate()
+            PluginConfig.__schedule_flush()
 
     @staticmethod
     def delete_config(key: str):
         """Delete config entry"""
-        with open(PluginConfig.cfg_property_file, "r+", encoding="utf-8") as json_file:
-            data = json.load(json_file)
+        with PluginConfig.__lock:
+            data = PluginConfig.__load()
 
             keys = key.split(".")
             d = data
@@ -105,24 +179,18 @@ class PluginConfig:
             if keys[-1] in d:
                 del d[keys[-1]]
                 print(f"Key '{key}' has been deleted.")
+                PluginConfig.__schedule_flush()
             else:
                 print(f"Key '{key}' does not exist.")
 
-            json_file.seek(0)
-            json.dump(data, json_file, indent=4)
-            json_file.truncate()
-
     @staticmethod
     def get_config_item(name: str, default: str = None):
         """Get configuration entry"""
-        with open(PluginConfig.cfg_property_file, "r", encoding="utf-8") as json_file:
-            data = json.load(json_file)
-
-            keys = name.split(".")
-            d = data
+        with PluginConfig.__lock:
+            d = PluginConfig.__load()
 
-            for k in keys:
-                if k in d:
+            for k in name.split("."):
+                if isinstance(d, dict) and k in d:
                     d = d[k]
                 else:
                     return default
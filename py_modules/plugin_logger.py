@@ -1,6 +1,10 @@
 # pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods, disable=consider-using-with
 
 import logging
+import logging.handlers
+import os
+import queue
+import re
 
 from plugin_config import PluginConfig
 
@@ -32,25 +36,102 @@ class PluginLogger:
             case "error":
                 decky.logger.error(msg)
 
+    __listener: logging.handlers.QueueListener | None = None
+
+    BLOCK_SIZE = 64 * 1024
+    SESSION_MARKER = "Logger initialized at level"
+    LEVELS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+    LEVEL_PATTERN = re.compile(r"^\[[^\]]*\]\[(\w+)\]")
+
+    @staticmethod
+    def __reverse_lines(f):
+        """Yield lines from the end of a binary file, reading backward in blocks"""
+        pos = f.seek(0, os.SEEK_END)
+        tail = b""
+        while pos > 0:
+            size = min(PluginLogger.BLOCK_SIZE, pos)
+            pos -= size
+            f.seek(pos)
+            lines = (f.read(size) + tail).split(b"\n")
+            tail = lines[0]
+            for line in reversed(lines[1:]):
+                yield line.decode("utf-8", errors="replace")
+        yield tail.decode("utf-8", errors="replace")
+
+    @staticmethod
+    def __session_lines():
+        """Yield lines of the current session, newest first"""
+        with open(decky.DECKY_PLUGIN_LOG, "rb") as f:
+            for line in PluginLogger.__reverse_lines(f):
+                yield line
+                if PluginLogger.SESSION_MARKER in line:
+                    return
+
     @staticmethod
     def get_plugin_log() -> str:
         """
-        Retrieves the entire plugin log.
+        Retrieves the plugin log of the current session.
 
         Returns:
         str: The plugin log.
         """
-        log: str = ""
-        for line in reversed(list(open(decky.DECKY_PLUGIN_LOG, encoding="utf-8"))):
-            log = line + "\n" + log
-            if "Logger initialized at level" in line.strip():
+        lines = list(PluginLogger.__session_lines())
+        lines.reverse()
+        return "\n".join(lines)
+
+    @staticmethod
+    def get_plugin_log_page(offset: int = 0, limit: int = 200, min_level: str = "DEBUG"):
+        """
+        Retrieves a page of log entries of the current session, newest first.
+
+        Parameters:
+        offset (int): Number of matching entries to skip, counting from the newest.
+        limit (int): Maximum number of entries to return.
+        min_level (str): Lowest level to include ('debug', 'info', 'warn', or 'error').
+
+        Returns:
+        dict: Entries in chronological order and the offset of the next page, None if there is none.
+        """
+        threshold = PluginLogger.LEVELS.get(min_level.strip().upper(), 0)
+        entries: list[str] = []
+        skipped = 0
+        continuation: list[str] = []
+        has_more = False
+
+        for line in PluginLogger.__session_lines():
+            match = PluginLogger.LEVEL_PATTERN.match(line)
+            if match is None:
+                # Tracebacks and multi-line messages belong to the previous header
+                if line:
+                    continuation.append(line)
+                continue
+
+            entry = "\n".join([line] + continuation[::-1])
+            continuation = []
+            if PluginLogger.LEVELS.get(match.group(1).upper(), 0) < threshold:
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            if len(entries) == limit:
+                has_more = True
                 break
-        return log
+            entries.append(entry)
+
+        entries.reverse()
+        return {
+            "entries": entries,
+            "offset": offset,
+            "next_offset": offset + len(entries) if has_more else None,
+        }
 
     @staticmethod
     def configure_logger():
         """
         Configures the logger using the settings defined in PluginConfig.
+
+        Records are queued by the calling thread and written to the Decky
+        handlers by a background listener thread.
         """
         formatter = logging.Formatter(
             fmt="[%(asctime)s,%(msecs)03d][%(levelname)s]%(message)s",
@@ -58,5 +139,33 @@ class PluginLogger:
         )
         logger_level = PluginConfig.get_config_item("log_level", "INFO")
         decky.logger.setLevel(logger_level)
-        for h in decky.logger.handlers:
+
+        PluginLogger.stop()
+        handlers = list(decky.logger.handlers)
+        for h in handlers:
             h.setFormatter(formatter)
+            decky.logger.removeHandler(h)
+
+        log_queue = queue.SimpleQueue()
+        decky.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        PluginLogger.__listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        PluginLogger.__listener.start()
+
+    @staticmethod
+    def stop():
+        """
+        Flushes queued records and gives the Decky handlers back to the logger.
+        """
+        listener = PluginLogger.__listener
+        if listener is None:
+            return
+
+        listener.stop()
+        for h in list(decky.logger.handlers):
+            if isinstance(h, logging.handlers.QueueHandler):
+                decky.logger.removeHandler(h)
+        for h in listener.handlers:
+            decky.logger.addHandler(h)
+        PluginLogger.__listener = None
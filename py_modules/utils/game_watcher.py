@@ -0,0 +1,203 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import asyncio
+import os
+import time
+
+import decky  # pylint: disable=import-error
+from plugin_config import PluginConfig
+from utils.hw_service import HW_SERVICE
+from utils.processes import PROCESSES
+
+
+class GameWatcher:
+    """Class for applying priority to processes spawned by a running game"""
+
+    DEFAULT_INTERVAL_MS = 250
+
+    def __init__(self):
+        self.__task: asyncio.Task | None = None
+        self.__root: int | None = None
+        self.__parents: dict[int, int] = {}
+        self.__tree: set[int] = set()
+        self.__tids: set[int] = set()
+        self.__by_process = False
+        self.__on_gone = None
+        self.__stats = GameWatcher.__empty_stats()
+
+    @staticmethod
+    def __empty_stats():
+        return {
+            "scans": 0,
+            "processes": 0,
+            "threads": 0,
+            "failed": 0,
+            "last_scan_ms": 0.0,
+            "total_scan_ms": 0.0,
+        }
+
+    def __scan(self, apply):
+        """Find tree members and threads not seen before and apply priority to them"""
+        t0 = time.perf_counter()
+
+        alive = set(PROCESSES.list_pids())
+        for pid in [p for p in self.__parents if p not in alive]:
+            del self.__parents[pid]
+        self.__tree &= alive
+
+        # Only processes not seen in a previous scan need their stat read
+        new_children: dict[int, list[int]] = {}
+        for pid in alive:
+            if pid in self.__parents:
+                continue
+            ppid = PROCESSES.get_ppid(pid)
+            if ppid is None:
+                continue
+            self.__parents[pid] = ppid
+            new_children.setdefault(ppid, []).append(pid)
+
+        pending = list(self.__tree)
+        new_procs = 0
+        while pending:
+            pid = pending.pop()
+            for child in new_children.pop(pid, []):
+                if child not in self.__tree:
+                    self.__tree.add(child)
+                    pending.append(child)
+                    new_procs += 1
+
+        if self.__by_process:
+            # Threads follow their process, only tree members need applying
+            tids = set(self.__tree)
+        else:
+            tids = set()
+            for pid in self.__tree:
+                tids.update(PROCESSES.get_threads(pid))
+        new_tids = [tid for tid in tids if tid not in self.__tids]
+        gone = self.__tids - tids
+        self.__tids = tids
+
+        if gone and self.__on_gone is not None:
+            self.__on_gone(gone)
+
+        applied, failed = apply(new_tids) if new_tids else (0, 0)
+
+        elapsed = (time.perf_counter() - t0) * 1000
+        self.__stats["scans"] += 1
+        self.__stats["processes"] += new_procs
+        self.__stats["threads"] += applied
+        self.__stats["failed"] += failed
+        self.__stats["last_scan_ms"] = round(elapsed, 3)
+        self.__stats["total_scan_ms"] = round(
+            self.__stats["total_scan_ms"] + elapsed, 3
+        )
+
+        if new_tids:
+            decky.logger.debug(
+                "Process watcher applied priority to %d new threads (%d new processes) in %.3fms",
+                applied,
+                new_procs,
+                elapsed,
+            )
+        return {
+            "processes": len(self.__tree),
+            "threads": applied,
+            "failed": failed,
+            "elapsed_ms": round(elapsed, 3),
+        }
+
+    async def start(self, root: int, apply, on_exit=None, by_process=False, on_gone=None):
+        """Apply priority to the tree of root now and keep watching for new members.
+
+        apply receives a list of new thread ids, or process ids with by_process,
+        and returns (applied, failed).
+        on_gone receives the ids from earlier scans that have since exited.
+        on_exit is called once watching stops, whether the game exited or not.
+        """
+        await self.stop()
+
+        self.__root = root
+        self.__by_process = by_process
+        self.__on_gone = on_gone
+        self.__parents = {}
+        self.__tree = {root}
+        self.__tids = set()
+        self.__stats = GameWatcher.__empty_stats()
+
+        result = await HW_SERVICE.run(HW_SERVICE.PROCESS, self.__scan, apply)
+
+        interval = (
+            int(
+                PluginConfig.get_config_item(
+                    "settings.process_watcher_interval_ms",
+                    GameWatcher.DEFAULT_INTERVAL_MS,
+                )
+            )
+            / 1000
+        )
+        self.__task = asyncio.create_task(self.__run(root, apply, interval, on_exit))
+        return result
+
+    async def __run(self, root: int, apply, interval: float, on_exit):
+        loop = asyncio.get_running_loop()
+        exited = asyncio.Event()
+
+        pidfd = None
+        try:
+            pidfd = os.pidfd_open(root)
+            loop.add_reader(pidfd, exited.set)
+        except (OSError, AttributeError):
+            pidfd = None
+
+        decky.logger.info(f"Watching process tree of {root} every {interval}s")
+        try:
+            while not exited.is_set():
+                try:
+                    await asyncio.wait_for(exited.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+
+                if exited.is_set():
+                    break
+                if pidfd is None and not os.path.exists(
+                    f"{PROCESSES.PROC_PATH}/{root}"
+                ):
+                    break
+
+                await HW_SERVICE.run(HW_SERVICE.PROCESS, self.__scan, apply)
+        except Exception as e:
+            decky.logger.error(f"Process watcher error: {e}")
+        finally:
+            if pidfd is not None:
+                loop.remove_reader(pidfd)
+                os.close(pidfd)
+            if on_exit is not None:
+                try:
+                    # Shielded so restoring still finishes when the watcher is cancelled
+                    await asyncio.shield(HW_SERVICE.run(HW_SERVICE.PROCESS, on_exit))
+                except Exception as e:
+                    decky.logger.error(f"Process watcher exit hook error: {e}")
+            decky.logger.info(
+                f"Stopped watching process tree of {root} after {self.__stats['scans']} scans"
+            )
+
+    async def stop(self):
+        """Stop watching current process tree"""
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+
+    def get_stats(self):
+        """Get watcher counters"""
+        return {
+            "root": self.__root,
+            "running": self.__task is not None and not self.__task.done(),
+            **self.__stats,
+        }
+
+
+GAME_WATCHER = GameWatcher()
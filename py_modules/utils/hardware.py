@@ -3,40 +3,41 @@
 import os
 
 import decky  # pylint: disable=import-error
+from utils.sysfs import SYSFS
 
 
 class Hardware:
     """Class for managing Hardware adjustments"""
 
-    BAT_LIM_FN = "/sys/class/power_supply/BAT0/charge_control_end_threshold"
-    LEGACY_MCU_POWERSAVE_PATH = "/sys/devices/platform/asus-nb-wmi/mcu_powersave"
-    ASUS_ARMORY_MCU_POWERSAVE_PATH = "/sys/class/firmware-attributes/asus-armoury/attributes/mcu_powersave/current_value"
+    BAT_LIM_FN = SYSFS.path("/sys/class/power_supply/BAT0/charge_control_end_threshold")
+    LEGACY_MCU_POWERSAVE_PATH = SYSFS.path(
+        "/sys/devices/platform/asus-nb-wmi/mcu_powersave"
+    )
+    ASUS_ARMORY_MCU_POWERSAVE_PATH = SYSFS.path(
+        "/sys/class/firmware-attributes/asus-armoury/attributes/mcu_powersave/current_value"
+    )
 
     def set_charge_limit(self, lim: int):
         """Set battery charge limit"""
         decky.logger.debug(
             f"Setting charge limit to {lim}%  by writing to {Hardware.BAT_LIM_FN}"
         )
-        with open(Hardware.BAT_LIM_FN, "w") as f:
-            f.write(str(lim))
-            f.close()
+        SYSFS.write(Hardware.BAT_LIM_FN, lim)
 
     def set_mcu_powersave(self, enabled: bool):
         """Set MCU powersave mode"""
         if os.path.exists(Hardware.LEGACY_MCU_POWERSAVE_PATH):
-            with open(Hardware.LEGACY_MCU_POWERSAVE_PATH, "w") as file:
-                decky.logger.debug(
-                    f"Setting MCU powersave to {enabled} by writing to {Hardware.LEGACY_MCU_POWERSAVE_PATH}"
-                )
-                file.write("1" if enabled else "0")
-                file.close()
+            decky.logger.debug(
+                f"Setting MCU powersave to {enabled} by writing to {Hardware.LEGACY_MCU_POWERSAVE_PATH}"
+            )
+            SYSFS.write(Hardware.LEGACY_MCU_POWERSAVE_PATH, "1" if enabled else "0")
         elif os.path.exists(Hardware.ASUS_ARMORY_MCU_POWERSAVE_PATH):
-            with open(Hardware.ASUS_ARMORY_MCU_POWERSAVE_PATH, "w") as file:
-                decky.logger.debug(
-                    f"Setting MCU powersave to {enabled} by writing to {Hardware.ASUS_ARMORY_MCU_POWERSAVE_PATH}"
-                )
-                file.write("1" if enabled else "0")
-                file.close()
+            decky.logger.debug(
+                f"Setting MCU powersave to {enabled} by writing to {Hardware.ASUS_ARMORY_MCU_POWERSAVE_PATH}"
+            )
+            SYSFS.write(
+                Hardware.ASUS_ARMORY_MCU_POWERSAVE_PATH, "1" if enabled else "0"
+            )
 
 
 HARDWARE = Hardware()
@@ -0,0 +1,60 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import decky  # pylint: disable=import-error
+
+
+class HardwareService:
+    """Class for running blocking hardware work off the event loop"""
+
+    MAX_WORKERS = 4
+
+    CPU = "cpu"
+    GPU = "gpu"
+    POWER = "power"
+    SCHEDULER = "scheduler"
+    PROCESS = "process"
+    STORAGE = "storage"
+    SYSTEM = "system"
+    NETWORK = "network"
+    TELEMETRY = "telemetry"
+
+    def __init__(self):
+        self.__executor = ThreadPoolExecutor(
+            max_workers=HardwareService.MAX_WORKERS, thread_name_prefix="hw"
+        )
+        self.__locks: dict[str, asyncio.Lock] = {}
+
+    def __lock(self, device: str):
+        if device not in self.__locks:
+            self.__locks[device] = asyncio.Lock()
+        return self.__locks[device]
+
+    async def run(self, devices: str | tuple[str, ...], fn, *args, **kwargs):
+        """Run blocking function in the worker pool, serialized per device"""
+        if isinstance(devices, str):
+            devices = (devices,)
+
+        # Always acquire in the same order so multi-device calls cannot deadlock
+        locks = [self.__lock(d) for d in sorted(set(devices))]
+        for lock in locks:
+            await lock.acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.__executor, functools.partial(fn, *args, **kwargs)
+            )
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def shutdown(self):
+        """Stop accepting work and drop queued calls"""
+        decky.logger.debug("Shutting down hardware service")
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+
+HW_SERVICE = HardwareService()
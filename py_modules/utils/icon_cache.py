@@ -0,0 +1,86 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import base64
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+
+
+class IconCache:
+    """Class for keeping encoded icon data URIs in a size-bounded LRU"""
+
+    MAX_BYTES = 8 * 1024 * 1024
+
+    def __init__(self):
+        # path -> (mtime_ns, size, data uri), least recently used first
+        self.__entries: OrderedDict[str, tuple[int, int, str]] = OrderedDict()
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    @staticmethod
+    def __encode(path: str):
+        mime_type, _ = mimetypes.guess_type(path)
+        with open(path, "rb") as file:
+            image_bytes = file.read()
+        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
+        return f"data:{mime_type};base64,{image_base64}"
+
+    def __evict(self, path: str):
+        entry = self.__entries.pop(path, None)
+        if entry is not None:
+            self.__bytes -= len(entry[2])
+
+    def get(self, path: str) -> str | None:
+        """Get icon file as data URI, None if the file does not exist"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            with self.__lock:
+                self.__evict(path)
+            return None
+
+        with self.__lock:
+            entry = self.__entries.get(path)
+            if entry is not None and entry[:2] == (st.st_mtime_ns, st.st_size):
+                self.__entries.move_to_end(path)
+                self.__hits += 1
+                return entry[2]
+            self.__misses += 1
+
+        data = IconCache.__encode(path)
+
+        with self.__lock:
+            self.__evict(path)
+            self.__entries[path] = (st.st_mtime_ns, st.st_size, data)
+            self.__bytes += len(data)
+            while self.__bytes > IconCache.MAX_BYTES and len(self.__entries) > 1:
+                _, (_, _, old) = self.__entries.popitem(last=False)
+                self.__bytes -= len(old)
+                self.__evictions += 1
+        return data
+
+    def invalidate(self, path: str):
+        """Drop cached icon"""
+        with self.__lock:
+            self.__evict(path)
+
+    def get_stats(self):
+        """Get cache counters"""
+        with self.__lock:
+            total = self.__hits + self.__misses
+            return {
+                "entries": len(self.__entries),
+                "bytes": self.__bytes,
+                "max_bytes": IconCache.MAX_BYTES,
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "evictions": self.__evictions,
+                "hit_rate": round(self.__hits / total, 3) if total else 0.0,
+            }
+
+
+ICON_CACHE = IconCache()
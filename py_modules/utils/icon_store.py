@@ -0,0 +1,190 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import base64
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+import decky  # pylint: disable=import-error
+from utils.icon_cache import ICON_CACHE
+
+
+class IconStore:
+    """Class for storing app icons by content hash with a total size cap"""
+
+    ICONS_PATH = decky.DECKY_PLUGIN_RUNTIME_DIR + "/icons"
+    BLOBS_PATH = ICONS_PATH + "/store"
+    INDEX_FILE = ICONS_PATH + "/index.json"
+
+    # Frontend sends thumbnails, anything bigger than this is not an icon
+    MAX_ICON_BYTES = 256 * 1024
+    MAX_STORE_BYTES = 16 * 1024 * 1024
+
+    FORMATS = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
+
+    def __init__(self):
+        # apps: app_id -> hash, blobs: hash -> {ext, size, used}
+        self.__index: dict | None = None
+        self.__lock = threading.RLock()
+
+    def __blob_path(self, digest: str) -> str:
+        return f"{IconStore.BLOBS_PATH}/{digest}.{self.__index['blobs'][digest]['ext']}"
+
+    def __save_index(self):
+        tmp = IconStore.INDEX_FILE + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.__index, f)
+        os.replace(tmp, IconStore.INDEX_FILE)
+
+    def __load(self):
+        if self.__index is not None:
+            return
+
+        try:
+            with open(IconStore.INDEX_FILE) as f:
+                self.__index = json.load(f)
+            return
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            decky.logger.error(f"Invalid icon index, rebuilding: {e}")
+
+        self.__index = {"apps": {}, "blobs": {}}
+        os.makedirs(IconStore.BLOBS_PATH, exist_ok=True)
+        self.__remove_orphans()
+        self.__migrate()
+        self.__save_index()
+
+    def __remove_orphans(self):
+        """Delete blobs left by a lost index, nothing maps an app to them anymore"""
+        orphans = glob.glob(f"{IconStore.BLOBS_PATH}/*")
+        for path in orphans:
+            try:
+                os.remove(path)
+            except OSError as e:
+                decky.logger.error(f"Cannot remove orphan icon {path}: {e}")
+        if orphans:
+            decky.logger.info(f"Removed {len(orphans)} icons not in the index")
+
+    def __migrate(self):
+        """Move legacy icons/<app_id>.jpg files into the store"""
+        legacy = glob.glob(f"{IconStore.ICONS_PATH}/*.jpg")
+        for path in legacy:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                app_id = os.path.splitext(os.path.basename(path))[0]
+                if len(data) > IconStore.MAX_ICON_BYTES:
+                    decky.logger.warning(
+                        f"Dropped legacy icon for {app_id}: {len(data)} bytes exceeds {IconStore.MAX_ICON_BYTES}"
+                    )
+                else:
+                    self.__put(app_id, data, "jpg")
+                os.remove(path)
+            except Exception as e:
+                decky.logger.error(f"Cannot migrate icon {path}: {e}")
+        if legacy:
+            decky.logger.info(f"Migrated {len(legacy)} icons to the icon store")
+            self.__enforce_cap()
+
+    def __put(self, app_id: str, data: bytes, ext: str):
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in self.__index["blobs"]:
+            self.__index["blobs"][digest] = {"ext": ext, "size": len(data)}
+            tmp = self.__blob_path(digest) + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.__blob_path(digest))
+        self.__index["blobs"][digest]["used"] = time.time()
+
+        previous = self.__index["apps"].get(app_id)
+        self.__index["apps"][app_id] = digest
+        if previous is not None and previous != digest:
+            self.__drop_if_unused(previous)
+
+    def __drop_blob(self, digest: str):
+        path = self.__blob_path(digest)
+        del self.__index["blobs"][digest]
+        ICON_CACHE.invalidate(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def __drop_if_unused(self, digest: str):
+        if digest not in self.__index["apps"].values():
+            self.__drop_blob(digest)
+
+    def __enforce_cap(self):
+        blobs = self.__index["blobs"]
+        total = sum(b["size"] for b in blobs.values())
+        for digest in sorted(blobs, key=lambda d: blobs[d].get("used", 0)):
+            if total <= IconStore.MAX_STORE_BYTES:
+                break
+            total -= blobs[digest]["size"]
+            self.__index["apps"] = {
+                a: d for a, d in self.__index["apps"].items() if d != digest
+            }
+            self.__drop_blob(digest)
+            decky.logger.debug(f"Evicted icon {digest}")
+
+    def save(self, app_id: str, encoded_data: str) -> bool:
+        """Store data URI or base64 image for app. Returns False if rejected"""
+        mime_type = "image/jpeg"
+        if "base64," in encoded_data:
+            header, encoded_data = encoded_data.split(",", 1)
+            mime_type = header.removeprefix("data:").split(";")[0]
+
+        ext = IconStore.FORMATS.get(mime_type)
+        if ext is None:
+            decky.logger.warning(f"Rejected icon for {app_id}: unsupported {mime_type}")
+            return False
+
+        data = base64.b64decode(encoded_data)
+        if len(data) > IconStore.MAX_ICON_BYTES:
+            decky.logger.warning(
+                f"Rejected icon for {app_id}: {len(data)} bytes exceeds {IconStore.MAX_ICON_BYTES}"
+            )
+            return False
+
+        with self.__lock:
+            self.__load()
+            self.__put(app_id, data, ext)
+            self.__enforce_cap()
+            self.__save_index()
+        return True
+
+    def get(self, app_id: str) -> str | None:
+        """Get icon for app as data URI"""
+        with self.__lock:
+            self.__load()
+            digest = self.__index["apps"].get(app_id)
+            if digest is None:
+                return None
+            # Access time is kept in memory and persisted with the next save
+            self.__index["blobs"][digest]["used"] = time.time()
+            path = self.__blob_path(digest)
+        return ICON_CACHE.get(path)
+
+    def flush(self):
+        """Persist access times"""
+        with self.__lock:
+            if self.__index is not None:
+                self.__save_index()
+
+    def get_stats(self):
+        """Get store usage"""
+        with self.__lock:
+            self.__load()
+            return {
+                "apps": len(self.__index["apps"]),
+                "blobs": len(self.__index["blobs"]),
+                "bytes": sum(b["size"] for b in self.__index["blobs"].values()),
+                "max_bytes": IconStore.MAX_STORE_BYTES,
+            }
+
+
+ICON_STORE = IconStore()
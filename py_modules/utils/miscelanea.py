@@ -1,44 +1,33 @@
 # pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
 
-import base64
-import mimetypes
 import subprocess
-import os
 import re
 
-import decky  # pylint: disable=import-error
+from utils.icon_store import ICON_STORE
 
 
 class Miscelanea:
     """Class for multiple toggles and actions"""
 
-    ICONS_PATH = decky.DECKY_PLUGIN_RUNTIME_DIR + "/icons"
-
     def save_icon_for_app(self, app_id, encoded_data):
         """Save icon for app"""
-        if "base64," in encoded_data:
-            encoded_data = encoded_data.split(",")[1]
-
-        decoded = base64.b64decode(encoded_data)
-
-        file_name = Miscelanea.ICONS_PATH + "/" + app_id + ".jpg"
-        with open(file_name, "wb") as file:
-            file.write(decoded)
+        return ICON_STORE.save(app_id, encoded_data)
 
     def get_icon_for_app(self, app_id):
         """Get icon for app"""
-        file_name = Miscelanea.ICONS_PATH + "/" + app_id + ".jpg"
-
-        if not os.path.isfile(file_name):
-            return None
-
-        mime_type, _ = mimetypes.guess_type(file_name)
-
-        with open(file_name, "rb") as file:
-            image_bytes = file.read()
-        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-
-        return f"data:{mime_type};base64,{image_base64}"
+        return ICON_STORE.get(app_id)
+
+    def get_icons_for_apps(self, app_ids: list[str]):
+        """Get icons for several apps, listing the ones without icon as missing"""
+        icons = {}
+        missing = []
+        for app_id in app_ids:
+            icon = self.get_icon_for_app(app_id)
+            if icon is None:
+                missing.append(app_id)
+            else:
+                icons[app_id] = icon
+        return {"icons": icons, "missing": missing}
 
     def boot_bios(self):
         """Boot device into BIOS/UEFI"""
@@ -0,0 +1,139 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import os
+import threading
+
+import decky  # pylint: disable=import-error
+from utils.performance.cpu import CPU_PERFORMANCE
+from utils.processes import PROCESSES
+
+
+class AffinityPolicy:
+    """Class for pinning the game to the performance L3 cluster and background work to the other one"""
+
+    # Steam helpers that keep running next to the game, matched against comm (max 15 chars).
+    # Steam itself is left alone, anything it launches later would inherit its mask.
+    BACKGROUND = ("steamwebhelper", "fossilize_repla")
+
+    def __init__(self):
+        self.__enabled = False
+        self.__game_tids: set[int] = set()
+        self.__game_cpus: set[int] | None = None
+        self.__background_pids: set[int] = set()
+        self.__lock = threading.Lock()
+        self.__stats = {"game_pinned": 0, "background_pinned": 0, "failed": 0}
+
+    @staticmethod
+    def __clusters():
+        fast, efficiency = CPU_PERFORMANCE.get_l3_clusters()
+        # Hotplug leaves masks alone, but a mask with no online CPU is rejected
+        active = os.sched_getaffinity(0)
+        return (
+            set(fast) if active & set(fast) else None,
+            set(efficiency) if active & set(efficiency) else None,
+        )
+
+    @staticmethod
+    def __all_cpus():
+        CPU_PERFORMANCE.initialize()
+        return set(CPU_PERFORMANCE.cache_ids)
+
+    def __pin(self, tids, cpus: set[int]):
+        pinned = 0
+        for tid in tids:
+            try:
+                os.sched_setaffinity(tid, cpus)
+                pinned += 1
+            except OSError:
+                # Threads may exit while walking the tree
+                pass
+        return pinned
+
+    def __pin_background(self, cpus: set[int]):
+        pids = set()
+        for pid in PROCESSES.list_pids():
+            try:
+                with open(f"{PROCESSES.PROC_PATH}/{pid}/comm") as f:
+                    comm = f.read().strip()
+            except OSError:
+                continue
+            if comm in AffinityPolicy.BACKGROUND:
+                pids.add(pid)
+        # Threads and children created later inherit the mask
+        for pid in pids:
+            self.__stats["background_pinned"] += self.__pin(PROCESSES.get_threads(pid), cpus)
+        self.__background_pids = pids
+
+    def __pin_game(self, tids):
+        pinned = self.__pin(tids, self.__game_cpus)
+        self.__stats["game_pinned"] += pinned
+        self.__stats["failed"] += len(tids) - pinned
+
+    def __release(self):
+        if self.__game_cpus is None:
+            return
+        cpus = AffinityPolicy.__all_cpus()
+        self.__pin(self.__game_tids, cpus)
+        for pid in self.__background_pids:
+            self.__pin(PROCESSES.get_threads(pid), cpus)
+        self.__game_cpus = None
+        self.__background_pids = set()
+
+    def __apply(self):
+        fast, efficiency = AffinityPolicy.__clusters()
+        if fast is None or efficiency is None:
+            decky.logger.info("Only one L3 cluster online, game affinity not applied")
+            return
+        self.__game_cpus = fast
+        self.__pin_game(self.__game_tids)
+        self.__pin_background(efficiency)
+        decky.logger.info(
+            f"Pinned {len(self.__game_tids)} game threads to CPUs {sorted(fast)} and {len(self.__background_pids)} background processes to CPUs {sorted(efficiency)}"
+        )
+
+    def configure(self, enabled: bool):
+        """Turn pinning on or off, applying it to the game being watched right away"""
+        with self.__lock:
+            if enabled == self.__enabled:
+                return
+            self.__enabled = enabled
+            if enabled and self.__game_tids:
+                self.__apply()
+            elif not enabled:
+                self.__release()
+
+    def apply_game_threads(self, tids: list[int]):
+        """Apply game priority to new threads and pin them when enabled. Returns (applied, failed)"""
+        applied, failed = CPU_PERFORMANCE.renice_threads(tids)
+        with self.__lock:
+            first = not self.__game_tids
+            self.__game_tids.update(tids)
+            if self.__enabled and first:
+                self.__apply()
+            elif self.__game_cpus is not None:
+                self.__pin_game(tids)
+        return applied, failed
+
+    def forget_game_threads(self, tids):
+        """Drop threads that have exited from the game threads"""
+        with self.__lock:
+            self.__game_tids.difference_update(tids)
+
+    def reset_game(self):
+        """Release pinning and forget the game threads, once the game is gone"""
+        with self.__lock:
+            self.__release()
+            self.__game_tids = set()
+
+    def get_stats(self):
+        """Get pinning state and counters"""
+        return {
+            "enabled": self.__enabled,
+            "game_cpus": None if self.__game_cpus is None else sorted(self.__game_cpus),
+            "game_threads": len(self.__game_tids),
+            "background_processes": len(self.__background_pids),
+            **self.__stats,
+        }
+
+
+AFFINITY = AffinityPolicy()
@@ -0,0 +1,279 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import decky  # pylint: disable=import-error
+from utils.performance.affinity import AffinityPolicy
+from utils.performance.cpu import CPU_PERFORMANCE
+from utils.processes import PROCESSES
+from utils.sysfs import SYSFS
+
+
+class CgroupSlices:
+    """Class for running the game and Steam background work in their own cgroup v2 scopes"""
+
+    ROOT = SYSFS.path("/sys/fs/cgroup")
+
+    # Transient systemd scopes next to user.slice and system.slice, which run at the
+    # default weight of 100. Delegate lets the plugin add processes to them directly.
+    GAME = "ally-game.scope"
+    BACKGROUND = "ally-background.scope"
+
+    PROPERTIES = {
+        GAME: [("CPUWeight", "t", 1000), ("IOWeight", "t", 1000)],
+        # Background also gets capped at two CPUs worth of time
+        BACKGROUND: [
+            ("CPUWeight", "t", 20),
+            ("IOWeight", "t", 20),
+            ("CPUQuotaPerSecUSec", "t", 2000000),
+        ],
+    }
+
+    SYSTEMD = ["org.freedesktop.systemd1", "/org/freedesktop/systemd1", "org.freedesktop.systemd1.Manager"]
+
+    # systemd creates the scope cgroup once the start job runs
+    POLL_INTERVAL = 0.01
+    TIMEOUT = 0.5
+
+    def __init__(self):
+        self.__available: bool | None = None
+        self.__pinned = False
+        self.__origins: dict[int, str] = {}
+        self.__game_origin: str | None = None
+        self.__lock = threading.Lock()
+        self.__stats = {"game_moved": 0, "background_moved": 0, "restored": 0, "failed": 0}
+
+    def available(self):
+        """Check if a cgroup v2 hierarchy with the cpu controller is mounted and managed by systemd"""
+        if self.__available is None:
+            try:
+                controllers = SYSFS.read(
+                    f"{CgroupSlices.ROOT}/cgroup.controllers", use_cache=False
+                ).split()
+                self.__available = "cpu" in controllers and shutil.which("busctl") is not None
+            except OSError:
+                self.__available = False
+            if not self.__available:
+                decky.logger.info("No systemd cgroup v2 cpu controller, using per-thread priority")
+        return self.__available
+
+    @staticmethod
+    def __path(name: str, file: str):
+        return f"{CgroupSlices.ROOT}/{name}/{file}" if name else f"{CgroupSlices.ROOT}/{file}"
+
+    @staticmethod
+    def __busctl(method: str, signature: str, *args):
+        command = ["busctl", "call", *CgroupSlices.SYSTEMD, method, signature]
+        command += [str(a) for a in args]
+        result = subprocess.run(command, capture_output=True, text=True, check=False)
+        if result.returncode != 0:
+            raise OSError(f"{method} failed: {result.stderr.strip()}")
+
+    @staticmethod
+    def __properties(props: list[tuple]):
+        args = [len(props)]
+        for name, signature, value in props:
+            args += [name, signature]
+            args += [len(value), *value] if signature.startswith("a") else [value]
+        return args
+
+    def __cpuset_property(self, name: str):
+        # AllowedCPUs is a CPU bitmask, empty means every CPU
+        fast, efficiency = CPU_PERFORMANCE.get_l3_clusters()
+        cpus = (fast if name == CgroupSlices.GAME else efficiency) if self.__pinned and fast and efficiency else []
+        mask = bytearray((max(cpus) // 8 + 1) if cpus else 0)
+        for cpu in cpus:
+            mask[cpu // 8] |= 1 << (cpu % 8)
+        return ("AllowedCPUs", "ay", list(mask))
+
+    def __start_scope(self, name: str, pids: list[int]):
+        """Create the transient scope with pids in it, or add them if it is still around"""
+        if os.path.isdir(f"{CgroupSlices.ROOT}/{name}"):
+            return self.__move(name, pids)
+
+        # One exited process fails the whole unit, so only pass the live ones
+        pids = [pid for pid in pids if os.path.exists(f"{PROCESSES.PROC_PATH}/{pid}")]
+        if not pids:
+            return 0, 0
+        props = [
+            ("Slice", "s", "-.slice"),
+            ("Delegate", "b", "true"),
+            ("PIDs", "au", pids),
+            *CgroupSlices.PROPERTIES[name],
+            self.__cpuset_property(name),
+        ]
+        CgroupSlices.__busctl(
+            "StartTransientUnit",
+            "ssa(sv)a(sa(sv))",
+            name,
+            "fail",
+            *CgroupSlices.__properties(props),
+            0,
+        )
+        deadline = time.perf_counter() + CgroupSlices.TIMEOUT
+        while not os.path.isdir(f"{CgroupSlices.ROOT}/{name}"):
+            if time.perf_counter() >= deadline:
+                raise OSError(f"{name} not created after {CgroupSlices.TIMEOUT}s")
+            time.sleep(CgroupSlices.POLL_INTERVAL)
+        decky.logger.info(f"Started {name} with {len(pids)} processes")
+        return len(pids), 0
+
+    @staticmethod
+    def __origin(pid: int):
+        try:
+            with open(f"{PROCESSES.PROC_PATH}/{pid}/cgroup") as f:
+                for line in f:
+                    if line.startswith("0::"):
+                        return line[3:].strip().lstrip("/")
+        except OSError:
+            pass
+        return None
+
+    def __move(self, name: str, pids) -> tuple[int, int]:
+        """Move processes into a cgroup, one write each. Returns (moved, failed)"""
+        moved = 0
+        failed = 0
+        fd = os.open(CgroupSlices.__path(name, "cgroup.procs"), os.O_WRONLY | os.O_APPEND)
+        try:
+            for pid in pids:
+                try:
+                    os.write(fd, f"{pid}\n".encode())
+                    moved += 1
+                except OSError:
+                    # Process may exit while walking the tree
+                    failed += 1
+        finally:
+            os.close(fd)
+        return moved, failed
+
+    def __move_back(self, origin: str, pids) -> int | None:
+        """Move processes to their origin, or the closest cgroup still there. Returns moved or None"""
+        name = origin
+        while True:
+            try:
+                return self.__move(name, pids)[0]
+            except OSError:
+                if not name:
+                    decky.logger.error(f"Cannot move {len(pids)} processes back to {origin}")
+                    return None
+                # Session scope may be gone since the game started
+                name = os.path.dirname(name)
+
+    def __set_cpusets(self):
+        for name in (CgroupSlices.GAME, CgroupSlices.BACKGROUND):
+            if not os.path.isdir(f"{CgroupSlices.ROOT}/{name}"):
+                continue
+            try:
+                CgroupSlices.__busctl(
+                    "SetUnitProperties",
+                    "sba(sv)",
+                    name,
+                    "true",
+                    *CgroupSlices.__properties([self.__cpuset_property(name)]),
+                )
+            except OSError as e:
+                decky.logger.error(f"Cannot set {name} CPUs: {e}")
+
+    def __move_background(self):
+        pids = []
+        for pid in PROCESSES.list_pids():
+            if pid in self.__origins:
+                continue
+            try:
+                with open(f"{PROCESSES.PROC_PATH}/{pid}/comm") as f:
+                    comm = f.read().strip()
+            except OSError:
+                continue
+            if comm in AffinityPolicy.BACKGROUND:
+                origin = CgroupSlices.__origin(pid)
+                if origin is not None:
+                    self.__origins[pid] = origin
+                    pids.append(pid)
+        if not pids:
+            return
+        # Children spawned later start in the background scope on their own
+        try:
+            moved, failed = self.__start_scope(CgroupSlices.BACKGROUND, pids)
+        except OSError as e:
+            decky.logger.error(f"Cannot start {CgroupSlices.BACKGROUND}: {e}")
+            for pid in pids:
+                del self.__origins[pid]
+            moved, failed = 0, len(pids)
+        self.__stats["background_moved"] += moved
+        self.__stats["failed"] += failed
+
+    def configure(self, pinned: bool):
+        """Split scopes across the L3 clusters when pinned, otherwise let them use every CPU"""
+        with self.__lock:
+            if pinned == self.__pinned:
+                return
+            self.__pinned = pinned
+            self.__set_cpusets()
+
+    def apply_game_processes(self, pids: list[int]):
+        """Move new game processes into the game scope. Returns (applied, failed)"""
+        with self.__lock:
+            if self.__game_origin is None:
+                # Children start where their parent is, any tree member tells where the game came from
+                self.__game_origin = CgroupSlices.__origin(pids[0]) or ""
+                self.__move_background()
+            try:
+                moved, failed = self.__start_scope(CgroupSlices.GAME, pids)
+            except OSError as e:
+                decky.logger.error(f"Cannot move game processes to {CgroupSlices.GAME}: {e}")
+                moved, failed = 0, len(pids)
+            self.__stats["game_moved"] += moved
+            self.__stats["failed"] += failed
+            return moved, failed
+
+    def reset_game(self):
+        """Move everything back where it came from, once the game is gone"""
+        with self.__lock:
+            if self.__game_origin is None:
+                return
+            restored = 0
+
+            try:
+                game_pids = [
+                    int(p)
+                    for p in SYSFS.read(
+                        CgroupSlices.__path(CgroupSlices.GAME, "cgroup.procs"),
+                        use_cache=False,
+                    ).split()
+                ]
+            except OSError:
+                # Scope is removed by systemd once the last process leaves
+                game_pids = []
+            moved = self.__move_back(self.__game_origin, game_pids) if game_pids else 0
+            if moved is not None:
+                restored += moved
+
+            by_origin: dict[str, list[int]] = {}
+            for pid, origin in self.__origins.items():
+                by_origin.setdefault(origin, []).append(pid)
+            for origin, pids in by_origin.items():
+                moved = self.__move_back(origin, pids)
+                if moved is not None:
+                    restored += moved
+                    for pid in pids:
+                        del self.__origins[pid]
+
+            self.__stats["restored"] += restored
+            # Background processes that could not move stay known and are retried after the next game
+            self.__game_origin = None
+
+    def get_stats(self):
+        """Get scopes state and counters"""
+        return {
+            "available": bool(self.__available),
+            "pinned": self.__pinned,
+            "background_processes": len(self.__origins),
+            **self.__stats,
+        }
+
+
+CGROUPS = CgroupSlices()
@@ -0,0 +1,224 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import asyncio
+import math
+import time
+
+import decky  # pylint: disable=import-error
+from utils.hw_service import HW_SERVICE
+from utils.performance.cpu import CPU_PERFORMANCE
+from utils.sysfs import SYSFS
+
+
+class CoreParker:
+    """Class for taking idle CPUs offline and back online inside the profile core counts"""
+
+    INTERVAL = 1.0
+
+    # Keep enough CPUs online for the busy time to fit at TARGET, plus SPARE idle ones.
+    # Above SATURATED the real demand is unknown, so every profile CPU comes back.
+    TARGET = 0.6
+    SPARE = 1
+    SATURATED = 0.9
+
+    # Whole cores never parked for profiles saved without their own floors
+    DEFAULT_MIN_P_CORES = 2
+    DEFAULT_MIN_E_CORES = 0
+
+    # Parking goes one unit at a time, unparking jumps straight to what is needed
+    DOWN_DWELL = 3.0
+
+    def __init__(self):
+        self.__profile = (0, 0, False, 0, 0)
+        self.__online: list[int] = []
+        self.__units: list[list[int]] = []
+        self.__level = 0
+        self.__last_change = -math.inf
+        self.__cpu_times: dict[int, tuple[int, int]] = {}
+        self.__task: asyncio.Task | None = None
+        self.__stats = {"samples": 0, "parks": 0, "unparks": 0, "hotplug_writes": 0}
+
+    def reset(
+        self,
+        p_cores: int,
+        e_cores: int,
+        smt: bool,
+        min_p_cores: int = DEFAULT_MIN_P_CORES,
+        min_e_cores: int = DEFAULT_MIN_E_CORES,
+    ):
+        """Build park order for a profile, starting with every profile CPU online"""
+        CPU_PERFORMANCE.initialize()
+        p_list = CPU_PERFORMANCE.p_cores[: max(1, p_cores)]
+        e_list = CPU_PERFORMANCE.c_cores[: max(0, e_cores)]
+        # Floors are whole cores never parked, clamped to the profile counts
+        min_p = max(1, min(min_p_cores, len(p_list)))
+        min_e = max(0, min(min_e_cores, len(e_list)))
+
+        # SMT siblings first, then whole cores, efficiency cluster before performance cluster
+        units = []
+        if smt:
+            units += [
+                CPU_PERFORMANCE.smt_map[core]
+                for core in reversed(e_list + p_list)
+                if CPU_PERFORMANCE.smt_map.get(core)
+            ]
+        units += [[core] for core in reversed(e_list[min_e:])]
+        units += [[core] for core in reversed(p_list[min_p:])]
+
+        online = sorted(
+            cpu
+            for core in p_list + e_list
+            for cpu in [core] + (CPU_PERFORMANCE.smt_map.get(core, []) if smt else [])
+        )
+        # CPU 0 cannot go offline
+        self.__units = [unit for unit in units if 0 not in unit]
+        self.__online = online
+        self.__profile = (p_cores, e_cores, smt, min_p_cores, min_e_cores)
+        self.__level = 0
+        self.__last_change = -math.inf
+        self.__cpu_times = {}
+
+    def online_count(self, level: int):
+        """Get number of online CPUs with the first level units parked"""
+        return len(self.__online) - sum(len(unit) for unit in self.__units[:level])
+
+    def core_status(self, level: int):
+        """Get online state of every profile CPU with the first level units parked"""
+        parked = {cpu for unit in self.__units[:level] for cpu in unit}
+        return {cpu: cpu not in parked for cpu in self.__online}
+
+    def decide(self, busy: float, now: float) -> int | None:
+        """Feed busy CPUs (sum of online CPU utilization, 0-1 each). Returns new park level or None"""
+        self.__stats["samples"] += 1
+        online = self.online_count(self.__level)
+        wanted = math.ceil(busy / CoreParker.TARGET) + CoreParker.SPARE
+
+        level = self.__level
+        if busy / online > CoreParker.SATURATED:
+            level = 0
+        elif wanted > online:
+            while level > 0 and self.online_count(level) < wanted:
+                level -= 1
+        elif (
+            level < len(self.__units)
+            and self.online_count(level + 1) >= wanted
+            and now - self.__last_change >= CoreParker.DOWN_DWELL
+        ):
+            level += 1
+
+        if level == self.__level:
+            return None
+
+        self.__stats["parks" if level > self.__level else "unparks"] += 1
+        self.__level = level
+        self.__last_change = now
+        return level
+
+    def __busy(self):
+        busy = 0.0
+        times = {}
+        with open(SYSFS.path("/proc/stat")) as f:
+            for line in f:
+                if not line.startswith("cpu"):
+                    break
+                name, *fields = line.split()
+                if name == "cpu":
+                    continue
+                values = [int(v) for v in fields]
+                cpu = int(name[3:])
+                total = sum(values)
+                idle = values[3] + (values[4] if len(values) > 4 else 0)
+                times[cpu] = (total, idle)
+                previous = self.__cpu_times.get(cpu)
+                if previous is not None and total > previous[0]:
+                    busy += 1 - (idle - previous[1]) / (total - previous[0])
+        # Offline CPUs are missing from /proc/stat and start over when they come back
+        self.__cpu_times = times
+        return busy
+
+    def sample(self, now: float | None = None):
+        """Read per-CPU busy time once and park or unpark CPUs if needed"""
+        level = self.decide(self.__busy(), time.monotonic() if now is None else now)
+        if level is not None:
+            result = CPU_PERFORMANCE.set_cores_status(self.core_status(level))
+            written = len(result["online"]) + len(result["offline"])
+            self.__stats["hotplug_writes"] += written
+            decky.logger.debug(
+                "Core parker at level %d/%d, %d CPUs online, %d written",
+                level,
+                len(self.__units),
+                self.online_count(level),
+                written,
+            )
+
+    async def configure(
+        self,
+        p_cores: int,
+        e_cores: int,
+        smt: bool,
+        enabled: bool,
+        min_p_cores: int = DEFAULT_MIN_P_CORES,
+        min_e_cores: int = DEFAULT_MIN_E_CORES,
+    ):
+        """Run parker between the profile core floors and counts, or stop it if disabled"""
+        if not enabled:
+            await self.stop()
+            return
+
+        profile = (
+            int(p_cores),
+            int(e_cores),
+            bool(smt),
+            int(min_p_cores),
+            int(min_e_cores),
+        )
+        running = self.__task is not None and not self.__task.done()
+        if running and self.__profile == profile:
+            return
+
+        await self.stop()
+        await HW_SERVICE.run(HW_SERVICE.CPU, self.reset, *profile)
+        decky.logger.info(
+            f"Core parker running with {self.online_count(len(self.__units))} to {len(self.__online)} CPUs"
+        )
+        self.__task = asyncio.create_task(self.__run())
+
+    async def __run(self):
+        try:
+            while True:
+                await asyncio.sleep(CoreParker.INTERVAL)
+                await HW_SERVICE.run(HW_SERVICE.CPU, self.sample)
+        except Exception as e:
+            decky.logger.error(f"Core parker stopped: {e}")
+
+    def __unpark_all(self):
+        if self.__level:
+            result = CPU_PERFORMANCE.set_cores_status(self.core_status(0))
+            self.__stats["hotplug_writes"] += len(result["online"])
+            self.__level = 0
+
+    async def stop(self, restore: bool = True):
+        """Stop parker, bringing every profile CPU back online unless restore is False"""
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+            if restore:
+                await HW_SERVICE.run(HW_SERVICE.CPU, self.__unpark_all)
+
+    def get_stats(self):
+        """Get parker state and counters"""
+        return {
+            "running": self.__task is not None and not self.__task.done(),
+            "profile": list(self.__profile),
+            "level": self.__level,
+            "levels": len(self.__units),
+            "online": self.online_count(self.__level),
+            **self.__stats,
+        }
+
+
+CORE_PARKER = CoreParker()
@@ -1,8 +1,9 @@
-import platform
 import os
 
-if "-cachyos-" in platform.uname().release.lower():
-    if os.path.exists("/sys/class/firmware-attributes/asus-armoury"):
+from utils.sysfs import SYSFS
+
+if "-cachyos-" in SYSFS.kernel_release().lower():
+    if os.path.exists(SYSFS.path("/sys/class/firmware-attributes/asus-armoury")):
         from utils.performance.cpu.cpu_armoury import CPU_PERFORMANCE
     else:
         from utils.performance.cpu.cpu_ryzenadj import CPU_PERFORMANCE
@@ -1,16 +1,19 @@
 # pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
 
-from time import sleep
 import os
 
 import decky  # pylint: disable=import-error
+from utils.sysfs import SYSFS
 from .cpu_base import BaseCpuPerformance
+from .tdp_transaction import TdpTransaction
 
 
 class CpuPerformance(BaseCpuPerformance):
     """Class for adjusting CPU performance"""
 
-    ASUS_ARMORY_WMI_BASE = "/sys/class/firmware-attributes/asus-armoury/attributes"
+    ASUS_ARMORY_WMI_BASE = SYSFS.path(
+        "/sys/class/firmware-attributes/asus-armoury/attributes"
+    )
 
     FPPT_FN = (
         f"{ASUS_ARMORY_WMI_BASE}/ppt_pl3_fppt/current_value"
@@ -38,25 +41,22 @@ class CpuPerformance(BaseCpuPerformance):
 
     def __init__(self):
         super().__init__("Armoury")
+        self.__tdp = TdpTransaction(
+            {"spl": self.SPL_FN, "sppt": self.SPPT_FN, "fppt": self.FPPT_FN}
+        )
 
     def get_impl_id(self):
         return 0
 
     def get_tdp_ranges(self):
-        with open(CpuPerformance.SPL_MIN, "r") as f:
-            spl_min = int(f.read().strip())
-        with open(CpuPerformance.SPL_MAX, "r") as f:
-            spl_max = int(f.read().strip())
+        spl_min = int(SYSFS.read(CpuPerformance.SPL_MIN))
+        spl_max = int(SYSFS.read(CpuPerformance.SPL_MAX))
 
-        with open(CpuPerformance.SPPT_MIN, "r") as f:
-            sppt_min = int(f.read().strip())
-        with open(CpuPerformance.SPPT_MAX, "r") as f:
-            sppt_max = int(f.read().strip())
+        sppt_min = int(SYSFS.read(CpuPerformance.SPPT_MIN))
+        sppt_max = int(SYSFS.read(CpuPerformance.SPPT_MAX))
 
-        with open(CpuPerformance.FPPT_MIN, "r") as f:
-            fppt_min = int(f.read().strip())
-        with open(CpuPerformance.FPPT_MAX, "r") as f:
-            fppt_max = int(f.read().strip())
+        fppt_min = int(SYSFS.read(CpuPerformance.FPPT_MIN))
+        fppt_max = int(SYSFS.read(CpuPerformance.FPPT_MAX))
 
         return {
             "spl": [spl_min, spl_max],
@@ -65,19 +65,11 @@ class CpuPerformance(BaseCpuPerformance):
         }
 
     def set_tdp(self, spl, sppt, fppt):
-        sleep(0.1)
-        self._set_tdp("FAST", self.FPPT_FN, fppt)
-        sleep(0.1)
-        self._set_tdp("SLOW", self.SPPT_FN, sppt)
-        sleep(0.1)
-        self._set_tdp("STEADY", self.SPL_FN, spl)
-        sleep(0.1)
-
-    def _set_tdp(self, pretty: str, fn: str, val: int):
-        """Set CPU TDP"""
-        decky.logger.debug(f"Setting tdp value '{pretty}' to {val} by writing to {fn}")
-        with open(fn, "w") as f:
-            f.write(f"{val}\n")
+        result = self.__tdp.apply(spl, sppt, fppt)
+        decky.logger.debug(
+            f"TDP set with {len(result['writes'])} writes in {result['elapsed_ms']}ms"
+        )
+        return result
 
 
 CPU_PERFORMANCE = CpuPerformance()
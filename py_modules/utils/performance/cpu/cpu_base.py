@@ -2,66 +2,148 @@
 
 from abc import ABC, abstractmethod
 import glob
+import json
+import logging
 import os
-import subprocess
+import threading
+import time
 from collections import defaultdict
 
 import decky  # pylint: disable=import-error
+from utils.performance.cpu.cpufreq_registry import CpufreqRegistry
+from utils.processes import PROCESSES
+from utils.sysfs import SYSFS
 
 
 class BaseCpuPerformance(ABC):
     """Base Class for adjusting CPU performance"""
 
-    BOOST_FN = glob.glob("/sys/devices/system/cpu/cpufreq/policy*/boost")
+    ACPI_FN = SYSFS.path("/sys/firmware/acpi/platform_profile")
 
-    ACPI_FN = "/sys/firmware/acpi/platform_profile"
+    CPU_PATH = SYSFS.path("/sys/devices/system/cpu/")
+    SMT_PATH = SYSFS.path("/sys/devices/system/cpu/smt/control")
 
-    SMT_PATH = "/sys/devices/system/cpu/smt/control"
-    GOV_FN = glob.glob("/sys/devices/system/cpu/cpu*/cpufreq/scaling_governor")
-    EPP_FN = glob.glob(
-        "/sys/devices/system/cpu/cpu*/cpufreq/energy_performance_preference"
-    )
+    TOPOLOGY_FILE = os.path.join(decky.DECKY_PLUGIN_RUNTIME_DIR, "cpu_topology.json")
 
     CPU_PRIORITY = -17
     IO_PRIORITY = int((CPU_PRIORITY + 20) / 5)
     IO_CLASS = 2
 
     def __init__(self, impl: str):
-        decky.logger.info(f"Using {impl} implementation")
+        self.impl = impl
+        self.smt_map: dict[int, list[int]] = {}
+        self.cache_ids: dict[int, dict[str, int | None]] = {}
+        self.cores: list[int] = []
+        self.p_cores: list[int] = []
+        self.c_cores: list[int] = []
+        self.cpufreq = CpufreqRegistry()
+        # Online state per CPU as last read or written, None if it cannot be hotplugged
+        self.__online: dict[int, bool | None] = {}
+        self.__initialized = False
+        self.__init_lock = threading.Lock()
+
+    def initialize(self):
+        """Bring every CPU online and detect topology. Runs only once"""
+        with self.__init_lock:
+            if self.__initialized:
+                return
+            self._initialize()
+            self.__initialized = True
+
+    def _initialize(self):
+        decky.logger.info(f"Using {self.impl} implementation")
 
         try:
-            onlines = glob.glob("/sys/devices/system/cpu/cpu*/online")
+            onlines = glob.glob(SYSFS.path("/sys/devices/system/cpu/cpu*/online"))
             for online in onlines:
-                with open(online, "w") as file:
-                    file.write("1")
-                    file.close()
+                SYSFS.write(online, "1")
         except Exception as e:
             print(e)
-
-        self.smt_map = BaseCpuPerformance.__get_smt_map()
-        cpu_cache_ids = BaseCpuPerformance.__build_cache_groups()
-        p_cores, c_cores = BaseCpuPerformance.__detect_p_and_c_cores(cpu_cache_ids)
-        p_phys, c_phys = BaseCpuPerformance.__detect_physical_cores_only(
-            p_cores, c_cores, self.smt_map
-        )
-        self.cores = sorted(p_phys + c_phys)
-        self.p_cores = p_phys
-        self.c_cores = c_phys
+        self.cpufreq.rescan()
+
+        fingerprint = BaseCpuPerformance.__get_fingerprint()
+        if not self.__load_topology(fingerprint):
+            self.smt_map = BaseCpuPerformance.__get_smt_map()
+            self.cache_ids = BaseCpuPerformance.__build_cache_groups()
+            p_cores, c_cores = BaseCpuPerformance.__detect_p_and_c_cores(self.cache_ids)
+            self.p_cores, self.c_cores = (
+                BaseCpuPerformance.__detect_physical_cores_only(
+                    p_cores, c_cores, self.smt_map
+                )
+            )
+            self.__save_topology(fingerprint)
+        self.cores = sorted(self.p_cores + self.c_cores)
 
         decky.logger.info(f"Cores: {', '.join(str(c) for c in self.cores)}")
-        decky.logger.info(f"P-cores: {', '.join(str(c) for c in p_phys)}")
-        decky.logger.info(f"C-cores: {', '.join(str(c) for c in c_phys)}")
+        decky.logger.info(f"P-cores: {', '.join(str(c) for c in self.p_cores)}")
+        decky.logger.info(f"C-cores: {', '.join(str(c) for c in self.c_cores)}")
         decky.logger.info("CPU-SMT map:")
         for core, smts in self.smt_map.items():
             decky.logger.info(f"  {core}: {','.join(str(c) for c in smts)}")
 
+    @staticmethod
+    def __get_fingerprint():
+        model = None
+        with open(SYSFS.path("/proc/cpuinfo")) as f:
+            for line in f:
+                if "model name" in line:
+                    model = line.split(":")[1].strip()
+                    break
+        return {
+            "kernel": SYSFS.kernel_release(),
+            "model": model,
+            "cpus": os.cpu_count(),
+        }
+
+    def __load_topology(self, fingerprint):
+        """Load topology snapshot if it was taken on this same hardware and kernel"""
+        try:
+            with open(BaseCpuPerformance.TOPOLOGY_FILE) as f:
+                snapshot = json.load(f)
+            if snapshot["fingerprint"] != fingerprint:
+                decky.logger.info("CPU topology snapshot outdated, rescanning")
+                return False
+
+            self.smt_map = {int(k): v for k, v in snapshot["smt_map"].items()}
+            self.cache_ids = {int(k): v for k, v in snapshot["cache_ids"].items()}
+            self.p_cores = snapshot["p_cores"]
+            self.c_cores = snapshot["c_cores"]
+            decky.logger.info("Loaded CPU topology snapshot")
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            decky.logger.error(f"Invalid CPU topology snapshot: {e}")
+            return False
+
+    def __save_topology(self, fingerprint):
+        try:
+            os.makedirs(
+                os.path.dirname(BaseCpuPerformance.TOPOLOGY_FILE), exist_ok=True
+            )
+            with open(BaseCpuPerformance.TOPOLOGY_FILE, "w") as f:
+                json.dump(
+                    {
+                        "fingerprint": fingerprint,
+                        "smt_map": self.smt_map,
+                        "cache_ids": self.cache_ids,
+                        "p_cores": self.p_cores,
+                        "c_cores": self.c_cores,
+                    },
+                    f,
+                )
+        except Exception as e:
+            decky.logger.error(f"Cannot save CPU topology snapshot: {e}")
+
     @staticmethod
     def __build_cache_groups():
         cache_groups = {}
         next_id = 0
         cpu_cache_ids = {}
 
-        for cpu_path in sorted(glob.glob("/sys/devices/system/cpu/cpu[0-9]*")):
+        for cpu_path in sorted(
+            glob.glob(SYSFS.path("/sys/devices/system/cpu/cpu[0-9]*"))
+        ):
             cpu_id = int(cpu_path.split("cpu")[-1])
             cpu_cache_ids[cpu_id] = {"L1d": None, "L1i": None, "L2": None, "L3": None}
 
@@ -131,25 +213,38 @@ class BaseCpuPerformance(ABC):
     @staticmethod
     def __read(path):
         try:
-            with open(path) as f:
-                return f.read().strip()
+            return SYSFS.read(path)
         except:  # pylint: disable=W0702
             return None
 
+    def get_l3_clusters(self):
+        """Get CPUs sharing the P-core L3 and CPUs sharing the C-core L3, SMT siblings included"""
+        self.initialize()
+        clusters = []
+        for cores in (self.p_cores, self.c_cores):
+            l3 = self.cache_ids[cores[0]]["L3"] if cores else None
+            clusters.append(
+                sorted(
+                    cpu
+                    for cpu, caches in self.cache_ids.items()
+                    if l3 is not None and caches["L3"] == l3
+                )
+            )
+        return clusters[0], clusters[1]
+
     def get_cores_count(self):
         """Get CPU cores count"""
+        self.initialize()
         return [len(self.p_cores), len(self.c_cores)]
 
     def set_cpu_boost(self, enabled=True):
         """Set CPU Boost"""
-        try:
-            val = "1" if enabled else "0"
-            for p in BaseCpuPerformance.BOOST_FN:
-                decky.logger.debug(f"Setting CPU Boost to {val} by writing to '{p}'")
-                with open(p, "w") as file:
-                    file.write(val)
-        except Exception as e:
-            decky.logger.error(e)
+        self.initialize()
+        val = "1" if enabled else "0"
+        written, total = self.cpufreq.set("boost", val)
+        decky.logger.debug(
+            "Setting CPU Boost to %s: %d/%d policies written", val, written, total
+        )
 
     def set_smt(self, enabled=True):
         """Set multi-threading"""
@@ -158,9 +253,11 @@ class BaseCpuPerformance(ABC):
             decky.logger.debug(
                 f"Setting SMT to {val} by writing to {BaseCpuPerformance.SMT_PATH}"
             )
-            with open(BaseCpuPerformance.SMT_PATH, "w") as file:
-                file.write(val)
-                file.close()
+            if SYSFS.write(BaseCpuPerformance.SMT_PATH, val):
+                # Kernel hotplugs every sibling on its own
+                self.__online = {}
+                SYSFS.invalidate(BaseCpuPerformance.CPU_PATH)
+                self.cpufreq.rescan()
         except Exception as e:
             decky.logger.error(e)
 
@@ -170,16 +267,14 @@ class BaseCpuPerformance(ABC):
             f"Setting platform profile to '{prof}' by writing to {BaseCpuPerformance.ACPI_FN}"
         )
         try:
-            with open(BaseCpuPerformance.ACPI_FN, "r") as f:
-                current = f.read().strip()
-
-            if current == prof:
+            # Firmware and hotkeys change the mode behind the cache
+            if SYSFS.read(BaseCpuPerformance.ACPI_FN, use_cache=False) == prof:
                 decky.logger.debug(
                     f"Platform profile already set to '{prof}', skipping write."
                 )
                 return
-            with open(BaseCpuPerformance.ACPI_FN, "w") as f:
-                f.write(prof)
+            SYSFS.write(BaseCpuPerformance.ACPI_FN, prof, use_cache=False)
+            self._on_platform_profile_changed()
 
         except Exception as e:
             if prof == "low-power":
@@ -190,67 +285,30 @@ class BaseCpuPerformance(ABC):
             else:
                 raise e
 
+    def _on_platform_profile_changed(self):
+        """Hook for backends whose limits are reset by firmware on a profile change"""
+
     def set_governor(self, governor: str):
         """Set CPU governor"""
-        for p in BaseCpuPerformance.GOV_FN:
-            decky.logger.debug(f"Setting governor to {governor} by writing to {p}")
-            with open(p, "w") as f:
-                f.write(governor)
+        self.initialize()
+        written, total = self.cpufreq.set("governor", governor)
+        decky.logger.debug(
+            "Setting governor to %s: %d/%d policies written", governor, written, total
+        )
 
     def set_epp(self, epp: str):
         """Set CPU epp"""
-        for p in BaseCpuPerformance.EPP_FN:
-            decky.logger.debug(f"Setting EPP to {epp} by writing to {p}")
-            with open(p, "w") as f:
-                f.write(epp)
-
-    def _get_process_tree(self, pid):
-        """Retrieves the process tree of a given process ID."""
-        children = [pid]
-        with subprocess.Popen(
-            ["ps", "--ppid", str(pid), "-o", "pid="], stdout=subprocess.PIPE
-        ) as p:
-            lines = p.stdout.readlines()
-        for child_pid in lines:
-            child_pid = child_pid.strip()
-            if not child_pid:
-                continue
-            children.extend([int(child_pid.decode())])
-
-        return children
-
-    def renice(self, pid: int):
-        """Renice process tree"""
-        processed = set()
-
-        while True:
-            try:
-                pids = self._get_process_tree(pid)
-                new_pids_int = [p for p in pids if p not in processed]
-                if new_pids_int:
-                    new_pids = list(map(str, new_pids_int))
-                    subprocess.run(
-                        ["renice", str(self.CPU_PRIORITY), "-p", *new_pids], check=False
-                    )
-                    subprocess.run(
-                        [
-                            "ionice",
-                            f"-c{self.IO_CLASS}",
-                            f"-n{self.IO_PRIORITY}",
-                            "-p",
-                            *new_pids,
-                        ],
-                        check=False,
-                    )
-                    processed.update(new_pids_int)
-
-                else:
-                    decky.logger.debug(f"Reniced {len(processed)} processes")
-                    break
+        self.initialize()
+        written, total = self.cpufreq.set("epp", epp)
+        decky.logger.debug(
+            "Setting EPP to %s: %d/%d policies written", epp, written, total
+        )
 
-            except Exception as e:
-                decky.logger.error(f"Error while renicing: {e}")
-                break
+    def renice_threads(self, tids: list[int]):
+        """Apply game CPU and IO priority to threads. Returns (applied, failed)"""
+        return PROCESSES.set_priority_many(
+            tids, self.CPU_PRIORITY, self.IO_CLASS, self.IO_PRIORITY
+        )
 
     @staticmethod
     def __get_smt_map():
@@ -259,7 +317,9 @@ class BaseCpuPerformance(ABC):
 
         for core in range(256):
             if core not in seen:
-                file = f"/sys/devices/system/cpu/cpu{core}/topology/cluster_cpus_list"
+                file = SYSFS.path(
+                    f"/sys/devices/system/cpu/cpu{core}/topology/cluster_cpus_list"
+                )
 
                 if not os.path.exists(file):
                     break
@@ -276,21 +336,26 @@ class BaseCpuPerformance(ABC):
 
         return res
 
-    def __set_core_state(self, core, p_core, state):
-        path = f"/sys/devices/system/cpu/cpu{core}/online"
+    def __is_online(self, core):
+        if core == 0:
+            return True
+        path = SYSFS.path(f"/sys/devices/system/cpu/cpu{core}/online")
         try:
-            core_type = "p-core" if p_core else "e-core"
-            action = "Enabling" if state else "Disabling"
-            value = "1" if state else "0"
+            return SYSFS.read(path, use_cache=False) == "1"
+        except FileNotFoundError:
+            # No online file, CPU cannot be hotplugged
+            return None
 
-            decky.logger.debug(
-                f"{action} {core_type} {core} by writing {value} to {path}"
-            )
-            if core != 0:
-                with open(path, "w") as f:
-                    f.write(value)
+    def __set_core_state(self, core, state):
+        path = SYSFS.path(f"/sys/devices/system/cpu/cpu{core}/online")
+        try:
+            SYSFS.write(path, "1" if state else "0", use_cache=False)
+            return True
         except Exception as e:
-            decky.logger.error(f"Cannot enable core {core}: {e}")
+            decky.logger.error(
+                f"Cannot {'enable' if state else 'disable'} core {core}: {e}"
+            )
+        return False
 
     def __get_cores_status(
         self,
@@ -309,8 +374,9 @@ class BaseCpuPerformance(ABC):
                 for subcore in self.smt_map[core]:
                     cores_status[subcore] = enabled and smt
 
-    def enable_cores(self, p_cores, e_cores, smt):
-        """Enable CPU cores"""
+    def get_cores_status(self, p_cores, e_cores, smt):
+        """Get target online state of every CPU for the given core counts"""
+        self.initialize()
         p_cores = min(max(p_cores, 1), len(self.p_cores))
         e_cores = min(max(e_cores, 0), len(self.c_cores))
 
@@ -318,16 +384,68 @@ class BaseCpuPerformance(ABC):
 
         self.__get_cores_status(self.p_cores, p_cores, smt, core_status)
         self.__get_cores_status(self.c_cores, e_cores, smt, core_status)
+        return core_status
+
+    def plan_cores(self, core_status: dict[int, bool]):
+        """Get (cpu, state) transitions from the current online mask to core_status"""
+        siblings = {cpu for smts in self.smt_map.values() for cpu in smts}
+        onlines = []
+        offlines = []
+        for core, state in core_status.items():
+            if core not in self.__online:
+                self.__online[core] = self.__is_online(core)
+            current = self.__online[core]
+            if current is None or current == state:
+                continue
+            (onlines if state else offlines).append(core)
+
+        # Bring CPUs up before taking any down so capacity never dips mid-plan,
+        # physical cores come up before their siblings and go down after them
+        onlines.sort(key=lambda c: (c in siblings, c))
+        offlines.sort(key=lambda c: (c not in siblings, -c))
+        return [(c, True) for c in onlines] + [(c, False) for c in offlines]
+
+    def enable_cores(self, p_cores, e_cores, smt, online_only=False):
+        """Enable CPU cores. With online_only, only bring up CPUs the target needs"""
+        core_status = self.get_cores_status(p_cores, e_cores, smt)
+        if online_only:
+            core_status = {c: True for c, state in core_status.items() if state}
+        return self.set_cores_status(core_status)
+
+    def set_cores_status(self, core_status: dict[int, bool]):
+        """Set online state of changed CPUs only. Returns CPUs brought online and offline, and time taken"""
+        t0 = time.perf_counter()
+        result = {"online": [], "offline": []}
+        for core, state in self.plan_cores(core_status):
+            if self.__set_core_state(core, state):
+                result["online" if state else "offline"].append(core)
+        result["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+
+        changed = result["online"] + result["offline"]
+        if changed:
+            # Only the CPUs just written can differ from the known mask
+            for core in changed:
+                SYSFS.invalidate(f"{BaseCpuPerformance.CPU_PATH}cpu{core}/")
+                self.__online[core] = self.__is_online(core)
+            # Hotplug resets cpufreq state of the policies coming back, the registry rewrites them
+            result["policies_reapplied"] = len(self.cpufreq.rescan(self.__online))
+            if decky.logger.isEnabledFor(logging.INFO):
+                decky.logger.info(
+                    "Hotplug in %sms: online [%s], offline [%s]",
+                    result["elapsed_ms"],
+                    ", ".join(str(c) for c in result["online"]),
+                    ", ".join(str(c) for c in result["offline"]),
+                )
+        else:
+            decky.logger.debug("Hotplug: %d CPUs already in place", len(core_status))
+        return result
 
-        decky.logger.info("Setting cores status:")
-        decky.logger.info(
-            f"  Enabled:  {', '.join([str(c) for c in sorted(core_status.keys()) if core_status[c]])}"
-        )
-        decky.logger.info(
-            f"  Disabled: {', '.join([str(c) for c in sorted(core_status.keys()) if not core_status[c]])}"
-        )
-        for core in sorted(core_status.keys()):
-            self.__set_core_state(core, core in self.p_cores, core_status[core])
+    def invalidate(self):
+        """Forget the known online mask so it is read again on next use"""
+        self.__online = {}
+
+    def shutdown(self):
+        """Release resources held by the implementation"""
 
     @abstractmethod
     def get_tdp_ranges(self):
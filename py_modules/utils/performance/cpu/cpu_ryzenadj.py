@@ -4,14 +4,17 @@ from time import sleep
 import glob
 import os
 import decky  # pylint: disable=import-error
+from utils.sysfs import SYSFS
 from .cpu_base import BaseCpuPerformance
+from .ryzenadj_lib import RyzenAdjEngine
 import subprocess
 
 
 class CpuPerformance(BaseCpuPerformance):
     RYZENADJ_PATH = os.path.join(decky.DECKY_PLUGIN_DIR, "bin", "ryzenadj")
+    LIBRYZENADJ_PATH = os.path.join(decky.DECKY_PLUGIN_DIR, "bin", "libryzenadj.so")
 
-    ASUS_NB_WMI = "/sys/devices/platform/asus-nb-wmi"
+    ASUS_NB_WMI = SYSFS.path("/sys/devices/platform/asus-nb-wmi")
 
     FPPT_FN = f"{ASUS_NB_WMI}/ppt_fppt"
     SPPT_FN = f"{ASUS_NB_WMI}/ppt_pl2_sppt"
@@ -28,9 +31,13 @@ class CpuPerformance(BaseCpuPerformance):
     Z2_A_AC = {"spl": [6, 20], "sppt": [6, 20], "fppt": [6, 20]}
     Z2_A_DC = {"spl": [6, 20], "sppt": [6, 20], "fppt": [6, 20]}
 
-    def __init__(self):
-        """Identify this backend as the WMI-based implementation."""
+    def __init__(self, lib=None):
+        """Identify this backend as the ryzenadj-based implementation."""
         super().__init__("RyzenAdj")
+        self.__engine = RyzenAdjEngine(self.LIBRYZENADJ_PATH, lib)
+
+    def _initialize(self):
+        super()._initialize()
         os.chmod(self.RYZENADJ_PATH, 0o777)
 
     def get_impl_id(self):
@@ -39,17 +46,16 @@ class CpuPerformance(BaseCpuPerformance):
     def get_tdp_ranges(self):
         """Return the (min, max) SPL/SPPT/FPPT limits detected for the current CPU."""
         on_ac = False
-        for path in glob.glob("/sys/class/power_supply/AC*/online"):
+        for path in glob.glob(SYSFS.path("/sys/class/power_supply/AC*/online")):
             try:
-                with open(path, "r") as f:
-                    if f.read().strip() == "1":
-                        on_ac = True
-                        break
+                if SYSFS.read(path, use_cache=False) == "1":
+                    on_ac = True
+                    break
             except FileNotFoundError:
                 continue
 
         cpu_name = None
-        with open("/proc/cpuinfo") as f:
+        with open(SYSFS.path("/proc/cpuinfo")) as f:
             for line in f:
                 if "model name" in line:
                     cpu_name = line.split(":")[1].strip()
@@ -68,10 +74,27 @@ class CpuPerformance(BaseCpuPerformance):
 
     def set_tdp(self, spl, sppt, fppt):
         """Persist new SPL/SPPT/FPPT values through the ryzenadj"""
-        sleep(0.1)
+        self.initialize()
         decky.logger.debug(
             f"Setting TDP values to SPL: {spl}, SPPT: {sppt}, FPPT: {fppt}"
         )
+
+        if self.__engine.open():
+            result = self.__engine.set_limits(spl, sppt, fppt)
+            if result["verified"] is None:
+                decky.logger.debug("TDP written without PM table readback")
+            elif result["verified"]:
+                decky.logger.debug(
+                    f"TDP verified after {result['attempts']} attempts in {result['elapsed_ms']}ms"
+                )
+            else:
+                decky.logger.warning(
+                    f"TDP readback mismatch after {result['attempts']} attempts: {result['readback']}"
+                )
+            return result
+
+        # Fall back to the standalone binary when libryzenadj is not available
+        sleep(0.1)
         for i in range(3):
             subprocess.run(
                 [
@@ -93,5 +116,8 @@ class CpuPerformance(BaseCpuPerformance):
             )
             sleep(0.1)
 
+    def shutdown(self):
+        self.__engine.close()
+
 
 CPU_PERFORMANCE = CpuPerformance()
@@ -4,12 +4,13 @@ from time import sleep
 import glob
 
 import decky  # pylint: disable=import-error
+from utils.sysfs import SYSFS
 from .cpu_base import BaseCpuPerformance
 
 
 class CpuPerformance(BaseCpuPerformance):
 
-    ASUS_NB_WMI = "/sys/devices/platform/asus-nb-wmi"
+    ASUS_NB_WMI = SYSFS.path("/sys/devices/platform/asus-nb-wmi")
 
     FPPT_FN = f"{ASUS_NB_WMI}/ppt_fppt"
     SPPT_FN = f"{ASUS_NB_WMI}/ppt_pl2_sppt"
@@ -36,17 +37,16 @@ class CpuPerformance(BaseCpuPerformance):
     def get_tdp_ranges(self):
         """Return the (min, max) SPL/SPPT/FPPT limits detected for the current CPU."""
         on_ac = False
-        for path in glob.glob("/sys/class/power_supply/AC*/online"):
+        for path in glob.glob(SYSFS.path("/sys/class/power_supply/AC*/online")):
             try:
-                with open(path, "r") as f:
-                    if f.read().strip() == "1":
-                        on_ac = True
-                        break
+                if SYSFS.read(path, use_cache=False) == "1":
+                    on_ac = True
+                    break
             except FileNotFoundError:
                 continue
 
         cpu_name = None
-        with open("/proc/cpuinfo") as f:
+        with open(SYSFS.path("/proc/cpuinfo")) as f:
             for line in f:
                 if "model name" in line:
                     cpu_name = line.split(":")[1].strip()
@@ -63,6 +63,10 @@ class CpuPerformance(BaseCpuPerformance):
 
         return CpuPerformance.DEF_RG
 
+    def _on_platform_profile_changed(self):
+        """Forget cached PPT values, firmware puts its defaults back on a profile change"""
+        SYSFS.invalidate(self.ASUS_NB_WMI + "/")
+
     def set_tdp(self, spl, sppt, fppt):
         """Persist new SPL/SPPT/FPPT values through the WMI sysfs knobs."""
         sleep(0.1)
@@ -76,8 +80,7 @@ class CpuPerformance(BaseCpuPerformance):
     def _set_tdp(self, pretty: str, fn: str, val: int):
         """Write a single TDP value to the corresponding sysfs file."""
         decky.logger.debug(f"Setting tdp value '{pretty}' to {val} by writing to {fn}")
-        with open(fn, "w") as f:
-            f.write(f"{val}\n")
+        SYSFS.write(fn, val)
 
 
 CPU_PERFORMANCE = CpuPerformance()
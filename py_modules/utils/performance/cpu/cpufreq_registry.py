@@ -0,0 +1,109 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import glob
+import os
+
+import decky  # pylint: disable=import-error
+from utils.sysfs import SYSFS
+
+
+class CpufreqRegistry:
+    """Class for tracking cpufreq policies across hotplug and keeping them on the requested settings"""
+
+    POLICIES_GLOB = SYSFS.path("/sys/devices/system/cpu/cpufreq/policy[0-9]*")
+
+    # Setting name to policy file, in the order they are reapplied
+    ATTRIBUTES = {
+        "boost": "boost",
+        "governor": "scaling_governor",
+        "epp": "energy_performance_preference",
+    }
+
+    def __init__(self):
+        self.__policies: dict[str, list[int]] = {}
+        self.__active: set[str] = set()
+        self.__requested: dict[str, str] = {}
+
+    @staticmethod
+    def __cpu_online(cpu: int, online: dict[int, bool | None] | None):
+        if cpu == 0:
+            return True
+        if online is not None and cpu in online:
+            # None is a CPU that cannot be hotplugged
+            return online[cpu] is not False
+        try:
+            return (
+                SYSFS.read(
+                    SYSFS.path(f"/sys/devices/system/cpu/cpu{cpu}/online"),
+                    use_cache=False,
+                )
+                == "1"
+            )
+        except FileNotFoundError:
+            return True
+
+    def __is_active(self, policy: str, online: dict[int, bool | None] | None):
+        cpus = self.__policies.get(policy)
+        if cpus is None or online is None:
+            # Kernel answers EBUSY on every file of a policy whose CPUs are all offline
+            try:
+                cpus = [
+                    int(c)
+                    for c in SYSFS.read(f"{policy}/affected_cpus", use_cache=False).split()
+                ]
+            except OSError:
+                return False
+            self.__policies[policy] = cpus
+        return any(CpufreqRegistry.__cpu_online(cpu, online) for cpu in cpus)
+
+    def rescan(self, online: dict[int, bool | None] | None = None):
+        """Refresh active policies and apply requested settings to the ones that came online. Returns them.
+
+        With the online mask of the caller, known policies are resolved without reading sysfs.
+        """
+        active = {
+            policy
+            for policy in sorted(glob.glob(CpufreqRegistry.POLICIES_GLOB))
+            if self.__is_active(policy, online)
+        }
+        added = sorted(active - self.__active)
+        self.__active = active
+
+        if added and self.__requested:
+            # Values were reset by the kernel, the cache does not know them
+            for policy in added:
+                SYSFS.invalidate(policy + os.sep)
+            for name in CpufreqRegistry.ATTRIBUTES:
+                if name in self.__requested:
+                    self.__write(name, added)
+            decky.logger.debug(
+                "Reapplied %s to %d policies brought online",
+                ", ".join(self.__requested),
+                len(added),
+            )
+        return added
+
+    def __write(self, name: str, policies: list[str]):
+        paths = [
+            f"{policy}/{CpufreqRegistry.ATTRIBUTES[name]}"
+            for policy in policies
+            if os.path.exists(f"{policy}/{CpufreqRegistry.ATTRIBUTES[name]}")
+        ]
+        try:
+            return SYSFS.write_many(paths, self.__requested[name])
+        except OSError as e:
+            decky.logger.error(f"Cannot set cpufreq {name}: {e}")
+            return 0
+
+    def set(self, name: str, value: str):
+        """Remember setting and write it once per active policy. Returns (written, active policies)"""
+        self.__requested[name] = value
+        policies = sorted(self.__active)
+        return self.__write(name, policies), len(policies)
+
+    def get_policies(self):
+        """Get known policies with their CPUs and whether they are active"""
+        return {
+            os.path.basename(policy): {"cpus": cpus, "active": policy in self.__active}
+            for policy, cpus in sorted(self.__policies.items())
+        }
@@ -0,0 +1,146 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import ctypes
+import math
+import os
+import threading
+import time
+
+import decky  # pylint: disable=import-error
+
+
+class RyzenAdjEngine:
+    """Class keeping a libryzenadj handle open to set and verify TDP limits"""
+
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = 0.05
+    TEMP_LIMIT = 95
+
+    def __init__(self, lib_path: str, lib=None):
+        self.__lib_path = lib_path
+        self.__lib = lib
+        self.__ry = None
+        # The native handle must not be freed while a call is using it
+        self.__lock = threading.RLock()
+
+    @staticmethod
+    def __load_library(path: str):
+        lib = ctypes.CDLL(path)
+        lib.init_ryzenadj.restype = ctypes.c_void_p
+        lib.cleanup_ryzenadj.argtypes = [ctypes.c_void_p]
+        for fn in ("init_table", "refresh_table"):
+            getattr(lib, fn).argtypes = [ctypes.c_void_p]
+            getattr(lib, fn).restype = ctypes.c_int
+        for fn in (
+            "set_stapm_limit",
+            "set_fast_limit",
+            "set_slow_limit",
+            "set_tctl_temp",
+            "set_apu_skin_temp_limit",
+            "set_dgpu_skin_temp_limit",
+        ):
+            getattr(lib, fn).argtypes = [ctypes.c_void_p, ctypes.c_uint32]
+            getattr(lib, fn).restype = ctypes.c_int
+        for fn in ("get_stapm_limit", "get_fast_limit", "get_slow_limit"):
+            getattr(lib, fn).argtypes = [ctypes.c_void_p]
+            getattr(lib, fn).restype = ctypes.c_float
+        return lib
+
+    def open(self) -> bool:
+        """Open SMU access. Returns False if the library is not usable"""
+        with self.__lock:
+            if self.__ry is not None:
+                return True
+
+            try:
+                if self.__lib is None:
+                    if not os.path.exists(self.__lib_path):
+                        return False
+                    self.__lib = RyzenAdjEngine.__load_library(self.__lib_path)
+
+                ry = self.__lib.init_ryzenadj()
+                if not ry:
+                    decky.logger.error("libryzenadj could not access the SMU")
+                    return False
+                if self.__lib.init_table(ry) != 0:
+                    decky.logger.warning("libryzenadj could not read the PM table")
+
+                self.__ry = ry
+                decky.logger.info("Using in-process libryzenadj")
+                return True
+            except Exception as e:
+                decky.logger.error(f"Cannot load libryzenadj: {e}")
+                self.__lib = None
+                return False
+
+    def close(self):
+        """Release SMU access"""
+        with self.__lock:
+            if self.__ry is not None:
+                self.__lib.cleanup_ryzenadj(self.__ry)
+                self.__ry = None
+
+    def read_limits(self):
+        """Read current stapm/fast/slow limits in W from the PM table, None if unavailable"""
+        with self.__lock:
+            if self.__ry is None or self.__lib.refresh_table(self.__ry) != 0:
+                return None
+            values = {
+                "stapm": self.__lib.get_stapm_limit(self.__ry),
+                "fast": self.__lib.get_fast_limit(self.__ry),
+                "slow": self.__lib.get_slow_limit(self.__ry),
+            }
+            if any(math.isnan(v) for v in values.values()):
+                return None
+            return {k: round(v) for k, v in values.items()}
+
+    @staticmethod
+    def __mismatches(target: dict, current: dict | None):
+        if current is None:
+            return dict(target)
+        return {k: v for k, v in target.items() if current[k] != v}
+
+    def __write(self, key: str, watts: int):
+        setter = {
+            "stapm": self.__lib.set_stapm_limit,
+            "fast": self.__lib.set_fast_limit,
+            "slow": self.__lib.set_slow_limit,
+        }[key]
+        if setter(self.__ry, watts * 1000) != 0:
+            raise OSError(f"SMU rejected {key} limit {watts}W")
+
+    def set_limits(self, spl: int, sppt: int, fppt: int):
+        """Write TDP limits that differ from the PM table and verify them by readback"""
+        with self.__lock:
+            if self.__ry is None:
+                raise OSError("SMU access is closed")
+            target = {"stapm": spl, "fast": fppt, "slow": sppt}
+
+            t0 = time.perf_counter()
+            current = self.read_limits()
+            pending = RyzenAdjEngine.__mismatches(target, current)
+            if pending:
+                self.__lib.set_tctl_temp(self.__ry, RyzenAdjEngine.TEMP_LIMIT)
+                self.__lib.set_apu_skin_temp_limit(self.__ry, RyzenAdjEngine.TEMP_LIMIT)
+                self.__lib.set_dgpu_skin_temp_limit(self.__ry, RyzenAdjEngine.TEMP_LIMIT)
+
+            attempts = 0
+            while pending and attempts < RyzenAdjEngine.MAX_ATTEMPTS:
+                if attempts > 0:
+                    time.sleep(RyzenAdjEngine.RETRY_DELAY)
+                attempts += 1
+                for key, watts in pending.items():
+                    self.__write(key, watts)
+
+                current = self.read_limits()
+                if current is None:
+                    # Without a PM table there is nothing to verify against
+                    break
+                pending = RyzenAdjEngine.__mismatches(target, current)
+
+            return {
+                "attempts": attempts,
+                "verified": None if current is None else not pending,
+                "readback": current,
+                "elapsed_ms": round((time.perf_counter() - t0) * 1000, 3),
+            }
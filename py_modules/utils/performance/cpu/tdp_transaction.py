@@ -0,0 +1,86 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import time
+
+import decky  # pylint: disable=import-error
+from utils.sysfs import SYSFS
+
+
+class TdpTransaction:
+    """Class for writing SPL/SPPT/FPPT firmware limits in a safe order and verifying them"""
+
+    # Lowest to highest tier, firmware expects spl <= sppt <= fppt at all times
+    TIERS = ["spl", "sppt", "fppt"]
+
+    POLL_INTERVAL = 0.01
+    TIMEOUT = 0.5
+
+    def __init__(self, paths: dict[str, str]):
+        self.__paths = paths
+
+    def __read(self, name: str) -> int | None:
+        try:
+            return int(SYSFS.read(self.__paths[name], use_cache=False))
+        except Exception:
+            return None
+
+    @staticmethod
+    def plan(current: dict, target: dict) -> list[tuple[str, int]]:
+        """Get changed limits in an order that never breaks spl <= sppt <= fppt"""
+        raises = [
+            (n, target[n])
+            for n in reversed(TdpTransaction.TIERS)
+            if current.get(n) is None or target[n] > current[n]
+        ]
+        lowers = [
+            (n, target[n])
+            for n in TdpTransaction.TIERS
+            if current.get(n) is not None and target[n] < current[n]
+        ]
+        return raises + lowers
+
+    def __wait_for(self, name: str, value: int) -> bool:
+        deadline = time.perf_counter() + TdpTransaction.TIMEOUT
+        while True:
+            current = self.__read(name)
+            if current == value:
+                return True
+            if current is None or time.perf_counter() >= deadline:
+                return False
+            time.sleep(TdpTransaction.POLL_INTERVAL)
+
+    def apply(self, spl: int, sppt: int, fppt: int):
+        """Write the limits that changed and wait for firmware to report them"""
+        t0 = time.perf_counter()
+        target = {"spl": spl, "sppt": sppt, "fppt": fppt}
+        current = {n: self.__read(n) for n in TdpTransaction.TIERS}
+
+        writes = []
+        for name, value in TdpTransaction.plan(current, target):
+            t1 = time.perf_counter()
+            decky.logger.debug(
+                "Setting tdp value '%s' to %d by writing to %s",
+                name,
+                value,
+                self.__paths[name],
+            )
+            SYSFS.write(self.__paths[name], value, use_cache=False)
+            verified = self.__wait_for(name, value)
+            latency = round((time.perf_counter() - t1) * 1000, 3)
+            if not verified:
+                decky.logger.warning(
+                    f"TDP value '{name}' not confirmed as {value} after {latency}ms"
+                )
+            writes.append(
+                {
+                    "name": name,
+                    "value": value,
+                    "latency_ms": latency,
+                    "verified": verified,
+                }
+            )
+
+        return {
+            "writes": writes,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 3),
+        }
@@ -2,67 +2,163 @@
 
 import glob
 import re
+import threading
 import time
 
 import decky  # pylint: disable=import-error
+from utils.sysfs import SYSFS
+
+
+class OdState:
+    """Overdrive state of the GPU as reported by pp_od_clk_voltage"""
+
+    def __init__(self, level: str, sclk: list[int], sclk_range: list[int]):
+        self.level = level
+        self.sclk = sclk
+        self.sclk_range = sclk_range
+
+    @staticmethod
+    def parse(od_text: str, level: str):
+        """Parse pp_od_clk_voltage content. Raises ValueError if SCLK data is missing"""
+        section = None
+        points: dict[int, int] = {}
+        sclk_range = None
+
+        for line in od_text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if line.endswith(":") and line[:-1].isupper():
+                section = line[:-1]
+                continue
+
+            if section == "OD_SCLK":
+                match = re.match(r"(\d+):\s*(\d+)\s*Mhz", line, re.IGNORECASE)
+                if match:
+                    points[int(match.group(1))] = int(match.group(2))
+            elif section == "OD_RANGE":
+                match = re.match(r"SCLK:\s*(\d+)\s*Mhz\s+(\d+)\s*Mhz", line, re.IGNORECASE)
+                if match:
+                    sclk_range = [int(match.group(1)), int(match.group(2))]
+
+        if not points or sclk_range is None:
+            raise ValueError("No OD_SCLK/OD_RANGE data in pp_od_clk_voltage")
+
+        return OdState(level, [points[i] for i in sorted(points)], sclk_range)
+
+    def to_dict(self):
+        """Get state as plain dict"""
+        return {"level": self.level, "sclk": self.sclk, "sclk_range": self.sclk_range}
 
 
 class GpuPerformance:
     """Class for adjust GPU performance"""
 
-    GPU_FREQUENCY_PATH = glob.glob("/sys/class/drm/card?/device/pp_od_clk_voltage")[0]
-    GPU_LEVEL_PATH = glob.glob(
-        "/sys/class/drm/card?/device/power_dpm_force_performance_level"
-    )[0]
+    GPU_FREQUENCY_PATH: str | None = None
+    GPU_LEVEL_PATH: str | None = None
 
-    GPU_FREQUENCY_RANGE = None
-
-    def get_gpu_frequency_range(self):
-        """Set GPU freq range"""
-        if GpuPerformance.GPU_FREQUENCY_RANGE:
-            return GpuPerformance.GPU_FREQUENCY_RANGE
+    LEVEL_SETTLE_TIME = 0.1
 
-        try:
-            with open(GpuPerformance.GPU_FREQUENCY_PATH, "r") as f:
-                freq_string = f.read()
+    def __init__(self):
+        self.__state: OdState | None = None
+        self.__lock = threading.Lock()
 
-            od_sclk_matches = re.findall(
-                r"OD_RANGE:\s*SCLK:\s*(\d+)Mhz\s*(\d+)Mhz", freq_string
+    def initialize(self):
+        """Locate GPU sysfs files. Returns True if the GPU supports overdrive"""
+        if GpuPerformance.GPU_FREQUENCY_PATH is None:
+            freq_paths = glob.glob(
+                SYSFS.path("/sys/class/drm/card?/device/pp_od_clk_voltage")
+            )
+            level_paths = glob.glob(
+                SYSFS.path(
+                    "/sys/class/drm/card?/device/power_dpm_force_performance_level"
+                )
+            )
+            if not freq_paths or not level_paths:
+                decky.logger.warning("No GPU with overdrive support found")
+                return False
+            GpuPerformance.GPU_FREQUENCY_PATH = freq_paths[0]
+            GpuPerformance.GPU_LEVEL_PATH = level_paths[0]
+            decky.logger.info(f"Using GPU at {GpuPerformance.GPU_FREQUENCY_PATH}")
+        return True
+
+    def __get_state(self) -> OdState:
+        if self.__state is None:
+            self.__state = OdState.parse(
+                SYSFS.read(GpuPerformance.GPU_FREQUENCY_PATH, use_cache=False),
+                SYSFS.read(GpuPerformance.GPU_LEVEL_PATH, use_cache=False),
             )
+        return self.__state
 
-            if od_sclk_matches:
-                frequency_range = [
-                    int(od_sclk_matches[0][0]),
-                    int(od_sclk_matches[0][1]),
-                ]
-                GpuPerformance.GPU_FREQUENCY_RANGE = frequency_range
-                return frequency_range
+    def get_state(self):
+        """Get overdrive state, None if not available"""
+        if not self.initialize():
+            return None
+        try:
+            with self.__lock:
+                return self.__get_state().to_dict()
         except Exception as e:
-            decky.logger.error(e)
+            decky.logger.error(f"Cannot read GPU overdrive state: {e}")
+            return None
+
+    def invalidate(self):
+        """Drop cached overdrive state so it is read again on next use"""
+        with self.__lock:
+            self.__state = None
 
-        return [0, 0]
+    def get_gpu_frequency_range(self):
+        """Get GPU freq range"""
+        state = self.get_state()
+        return state["sclk_range"] if state else [0, 0]
 
     def execute_gpu_frequency_command(self, command):
         """Execute GPU freq command"""
-        with open(GpuPerformance.GPU_FREQUENCY_PATH, "w") as file:
-            file.write(command)
+        SYSFS.write(GpuPerformance.GPU_FREQUENCY_PATH, command, use_cache=False)
 
     def set_gpu_frequency_range(self, min_freq: int, max_freq: int):
-        """Set GPU freq range"""
-        with open(GpuPerformance.GPU_LEVEL_PATH, "w") as file:
-            file.write("manual")
-
-        time.sleep(0.1)
-
-        try:
-            self.execute_gpu_frequency_command(f"s 0 {min_freq}")
-            self.execute_gpu_frequency_command(f"s 1 {max_freq}")
-            self.execute_gpu_frequency_command("c")
-        except Exception as e:
-            decky.logger.error(
-                f"{__name__} error while trying to write frequency range"
-            )
-            decky.logger.error(e)
+        """Set GPU freq range. Only changed points are staged, then committed once"""
+        if not self.initialize():
+            return
+
+        with self.__lock:
+            try:
+                state = self.__get_state()
+            except Exception as e:
+                decky.logger.error(f"Cannot read GPU overdrive state: {e}")
+                return
+
+            low, high = state.sclk_range
+            min_freq = min(max(int(min_freq), low), high)
+            max_freq = min(max(int(max_freq), min_freq), high)
+            target = [min_freq, max_freq]
+
+            if state.level == "manual" and state.sclk[:2] == target:
+                decky.logger.debug(
+                    "GPU frequency range already %d-%d MHz", min_freq, max_freq
+                )
+                return
+
+            try:
+                if state.level != "manual":
+                    SYSFS.write(GpuPerformance.GPU_LEVEL_PATH, "manual", use_cache=False)
+                    state.level = "manual"
+                    time.sleep(GpuPerformance.LEVEL_SETTLE_TIME)
+
+                for index, value in enumerate(target):
+                    if state.sclk[index] != value:
+                        self.execute_gpu_frequency_command(f"s {index} {value}")
+                self.execute_gpu_frequency_command("c")
+                state.sclk[:2] = target
+                decky.logger.debug(
+                    "GPU frequency range set to %d-%d MHz", min_freq, max_freq
+                )
+            except Exception as e:
+                # Driver state is unknown after a partial write
+                self.__state = None
+                decky.logger.error(
+                    f"{__name__} error while trying to write frequency range"
+                )
+                decky.logger.error(e)
 
 
 GPU_PERFORMANCE = GpuPerformance()
@@ -0,0 +1,156 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import asyncio
+import glob
+import math
+import time
+
+import decky  # pylint: disable=import-error
+from utils.hw_service import HW_SERVICE
+from utils.performance.gpu import GPU_PERFORMANCE
+from utils.sysfs import SYSFS
+
+
+class GpuGovernor:
+    """Class for adapting the GPU frequency ceiling to gpu_busy_percent inside profile limits"""
+
+    INTERVAL = 0.5
+    STEP_MHZ = 100
+    SMOOTHING = 0.4
+
+    # Raise above UP_THRESHOLD and lower below DOWN_THRESHOLD, nothing in between.
+    # When moving, aim for the ceiling that would put the load at TARGET.
+    UP_THRESHOLD = 85
+    DOWN_THRESHOLD = 55
+    TARGET = 70
+
+    # Minimum time since the last change, raising reacts faster than lowering
+    UP_DWELL = 1.0
+    DOWN_DWELL = 4.0
+
+    def __init__(self):
+        self.__limits = (0, 0)
+        self.__ceiling = 0
+        self.__load: float | None = None
+        self.__last_change = -math.inf
+        self.__busy_path: str | None = None
+        self.__task: asyncio.Task | None = None
+        self.__stats = {"samples": 0, "raises": 0, "lowers": 0}
+
+    def reset(self, min_freq: int, max_freq: int):
+        """Start over from the full band"""
+        self.__limits = (int(min_freq), int(max_freq))
+        self.__ceiling = int(max_freq)
+        self.__load = None
+        self.__last_change = -math.inf
+
+    def decide(self, busy: float, now: float) -> int | None:
+        """Feed one busy sample. Returns the new ceiling in MHz, None to keep the current one"""
+        self.__stats["samples"] += 1
+        if self.__load is None:
+            self.__load = busy
+        else:
+            self.__load += GpuGovernor.SMOOTHING * (busy - self.__load)
+
+        low, high = self.__limits
+        elapsed = now - self.__last_change
+        ceiling = self.__ceiling
+
+        # Busy time scales with the ceiling, so estimate the clock the work needs
+        step = GpuGovernor.STEP_MHZ
+        wanted = math.ceil(self.__load * ceiling / GpuGovernor.TARGET / step) * step
+
+        if self.__load > GpuGovernor.UP_THRESHOLD and elapsed >= GpuGovernor.UP_DWELL:
+            ceiling = min(high, max(wanted, ceiling + step))
+        elif (
+            self.__load < GpuGovernor.DOWN_THRESHOLD
+            and elapsed >= GpuGovernor.DOWN_DWELL
+        ):
+            ceiling = max(low, min(wanted, ceiling - step))
+
+        if ceiling == self.__ceiling:
+            return None
+
+        self.__stats["raises" if ceiling > self.__ceiling else "lowers"] += 1
+        # Expected load at the new ceiling, so the average does not lag the change
+        self.__load = min(100.0, self.__load * self.__ceiling / ceiling)
+        self.__ceiling = ceiling
+        self.__last_change = now
+        return ceiling
+
+    def sample(self):
+        """Read GPU load once and move the frequency ceiling if needed"""
+        busy = float(SYSFS.read_pooled(self.__busy_path))
+        ceiling = self.decide(busy, time.monotonic())
+        if ceiling is not None:
+            decky.logger.debug(
+                "GPU governor moving ceiling to %d MHz at %.0f%% load",
+                ceiling,
+                self.__load,
+            )
+            GPU_PERFORMANCE.set_gpu_frequency_range(self.__limits[0], ceiling)
+
+    async def configure(self, min_freq: int, max_freq: int, auto: bool):
+        """Run governor inside the given limits, or stop it if auto is off"""
+        if not auto:
+            await self.stop()
+            return
+
+        limits = (int(min_freq), int(max_freq))
+        running = self.__task is not None and not self.__task.done()
+        if running and self.__limits == limits:
+            return
+
+        if self.__busy_path is None:
+            paths = glob.glob(SYSFS.path("/sys/class/drm/card?/device/gpu_busy_percent"))
+            if not paths:
+                decky.logger.warning("No gpu_busy_percent available, auto GPU disabled")
+                return
+            self.__busy_path = paths[0]
+
+        await self.stop(restore=False)
+        self.reset(*limits)
+        # Hardware may still be clamped to an old ceiling, start from the full band
+        await HW_SERVICE.run(
+            HW_SERVICE.GPU, GPU_PERFORMANCE.set_gpu_frequency_range, *limits
+        )
+        decky.logger.info(f"GPU governor running between {min_freq} and {max_freq} MHz")
+        self.__task = asyncio.create_task(self.__run())
+
+    async def __run(self):
+        try:
+            while True:
+                await asyncio.sleep(GpuGovernor.INTERVAL)
+                await HW_SERVICE.run(HW_SERVICE.GPU, self.sample)
+        except Exception as e:
+            decky.logger.error(f"GPU governor stopped: {e}")
+
+    async def stop(self, restore: bool = True):
+        """Stop governor, putting back the full profile range unless restore is False"""
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+            if restore and self.__ceiling != self.__limits[1]:
+                await HW_SERVICE.run(
+                    HW_SERVICE.GPU,
+                    GPU_PERFORMANCE.set_gpu_frequency_range,
+                    *self.__limits,
+                )
+                self.__ceiling = self.__limits[1]
+
+    def get_stats(self):
+        """Get governor state and counters"""
+        return {
+            "running": self.__task is not None and not self.__task.done(),
+            "limits": list(self.__limits),
+            "ceiling": self.__ceiling,
+            "load": None if self.__load is None else round(self.__load, 1),
+            **self.__stats,
+        }
+
+
+GPU_GOVERNOR = GpuGovernor()
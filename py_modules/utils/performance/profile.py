@@ -0,0 +1,150 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import time
+
+import decky  # pylint: disable=import-error
+from utils.performance.cpu import CPU_PERFORMANCE
+from utils.performance.gpu import GPU_PERFORMANCE
+from utils.performance.scx_sched import SCX_SCHED
+
+
+class ProfileApplier:
+    """Class for applying a full CPU/GPU profile in a single backend call"""
+
+    # Steps in dependency order. CPUs the new profile needs come online first
+    # so governor, EPP and boost reach them, the rest go offline last.
+    STEPS = [
+        "cores_online",
+        "boost",
+        "governor",
+        "epp",
+        "scheduler",
+        "platform_profile",
+        "tdp",
+        "gpu",
+        "cores",
+    ]
+
+    CPUFREQ_STEPS = ("boost", "governor", "epp")
+
+    def __init__(self):
+        self.__last: dict = {}
+
+    @staticmethod
+    def __build_target(profile: dict):
+        target = {}
+
+        cpu = profile.get("cpu")
+        if cpu:
+            target["boost"] = bool(cpu["boost"])
+            target["governor"] = cpu["governor"]
+            target["epp"] = cpu["epp"]
+            target["scheduler"] = cpu.get("scheduler", "")
+            target["platform_profile"] = cpu["acpi"]
+            target["tdp"] = (
+                int(cpu["tdp"]["spl"]),
+                int(cpu["tdp"]["sppl"]),
+                int(cpu["tdp"]["fppl"]),
+            )
+            target["cores"] = (
+                int(cpu["pcores"]),
+                int(cpu["ecores"]),
+                bool(cpu["smt"]),
+            )
+
+        gpu = profile.get("gpu")
+        if gpu:
+            target["gpu"] = (
+                int(gpu["min"]),
+                int(gpu["max"]),
+                bool(gpu.get("auto", False)),
+            )
+
+        return target
+
+    def __run_step(self, step: str, value):
+        match step:
+            case "cores_online":
+                CPU_PERFORMANCE.enable_cores(*value, online_only=True)
+            case "cores":
+                CPU_PERFORMANCE.enable_cores(*value)
+            case "boost":
+                CPU_PERFORMANCE.set_cpu_boost(value)
+            case "governor":
+                CPU_PERFORMANCE.set_governor(value)
+            case "epp":
+                CPU_PERFORMANCE.set_epp(value)
+            case "scheduler":
+                if value:
+                    SCX_SCHED.start(value)
+                else:
+                    SCX_SCHED.stop()
+            case "platform_profile":
+                CPU_PERFORMANCE.set_platform_profile(value)
+                time.sleep(0.1)
+            case "tdp":
+                CPU_PERFORMANCE.set_tdp(*value)
+            case "gpu":
+                # In auto mode the governor starts from the full band
+                GPU_PERFORMANCE.set_gpu_frequency_range(value[0], value[1])
+
+    def __plan(self, target: dict):
+        plan = []
+        for step in ProfileApplier.STEPS:
+            if step == "cores_online":
+                continue
+            if step in target and self.__last.get(step) != target[step]:
+                plan.append((step, target[step]))
+
+        # Only CPUs that stay online need the new cpufreq settings, so bring up
+        # the ones the target adds instead of every CPU
+        needs_cpufreq = any(step in ProfileApplier.CPUFREQ_STEPS for step, _ in plan)
+        if needs_cpufreq and any(step == "cores" for step, _ in plan):
+            plan.insert(0, ("cores_online", target["cores"]))
+
+        return plan
+
+    def apply(self, profile: dict):
+        """Apply profile, writing only the settings that changed since the last call"""
+        target = ProfileApplier.__build_target(profile)
+        plan = self.__plan(target)
+
+        steps = []
+        skipped = [
+            step
+            for step in ProfileApplier.STEPS
+            if step in target and all(step != s for s, _ in plan)
+        ]
+
+        t0 = time.perf_counter()
+        for step, value in plan:
+            error = None
+            t1 = time.perf_counter()
+            try:
+                self.__run_step(step, value)
+                if step != "cores_online":
+                    self.__last[step] = value
+            except Exception as e:
+                error = str(e)
+                self.__last.pop("cores" if step == "cores_online" else step, None)
+                decky.logger.error(f"Error applying profile step '{step}': {e}")
+            steps.append(
+                {
+                    "step": step,
+                    "elapsed_ms": round((time.perf_counter() - t1) * 1000, 3),
+                    "error": error,
+                }
+            )
+
+        elapsed = round((time.perf_counter() - t0) * 1000, 3)
+        decky.logger.info(
+            f"Profile applied in {elapsed}ms ({len(steps)} steps, {len(skipped)} unchanged)"
+        )
+        return {"elapsed_ms": elapsed, "steps": steps, "skipped": skipped}
+
+    def reset(self):
+        """Forget the last applied state so the next profile is fully written"""
+        self.__last = {}
+
+
+PROFILE_APPLIER = ProfileApplier()
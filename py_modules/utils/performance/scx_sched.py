@@ -1,7 +1,7 @@
 import json
 import shutil
 import subprocess
-import time
+import threading
 
 import decky  # pylint: disable=import-error
 
@@ -18,8 +18,19 @@ class ScxSched:
         self.__schedulers = []
         self.__initial: str = None
         self.__current: str = None
+        self.__initialized = False
+        self.__init_lock = threading.Lock()
+
+    def initialize(self):
+        with self.__init_lock:
+            if self.__initialized:
+                return
+            self.__initialized = True
+
+            if not shutil.which("scxctl"):
+                decky.logger.info("scxctl not found, schedulers unavailable")
+                return
 
-        if shutil.which("scxctl"):
             output = (
                 subprocess.run(["scxctl", "list"], capture_output=True, text=True)
                 .stdout.strip()
@@ -45,6 +56,7 @@ class ScxSched:
                 decky.logger.info("No default scheduler")
 
     def start(self, scheduler: str):
+        self.initialize()
         if self.__current == scheduler:
             return
 
@@ -58,6 +70,7 @@ class ScxSched:
             self.__current = scheduler
 
     def stop(self):
+        self.initialize()
         if self.__current == None:
             return
 
@@ -66,13 +79,8 @@ class ScxSched:
 
     @property
     def available(self):
+        self.initialize()
         return self.__schedulers
 
 
 SCX_SCHED = ScxSched()
-
-SCX_SCHED.start("lavd")
-time.sleep(3)
-SCX_SCHED.start("bpfland")
-time.sleep(3)
-SCX_SCHED.stop()
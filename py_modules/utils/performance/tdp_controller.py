@@ -0,0 +1,265 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import asyncio
+import glob
+import math
+import time
+
+import decky  # pylint: disable=import-error
+from utils.hw_service import HW_SERVICE
+from utils.performance.cpu import CPU_PERFORMANCE
+from utils.sysfs import SYSFS
+
+
+class TdpController:
+    """Class for adapting SPL to load and temperature inside the profile TDP"""
+
+    INTERVAL = 1.0
+    STEP_W = 2
+    SMOOTHING = 0.3
+
+    # Raise above UP_THRESHOLD and lower below DOWN_THRESHOLD, nothing in between.
+    # When moving, aim for the SPL that would put the load at TARGET.
+    UP_THRESHOLD = 80
+    DOWN_THRESHOLD = 50
+    TARGET = 65
+
+    # Package temperature to hold, and ceiling where boost is turned off until it cools down
+    THERMAL_TARGET = 85
+    THERMAL_HYSTERESIS = 5
+    BOOST_OFF_TEMP = 92
+    BOOST_ON_TEMP = 82
+    SKIN_LIMIT = 45
+
+    # Minimum time since the last change. Skin follows power over minutes, so it gets the longest wait
+    UP_DWELL = 2.0
+    DOWN_DWELL = 5.0
+    SKIN_DWELL = 20.0
+
+    def __init__(self):
+        self.__profile = (0, 0, 0)
+        self.__floor = 0
+        self.__boost = True
+        self.__spl = 0
+        self.__boost_off = False
+        self.__load: float | None = None
+        self.__last_change = -math.inf
+        self.__cpu_times: tuple[int, int] | None = None
+        self.__sensors: dict[str, str | None] | None = None
+        self.__task: asyncio.Task | None = None
+        self.__stats = {"samples": 0, "tdp_writes": 0, "boost_writes": 0}
+
+    def reset(self, tdp: tuple[int, int, int], floor: int, boost: bool):
+        """Start over from the profile TDP"""
+        self.__profile = tuple(int(v) for v in tdp)
+        self.__floor = min(int(floor), self.__profile[0])
+        self.__boost = boost
+        self.__spl = self.__profile[0]
+        self.__boost_off = False
+        self.__load = None
+        self.__last_change = -math.inf
+
+    def limits_for(self, spl: int) -> tuple[int, int, int]:
+        """Get SPL/SPPT/FPPT for an SPL, keeping the profile headroom and bounds"""
+        p_spl, p_sppt, p_fppt = self.__profile
+        sppt = min(p_sppt, spl + p_sppt - p_spl)
+        fppt = min(p_fppt, max(sppt, spl + p_fppt - p_spl))
+        return (spl, sppt, fppt)
+
+    def decide(self, cpu: float, gpu: float, temp: float | None, skin: float | None, now: float):
+        """Feed one sample. Returns (limits or None, boost or None) for what has to be written"""
+        self.__stats["samples"] += 1
+        busy = max(cpu, gpu)
+        if self.__load is None:
+            self.__load = busy
+        else:
+            self.__load += TdpController.SMOOTHING * (busy - self.__load)
+
+        boost = None
+        if temp is not None:
+            if not self.__boost_off and temp >= TdpController.BOOST_OFF_TEMP:
+                self.__boost_off = True
+                boost = False if self.__boost else None
+            elif self.__boost_off and temp <= TdpController.BOOST_ON_TEMP:
+                self.__boost_off = False
+                boost = True if self.__boost else None
+
+        elapsed = now - self.__last_change
+        hot = (
+            temp is not None
+            and temp >= TdpController.THERMAL_TARGET
+            and elapsed >= TdpController.UP_DWELL
+        ) or (
+            skin is not None
+            and skin >= TdpController.SKIN_LIMIT
+            and elapsed >= TdpController.SKIN_DWELL
+        )
+        warm = (
+            temp is not None
+            and temp >= TdpController.THERMAL_TARGET - TdpController.THERMAL_HYSTERESIS
+        ) or (
+            skin is not None
+            and skin >= TdpController.SKIN_LIMIT - TdpController.THERMAL_HYSTERESIS
+        )
+
+        spl = self.__spl
+        step = TdpController.STEP_W
+        # Load scales with the limit, so estimate the SPL the work needs
+        wanted = math.ceil(self.__load * spl / TdpController.TARGET)
+        if hot:
+            spl = max(self.__floor, spl - step)
+        elif (
+            self.__load > TdpController.UP_THRESHOLD
+            and not warm
+            and elapsed >= TdpController.UP_DWELL
+        ):
+            spl = min(self.__profile[0], max(wanted, spl + step))
+        elif (
+            self.__load < TdpController.DOWN_THRESHOLD
+            and elapsed >= TdpController.DOWN_DWELL
+        ):
+            spl = max(self.__floor, min(wanted, spl - step))
+
+        limits = None
+        if spl != self.__spl:
+            # Expected load at the new limit, so the average does not lag the change
+            self.__load = min(100.0, self.__load * self.__spl / spl)
+            self.__spl = spl
+            self.__last_change = now
+            limits = self.limits_for(spl)
+            self.__stats["tdp_writes"] += 1
+        if boost is not None:
+            self.__stats["boost_writes"] += 1
+        return limits, boost
+
+    @staticmethod
+    def __discover():
+        sensors = {"temp": None, "skin": None}
+        for path in glob.glob(SYSFS.path("/sys/class/hwmon/hwmon*")):
+            try:
+                if SYSFS.read(f"{path}/name") == "k10temp":
+                    sensors["temp"] = f"{path}/temp1_input"
+            except OSError:
+                continue
+        for path in glob.glob(SYSFS.path("/sys/class/thermal/thermal_zone*")):
+            try:
+                if SYSFS.read(f"{path}/type") == "acpitz":
+                    sensors["skin"] = f"{path}/temp"
+                    break
+            except OSError:
+                continue
+        sensors["gpu"] = next(
+            iter(glob.glob(SYSFS.path("/sys/class/drm/card?/device/gpu_busy_percent"))),
+            None,
+        )
+        return sensors
+
+    def __cpu_load(self):
+        with open(SYSFS.path("/proc/stat")) as f:
+            fields = [int(v) for v in f.readline().split()[1:]]
+        total = sum(fields)
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+        previous = self.__cpu_times
+        self.__cpu_times = (total, idle)
+        if previous is None or total <= previous[0]:
+            return 0.0
+        return 100 * (1 - (idle - previous[1]) / (total - previous[0]))
+
+    def __read(self, sensor: str, scale: float = 1):
+        path = self.__sensors.get(sensor)
+        if path is None:
+            return None
+        try:
+            return float(SYSFS.read_pooled(path)) * scale
+        except (OSError, ValueError):
+            return None
+
+    def sample(self):
+        """Read load and temperatures once and write new limits if needed"""
+        limits, boost = self.decide(
+            self.__cpu_load(),
+            self.__read("gpu") or 0.0,
+            self.__read("temp", 1 / 1000),
+            self.__read("skin", 1 / 1000),
+            time.monotonic(),
+        )
+        if boost is not None:
+            decky.logger.info(f"TDP controller turning CPU boost {'on' if boost else 'off'}")
+            CPU_PERFORMANCE.set_cpu_boost(boost)
+        if limits is not None:
+            decky.logger.debug(
+                "TDP controller setting %d/%d/%dW at %.0f%% load", *limits, self.__load
+            )
+            CPU_PERFORMANCE.set_tdp(*limits)
+
+    def __handover(self, tdp: tuple[int, int, int], boost: bool):
+        # Bring hardware back to the profile values wherever the controller moved away
+        if self.__spl and self.limits_for(self.__spl) != tdp:
+            CPU_PERFORMANCE.set_tdp(*tdp)
+        if self.__boost_off and boost:
+            CPU_PERFORMANCE.set_cpu_boost(True)
+        self.__spl = tdp[0]
+        self.__boost_off = False
+
+    async def configure(self, tdp: tuple[int, int, int], boost: bool, auto: bool):
+        """Run controller below the given profile TDP, or stop it if auto is off"""
+        tdp = tuple(int(v) for v in tdp)
+        if not auto:
+            await self.stop()
+            return
+
+        running = self.__task is not None and not self.__task.done()
+        if running and self.__profile == tdp and self.__boost == boost:
+            return
+
+        if running:
+            await self.__cancel()
+            await HW_SERVICE.run(HW_SERVICE.CPU, self.__handover, tdp, boost)
+        if self.__sensors is None:
+            self.__sensors = TdpController.__discover()
+        floor = (
+            await HW_SERVICE.run(HW_SERVICE.CPU, CPU_PERFORMANCE.get_tdp_ranges)
+        )["spl"][0]
+        self.reset(tdp, floor, boost)
+        self.__cpu_times = None
+        decky.logger.info(f"TDP controller running between {floor}W and {tdp[0]}W")
+        self.__task = asyncio.create_task(self.__run())
+
+    async def __run(self):
+        try:
+            while True:
+                await asyncio.sleep(TdpController.INTERVAL)
+                await HW_SERVICE.run(HW_SERVICE.CPU, self.sample)
+        except Exception as e:
+            decky.logger.error(f"TDP controller stopped: {e}")
+
+    async def __cancel(self):
+        self.__task.cancel()
+        try:
+            await self.__task
+        except asyncio.CancelledError:
+            pass
+        self.__task = None
+
+    async def stop(self, restore: bool = True):
+        """Stop controller, putting back the profile TDP and boost unless restore is False"""
+        if self.__task is not None:
+            await self.__cancel()
+            if restore:
+                await HW_SERVICE.run(
+                    HW_SERVICE.CPU, self.__handover, self.__profile, self.__boost
+                )
+
+    def get_stats(self):
+        """Get controller state and counters"""
+        return {
+            "running": self.__task is not None and not self.__task.done(),
+            "profile": list(self.__profile),
+            "limits": list(self.limits_for(self.__spl)) if self.__spl else None,
+            "boost_off": self.__boost_off,
+            "load": None if self.__load is None else round(self.__load, 1),
+            **self.__stats,
+        }
+
+
+TDP_CONTROLLER = TdpController()
@@ -0,0 +1,107 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import ctypes
+import os
+import platform
+from collections import defaultdict
+
+from utils.sysfs import SYSFS
+
+
+class Processes:
+    """Class for walking process trees and setting their priority in-process"""
+
+    PROC_PATH = SYSFS.path("/proc")
+
+    SYS_IOPRIO_SET = {"x86_64": 251, "aarch64": 30}
+    IOPRIO_WHO_PROCESS = 1
+    IOPRIO_CLASS_SHIFT = 13
+
+    def __init__(self):
+        self.__libc = ctypes.CDLL(None, use_errno=True)
+        self.__ioprio_nr = Processes.SYS_IOPRIO_SET.get(platform.machine())
+
+    @staticmethod
+    def __read_stat(pid: int):
+        with open(f"{Processes.PROC_PATH}/{pid}/stat", "r") as f:
+            data = f.read()
+        # comm may contain spaces and parentheses, fields start after the last ')'
+        return data[data.rindex(")") + 2 :].split(" ")
+
+    def list_pids(self) -> list[int]:
+        """Get every pid currently in /proc"""
+        return [int(e) for e in os.listdir(Processes.PROC_PATH) if e.isdigit()]
+
+    def get_ppid(self, pid: int) -> int | None:
+        """Get parent pid, or None if the process is gone"""
+        try:
+            return int(Processes.__read_stat(pid)[1])
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def get_children_map(self) -> dict[int, list[int]]:
+        """Map every pid to its direct children in a single /proc scan"""
+        children = defaultdict(list)
+        for pid in self.list_pids():
+            ppid = self.get_ppid(pid)
+            if ppid is not None:
+                children[ppid].append(pid)
+        return children
+
+    def get_descendants(self, root: int, children=None) -> list[int]:
+        """Get root pid and all its descendants"""
+        if children is None:
+            children = self.get_children_map()
+
+        result = []
+        pending = [root]
+        while pending:
+            pid = pending.pop()
+            result.append(pid)
+            pending.extend(children.get(pid, []))
+        return result
+
+    def get_threads(self, pid: int) -> list[int]:
+        """Get thread ids of a process"""
+        try:
+            return [int(t) for t in os.listdir(f"{Processes.PROC_PATH}/{pid}/task")]
+        except OSError:
+            return []
+
+    def set_io_priority(self, tid: int, io_class: int, io_prio: int):
+        """Set IO priority of a thread through the ioprio_set syscall"""
+        if self.__ioprio_nr is None:
+            raise OSError(f"ioprio_set not supported on {platform.machine()}")
+
+        value = (io_class << Processes.IOPRIO_CLASS_SHIFT) | io_prio
+        if (
+            self.__libc.syscall(
+                self.__ioprio_nr, Processes.IOPRIO_WHO_PROCESS, tid, value
+            )
+            != 0
+        ):
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def set_priority(self, tid: int, nice: int, io_class: int, io_prio: int):
+        """Set CPU and IO priority of a thread"""
+        os.setpriority(os.PRIO_PROCESS, tid, nice)
+        self.set_io_priority(tid, io_class, io_prio)
+
+    def set_priority_many(
+        self, tids: list[int], nice: int, io_class: int, io_prio: int
+    ):
+        """Set CPU and IO priority for several threads. Returns (applied, failed)"""
+        applied = 0
+        failed = 0
+        for tid in tids:
+            try:
+                self.set_priority(tid, nice, io_class, io_prio)
+                applied += 1
+            except OSError:
+                # Threads may exit while walking the tree
+                failed += 1
+        return applied, failed
+
+
+PROCESSES = Processes()
@@ -0,0 +1,38 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import time
+
+import decky  # pylint: disable=import-error
+
+
+class StartupReport:
+    """Class for timing backend startup phases"""
+
+    def __init__(self):
+        self.__phases: list[dict] = []
+
+    def run(self, name: str, fn, *args, **kwargs):
+        """Run a startup phase, logging and recording how long it took"""
+        error = None
+        result = None
+        t0 = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            error = str(e)
+            decky.logger.error(f"Startup phase '{name}' failed: {e}")
+        elapsed = round((time.perf_counter() - t0) * 1000, 3)
+
+        decky.logger.info(f"Startup phase '{name}' took {elapsed}ms")
+        self.__phases.append({"name": name, "elapsed_ms": elapsed, "error": error})
+        return result
+
+    def get_report(self):
+        """Get recorded startup phases"""
+        return {
+            "phases": list(self.__phases),
+            "cumulative_ms": round(sum(p["elapsed_ms"] for p in self.__phases), 3),
+        }
+
+
+STARTUP = StartupReport()
@@ -0,0 +1,196 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import errno
+import os
+import platform
+import threading
+
+import decky  # pylint: disable=import-error
+
+
+class Sysfs:
+    """Class for sysfs access with a write-through cache of known values"""
+
+    # Prefix for every /sys and /proc path, lets the backend run against a simulated tree
+    ROOT = os.environ.get("ALLY_SYSFS_ROOT", "").rstrip("/")
+
+    def __init__(self):
+        self.__cache: dict[str, str] = {}
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__writes = 0
+        self.__skipped = 0
+        self.__fds: dict[str, int] = {}
+        self.__reopens = 0
+
+    @staticmethod
+    def path(path: str) -> str:
+        """Get absolute path of a /sys or /proc file under the configured root"""
+        return Sysfs.ROOT + path
+
+    def kernel_release(self) -> str:
+        """Get running kernel release"""
+        try:
+            return self.read(Sysfs.path("/proc/sys/kernel/osrelease"))
+        except OSError:
+            return platform.release()
+
+    def read(self, path: str, use_cache: bool = True) -> str:
+        """Read stripped file content, from cache when known"""
+        if use_cache:
+            with self.__lock:
+                if path in self.__cache:
+                    self.__hits += 1
+                    return self.__cache[path]
+
+        with open(path, "r") as f:
+            value = f.read().strip()
+
+        with self.__lock:
+            self.__misses += 1
+            if use_cache:
+                self.__cache[path] = value
+        return value
+
+    def write(self, path: str, value, use_cache: bool = True) -> bool:
+        """Write value unless it is already the current one. Returns True if written"""
+        value = str(value).strip()
+
+        if use_cache:
+            try:
+                current = self.read(path)
+            except OSError:
+                current = None
+
+            if current == value:
+                with self.__lock:
+                    self.__skipped += 1
+                return False
+
+        try:
+            with open(path, "w") as f:
+                f.write(value)
+        except Exception:
+            self.invalidate(path)
+            raise
+
+        with self.__lock:
+            self.__writes += 1
+            if use_cache:
+                self.__cache[path] = value
+        return True
+
+    def __open_handle(self, path: str) -> int:
+        fd = self.__fds.get(path)
+        if fd is None:
+            try:
+                fd = os.open(path, os.O_RDWR | os.O_CLOEXEC)
+            except PermissionError:
+                # Read-only attributes such as sensors refuse write access
+                fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+            self.__fds[path] = fd
+        return fd
+
+    def __close_handle(self, path: str):
+        fd = self.__fds.pop(path, None)
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __pooled_io(self, path: str, op):
+        # A CPU going offline invalidates its cpufreq descriptors, retry once with a fresh one
+        try:
+            return op(self.__open_handle(path))
+        except OSError as e:
+            if e.errno not in (errno.EBADF, errno.ENODEV, errno.ENOENT, errno.EBUSY):
+                raise
+            self.__close_handle(path)
+            self.__reopens += 1
+            return op(self.__open_handle(path))
+
+    def read_pooled(self, path: str) -> str:
+        """Read frequently polled file through a pooled descriptor, bypassing the cache"""
+        with self.__lock:
+            try:
+                data = self.__pooled_io(path, lambda fd: os.pread(fd, 4096, 0))
+            except OSError:
+                self.__close_handle(path)
+                raise
+        return data.decode().strip()
+
+    def write_many(self, paths: list[str], value) -> int:
+        """Write value to several files through pooled descriptors. Returns written count"""
+        value = str(value).strip()
+        data = value.encode()
+        written = 0
+        error = None
+
+        with self.__lock:
+            for path in paths:
+                try:
+                    current = self.__cache.get(path)
+                    if current is None:
+                        current = (
+                            self.__pooled_io(path, lambda fd: os.pread(fd, 4096, 0))
+                            .decode()
+                            .strip()
+                        )
+                        self.__misses += 1
+                    else:
+                        self.__hits += 1
+
+                    if current == value:
+                        self.__cache[path] = value
+                        self.__skipped += 1
+                        continue
+
+                    self.__pooled_io(path, lambda fd: os.pwrite(fd, data, 0))
+                    self.__cache[path] = value
+                    self.__writes += 1
+                    written += 1
+                except OSError as e:
+                    self.__cache.pop(path, None)
+                    self.__close_handle(path)
+                    error = error or e
+
+        if error is not None:
+            raise error
+        return written
+
+    def close_handles(self):
+        """Close every pooled descriptor"""
+        with self.__lock:
+            for path in list(self.__fds):
+                self.__close_handle(path)
+
+    def invalidate(self, prefix: str | None = None):
+        """Forget cached values for paths starting with prefix, or all of them"""
+        with self.__lock:
+            if prefix is None:
+                count = len(self.__cache)
+                self.__cache.clear()
+            else:
+                stale = [p for p in self.__cache if p.startswith(prefix)]
+                count = len(stale)
+                for p in stale:
+                    del self.__cache[p]
+        decky.logger.debug(f"Invalidated {count} sysfs cache entries")
+
+    def get_stats(self):
+        """Get cache counters"""
+        with self.__lock:
+            return {
+                "entries": len(self.__cache),
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "writes": self.__writes,
+                "skipped_writes": self.__skipped,
+                "open_handles": len(self.__fds),
+                "reopens": self.__reopens,
+            }
+
+
+SYSFS = Sysfs()
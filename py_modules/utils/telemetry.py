@@ -0,0 +1,188 @@
+# pylint: disable=missing-module-docstring, line-too-long, broad-exception-caught, too-few-public-methods , unspecified-encoding
+
+import asyncio
+import glob
+import math
+import os
+import re
+import time
+from array import array
+
+import decky  # pylint: disable=import-error
+from plugin_config import PluginConfig
+from utils.hw_service import HW_SERVICE
+from utils.sysfs import SYSFS
+
+
+class Telemetry:
+    """Class for sampling hardware metrics into fixed-size ring buffers"""
+
+    CAPACITY = 600
+    DEFAULT_INTERVAL_MS = 1000
+    # Sampling runs only while someone reads it, and stops this long after the last read
+    IDLE_STOP_S = 60.0
+
+    def __init__(self):
+        self.__sources: list[tuple[str, str, float]] = []
+        self.__columns: dict[str, array] = {}
+        self.__timestamps = array("d")
+        self.__seq = 0
+        self.__task: asyncio.Task | None = None
+        self.__interval = Telemetry.DEFAULT_INTERVAL_MS / 1000
+        self.__sample_ms = 0.0
+        self.__last_read = -math.inf
+        self.__start_lock = asyncio.Lock()
+
+    @staticmethod
+    def __hwmon(name: str):
+        for path in glob.glob(SYSFS.path("/sys/class/hwmon/hwmon*")):
+            try:
+                if SYSFS.read(f"{path}/name") == name:
+                    return path
+            except OSError:
+                continue
+        return None
+
+    @staticmethod
+    def __discover():
+        """Get (column, path, scale) for every available metric"""
+        sources = []
+
+        freq_files = glob.glob(
+            SYSFS.path("/sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq")
+        )
+        for path in sorted(
+            freq_files, key=lambda p: int(re.findall(r"cpu(\d+)", p)[0])
+        ):
+            cpu = re.findall(r"cpu(\d+)", path)[0]
+            sources.append((f"cpu{cpu}_mhz", path, 1 / 1000))
+
+        for path in sorted(
+            glob.glob(SYSFS.path("/sys/class/power_supply/BAT*/power_now"))
+        ):
+            sources.append(("battery_w", path, 1 / 1000000))
+            break
+
+        amdgpu = Telemetry.__hwmon("amdgpu")
+        if amdgpu:
+            for fn in ("power1_average", "power1_input"):
+                if os.path.exists(f"{amdgpu}/{fn}"):
+                    sources.append(("package_w", f"{amdgpu}/{fn}", 1 / 1000000))
+                    break
+            if os.path.exists(f"{amdgpu}/temp1_input"):
+                sources.append(("gpu_temp_c", f"{amdgpu}/temp1_input", 1 / 1000))
+            if os.path.exists(f"{amdgpu}/freq1_input"):
+                sources.append(("gpu_mhz", f"{amdgpu}/freq1_input", 1 / 1000000))
+
+        k10temp = Telemetry.__hwmon("k10temp")
+        if k10temp and os.path.exists(f"{k10temp}/temp1_input"):
+            sources.append(("cpu_temp_c", f"{k10temp}/temp1_input", 1 / 1000))
+
+        for path in glob.glob(
+            SYSFS.path("/sys/class/drm/card?/device/gpu_busy_percent")
+        ):
+            sources.append(("gpu_busy", path, 1))
+            break
+
+        return sources
+
+    def __reset(self):
+        self.__sources = Telemetry.__discover()
+        self.__columns = {
+            name: array("d", [math.nan] * Telemetry.CAPACITY)
+            for name, _, _ in self.__sources
+        }
+        self.__timestamps = array("d", [0.0] * Telemetry.CAPACITY)
+        self.__seq = 0
+        decky.logger.info(
+            f"Telemetry sampling {len(self.__sources)} metrics: {', '.join(self.__columns)}"
+        )
+
+    def sample(self):
+        """Take one sample of every metric"""
+        t0 = time.perf_counter()
+        slot = self.__seq % Telemetry.CAPACITY
+        self.__timestamps[slot] = time.time()
+        for name, path, scale in self.__sources:
+            try:
+                value = float(SYSFS.read_pooled(path)) * scale
+            except (OSError, ValueError):
+                # CPUs may be offline, sensors may be temporarily unreadable
+                value = math.nan
+            self.__columns[name][slot] = value
+        self.__seq += 1
+        self.__sample_ms = (time.perf_counter() - t0) * 1000
+
+    def get_since(self, since_seq: int):
+        """Get samples taken after since_seq in columnar form"""
+        self.__last_read = time.monotonic()
+        oldest = max(0, self.__seq - Telemetry.CAPACITY)
+        first = max(since_seq, oldest)
+        slots = [s % Telemetry.CAPACITY for s in range(first, self.__seq)]
+
+        def column(values):
+            return [
+                None if math.isnan(values[s]) else round(values[s], 2) for s in slots
+            ]
+
+        return {
+            "seq": self.__seq,
+            "first_seq": first,
+            "dropped": max(0, oldest - since_seq),
+            "interval_ms": round(self.__interval * 1000),
+            "sample_ms": round(self.__sample_ms, 3),
+            "ts": [round(self.__timestamps[s], 3) for s in slots],
+            "data": {name: column(values) for name, values in self.__columns.items()},
+        }
+
+    def running(self):
+        """Check if background sampling is active"""
+        return self.__task is not None and not self.__task.done()
+
+    async def start(self):
+        """Start background sampling at the configured interval, if not running already"""
+        # Concurrent pollers must not start two samplers
+        async with self.__start_lock:
+            if self.running():
+                return
+            interval_ms = int(
+                PluginConfig.get_config_item(
+                    "settings.telemetry_interval_ms", Telemetry.DEFAULT_INTERVAL_MS
+                )
+            )
+            if interval_ms <= 0:
+                decky.logger.debug("Telemetry disabled")
+                return
+
+            await self.stop()
+            self.__interval = interval_ms / 1000
+            self.__last_read = time.monotonic()
+            # Buffers survive idle stops so readers keep their sequence numbers
+            if not self.__sources:
+                await HW_SERVICE.run(HW_SERVICE.TELEMETRY, self.__reset)
+            await HW_SERVICE.run(HW_SERVICE.TELEMETRY, self.sample)
+            self.__task = asyncio.create_task(self.__run())
+
+    async def __run(self):
+        try:
+            while time.monotonic() - self.__last_read < Telemetry.IDLE_STOP_S:
+                await asyncio.sleep(self.__interval)
+                await HW_SERVICE.run(HW_SERVICE.TELEMETRY, self.sample)
+            decky.logger.info(
+                f"Telemetry sampler idle for {Telemetry.IDLE_STOP_S:.0f}s, stopping"
+            )
+        except Exception as e:
+            decky.logger.error(f"Telemetry sampler stopped: {e}")
+
+    async def stop(self):
+        """Stop background sampling"""
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+
+
+TELEMETRY = Telemetry()
@@ -3,6 +3,7 @@ import { Translator } from 'decky-plugin-framework';
 import { FC, useContext } from 'react';
 
 import { PerformanceContext } from '../../../contexts/performanceContext';
+import { Constants } from '../../../utils/constants';
 import { Epp } from '../../../utils/models';
 import { WhiteBoardUtils } from '../../../utils/whiteboard';
 
@@ -119,6 +120,30 @@ export const AdvancedBlock: FC = () => {
     setProfile(newProf);
   };
 
+  const onCoreParkingChange = (newVal: boolean): void => {
+    const newProf = { ...profile, cpu: { ...profile.cpu, coreParking: newVal } };
+    saveProfile(id, name, newProf);
+    setProfile(newProf);
+  };
+
+  const onParkingMinPCoreChange = (newVal: number): void => {
+    const newProf = { ...profile, cpu: { ...profile.cpu, parkingMinPcores: newVal } };
+    saveProfile(id, name, newProf);
+    setProfile(newProf);
+  };
+
+  const onParkingMinECoreChange = (newVal: number): void => {
+    const newProf = { ...profile, cpu: { ...profile.cpu, parkingMinEcores: newVal } };
+    saveProfile(id, name, newProf);
+    setProfile(newProf);
+  };
+
+  const onPinGameChange = (newVal: boolean): void => {
+    const newProf = { ...profile, cpu: { ...profile.cpu, pinGame: newVal } };
+    saveProfile(id, name, newProf);
+    setProfile(newProf);
+  };
+
   return (
     <PanelSection>
       <PanelSectionRow>
@@ -190,6 +215,60 @@ export const AdvancedBlock: FC = () => {
           highlightOnFocus
         />
       </PanelSectionRow>
+      <PanelSectionRow>
+        <ToggleField
+          label={Translator.translate('cpu.parking')}
+          description={Translator.translate('cpu.parking.desc')}
+          checked={profile.cpu.coreParking ?? false}
+          onChange={onCoreParkingChange}
+          highlightOnFocus
+        />
+      </PanelSectionRow>
+      {profile.cpu.coreParking && (
+        <PanelSectionRow>
+          <SliderField
+            label={Translator.translate('cpu.parking.minpcores')}
+            value={Math.min(
+              profile.cpu.parkingMinPcores ?? Constants.DEFAULT_PARKING_MIN_PCORES,
+              profile.cpu.pcores
+            )}
+            showValue
+            step={1}
+            min={1}
+            max={profile.cpu.pcores}
+            validValues="range"
+            onChange={onParkingMinPCoreChange}
+          />
+        </PanelSectionRow>
+      )}
+      {profile.cpu.coreParking && profile.cpu.ecores > 0 && (
+        <PanelSectionRow>
+          <SliderField
+            label={Translator.translate('cpu.parking.minecores')}
+            value={Math.min(
+              profile.cpu.parkingMinEcores ?? Constants.DEFAULT_PARKING_MIN_ECORES,
+              profile.cpu.ecores
+            )}
+            showValue
+            step={1}
+            min={0}
+            max={profile.cpu.ecores}
+            validValues="range"
+            onChange={onParkingMinECoreChange}
+          />
+        </PanelSectionRow>
+      )}
+      {WhiteBoardUtils.getECores() > 0 && (
+        <PanelSectionRow>
+          <ToggleField
+            label={Translator.translate('cpu.pin')}
+            description={Translator.translate('cpu.pin.desc')}
+            checked={profile.cpu.pinGame ?? false}
+            onChange={onPinGameChange}
+            highlightOnFocus
+          />
+        </PanelSectionRow>
+      )}
       <PanelSectionRow>
         <ToggleField
           label={Translator.translate('cpu.boost')}
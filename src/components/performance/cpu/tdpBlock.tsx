@@ -1,4 +1,4 @@
-import { PanelSection, PanelSectionRow, SliderField } from '@decky/ui';
+import { PanelSection, PanelSectionRow, SliderField, ToggleField } from '@decky/ui';
 import { Translator } from 'decky-plugin-framework';
 import { FC, useContext, useEffect } from 'react';
 
@@ -61,6 +61,16 @@ export const TdpBlock: FC = () => {
     setProfile(newProf);
   };
 
+  const onAdaptiveChange = (newVal: boolean): void => {
+    const newProf = {
+      ...profile,
+      cpu: { ...profile.cpu, adaptiveTdp: newVal }
+    };
+
+    saveProfile(id, name, newProf);
+    setProfile(newProf);
+  };
+
   return (
     <PanelSection>
       <PanelSectionRow>
@@ -105,6 +115,16 @@ export const TdpBlock: FC = () => {
           onChange={onFpplChange}
         />
       </PanelSectionRow>
+      <PanelSectionRow>
+        <ToggleField
+          label={Translator.translate('tdp.adaptive')}
+          description={Translator.translate('tdp.adaptive.desc')}
+          checked={profile.cpu.adaptiveTdp ?? false}
+          onChange={onAdaptiveChange}
+          bottomSeparator="none"
+          highlightOnFocus
+        />
+      </PanelSectionRow>
     </PanelSection>
   );
 };
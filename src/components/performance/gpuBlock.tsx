@@ -1,4 +1,4 @@
-import { PanelSection, PanelSectionRow, SliderField } from '@decky/ui';
+import { PanelSection, PanelSectionRow, SliderField, ToggleField } from '@decky/ui';
 import { Translator } from 'decky-plugin-framework';
 import { FC, useContext } from 'react';
 
@@ -37,6 +37,18 @@ export const GpuBlock: FC = () => {
     }
   };
 
+  const onAutoChange = (newVal: boolean): void => {
+    const newProf: Profile = {
+      ...profile,
+      gpu: {
+        ...profile.gpu,
+        auto: newVal
+      }
+    };
+    saveProfile(id, name, newProf);
+    setProfile(newProf);
+  };
+
   return (
     <PanelSection>
       <PanelSectionRow>
@@ -67,6 +79,16 @@ export const GpuBlock: FC = () => {
           onChange={onMaxFreqChange}
         />
       </PanelSectionRow>
+      <PanelSectionRow>
+        <ToggleField
+          label={Translator.translate('gpu.auto')}
+          description={Translator.translate('gpu.auto.desc')}
+          checked={profile.gpu.auto ?? false}
+          onChange={onAutoChange}
+          bottomSeparator="none"
+          highlightOnFocus
+        />
+      </PanelSectionRow>
     </PanelSection>
   );
 };
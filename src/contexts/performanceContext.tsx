@@ -62,6 +62,63 @@ const defaultValue: PerformanceContextType = {
 
 export const PerformanceContext = createContext(defaultValue);
 
+// Least recently used first. null marks apps the backend has no icon for
+const ICON_CACHE_ENTRIES = 64;
+const iconCache = new Map<string, string | null>();
+
+const getCachedIcon = (appId: string): string | null | undefined => {
+  const icon = iconCache.get(appId);
+  if (icon !== undefined) {
+    iconCache.delete(appId);
+    iconCache.set(appId, icon);
+  }
+  return icon;
+};
+
+const setCachedIcon = (appId: string, icon: string | null): void => {
+  iconCache.delete(appId);
+  iconCache.set(appId, icon);
+  while (iconCache.size > ICON_CACHE_ENTRIES) {
+    iconCache.delete(iconCache.keys().next().value as string);
+  }
+};
+
+const fetchStoredIcons = async (): Promise<void> => {
+  const appIds = (Router.RunningApps as AppOverviewExt[])
+    .filter((app) => !app.icon_data && app.icon_hash && !iconCache.has(String(app.appid)))
+    .map((app) => String(app.appid));
+  if (appIds.length == 0) {
+    return;
+  }
+
+  const result = await BackendUtils.getIconsForApps(appIds);
+  Object.entries(result.icons).forEach(([appId, icon]) => setCachedIcon(appId, icon));
+  result.missing.forEach((appId) => setCachedIcon(appId, null));
+};
+
+const THUMBNAIL_SIZE = 128;
+
+const toThumbnail = (src: string): Promise<string> => {
+  return new Promise((resolve) => {
+    const img = new Image();
+    img.onload = (): void => {
+      const scale = Math.min(1, THUMBNAIL_SIZE / Math.max(img.width, img.height));
+      const canvas = document.createElement('canvas');
+      canvas.width = Math.max(1, Math.round(img.width * scale));
+      canvas.height = Math.max(1, Math.round(img.height * scale));
+      const ctx = canvas.getContext('2d');
+      if (!ctx) {
+        resolve(src);
+        return;
+      }
+      ctx.drawImage(img, 0, 0, canvas.width, canvas.height);
+      resolve(canvas.toDataURL('image/jpeg', 0.9));
+    };
+    img.onerror = (): void => resolve(src);
+    img.src = src;
+  });
+};
+
 const loadIcon = async (
   appId: string,
   setIcon: (icon: string | undefined) => void
@@ -79,7 +136,10 @@ const loadIcon = async (
       setIcon('data:image/' + app.icon_data_format + ';base64,' + app.icon_data);
     } else {
       if (app.icon_hash) {
-        const icon = await BackendUtils.getIconForApp(appId);
+        if (!iconCache.has(appId)) {
+          await fetchStoredIcons();
+        }
+        const icon = getCachedIcon(appId);
         if (icon) {
           setIcon(icon);
         } else {
@@ -88,8 +148,9 @@ const loadIcon = async (
             const response = await CorsClient.fetchUrl(iconUrl);
             if (response.ok) {
               const reader = new FileReader();
-              reader.onload = (): void => {
-                const newIconSrc = reader.result as string;
+              reader.onload = async (): Promise<void> => {
+                const newIconSrc = await toThumbnail(reader.result as string);
+                setCachedIcon(appId, newIconSrc);
                 BackendUtils.setIconForApp(appId, newIconSrc);
                 setIcon(newIconSrc);
               };
@@ -255,13 +255,19 @@ export class Profiles {
           epp: prof.cpu.epp ?? Constants.DEFAULT_EPP,
           scheduler: prof.cpu.scheduler ?? undefined,
           pcores: prof.cpu.pcores ?? WhiteBoardUtils.getPCores(),
-          ecores: prof.cpu.ecores ?? WhiteBoardUtils.getECores()
+          ecores: prof.cpu.ecores ?? WhiteBoardUtils.getECores(),
+          adaptiveTdp: prof.cpu.adaptiveTdp ?? false,
+          coreParking: prof.cpu.coreParking ?? false,
+          parkingMinPcores: prof.cpu.parkingMinPcores ?? Constants.DEFAULT_PARKING_MIN_PCORES,
+          parkingMinEcores: prof.cpu.parkingMinEcores ?? Constants.DEFAULT_PARKING_MIN_ECORES,
+          pinGame: prof.cpu.pinGame ?? false
         },
         gpu: {
           frequency: {
             min: Math.max(WhiteBoardUtils.getGpuMinFreq(), prof.gpu.frequency.min),
             max: Math.min(WhiteBoardUtils.getGpuMaxFreq(), prof.gpu.frequency.max)
-          }
+          },
+          auto: prof.gpu.auto ?? false
         },
         display: {
           brightness: prof.display.brightness
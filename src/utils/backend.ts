@@ -3,7 +3,20 @@ import { Backend, Logger } from 'decky-plugin-framework';
 
 import { Profiles } from '../settings/profiles';
 import { AsyncUtils } from './async';
-import { Acpi, AudioDevice, CpuImpl, Epp, Governor, Profile, SdtdpSettings } from './models';
+import { Constants } from './constants';
+import {
+  Acpi,
+  ApplyProfileRequest,
+  ApplyProfileResult,
+  AudioDevice,
+  CpuImpl,
+  Epp,
+  Governor,
+  IconsForApps,
+  PluginLogPage,
+  Profile,
+  SdtdpSettings
+} from './models';
 import { WhiteBoardUtils } from './whiteboard';
 
 /**
@@ -23,6 +36,23 @@ export class BackendUtils {
     return Backend.backend_call<[], string>('get_plugin_log');
   }
 
+  /**
+   * Method to get a page of the current session log, newest entries first
+   * @returns A Promise of the entries in chronological order and the offset of the next page
+   */
+  public static async getPluginLogPage(
+    offset: number,
+    limit: number,
+    minLevel: string
+  ): Promise<PluginLogPage> {
+    return Backend.backend_call<[offset: number, limit: number, minLevel: string], PluginLogPage>(
+      'get_plugin_log_page',
+      offset,
+      limit,
+      minLevel
+    );
+  }
+
   /**
    * Method to get the plugin log
    * @returns A Promise of the log as a string
@@ -137,63 +167,56 @@ export class BackendUtils {
             }
           }
 
-          if (gpuChanged) {
-            Logger.info('Setting GPU profile', profile.gpu);
-            await Backend.backend_call<[min: number, max: number], void>(
-              'set_gpu_frequency_range',
-              profile.gpu.frequency.min,
-              profile.gpu.frequency.max
-            );
-          }
+          if (cpuChanged || gpuChanged) {
+            const request: ApplyProfileRequest = {};
 
-          if (cpuChanged) {
-            const acpi = Acpi[Profiles.getAcpiProfile(profile.cpu.tdp.spl)]
-              .toLowerCase()
-              .replace('_', '-');
-            Logger.info('Setting CPU profile to "' + acpi + '" with:', {
-              mode: profile.mode,
-              cpu: profile.cpu
-            });
-
-            await Backend.backend_call<[number, number, boolean], void>(
-              'enable_cores',
-              WhiteBoardUtils.getPCores(),
-              WhiteBoardUtils.getECores(),
-              true
-            );
-            await Backend.backend_call<[enabled: boolean], number>(
-              'set_cpu_boost',
-              profile.cpu.boost
-            );
-            await Backend.backend_call<[governor: string], void>(
-              'set_governor',
-              Governor[profile.cpu.governor].toLowerCase()
-            );
-            await Backend.backend_call<[epp: string], void>(
-              'set_epp',
-              Epp[profile.cpu.epp].toLowerCase()
-            );
-            if (profile.cpu.scheduler != '') {
-              await Backend.backend_call<[scheduler: string], void>(
-                'set_scheduler',
-                profile.cpu.scheduler
-              );
-            } else {
-              await Backend.backend_call<[], void>('stop_scheduler');
+            if (gpuChanged) {
+              Logger.info('Setting GPU profile', profile.gpu);
+              request.gpu = {
+                min: profile.gpu.frequency.min,
+                max: profile.gpu.frequency.max,
+                auto: profile.gpu.auto ?? false
+              };
             }
-            await Backend.backend_call<[prof: string], number>('set_platform_profile', acpi);
-            await Backend.backend_call<[spl: number, sppl: number, fppl: number], number>(
-              'set_tdp',
-              profile.cpu.tdp.spl,
-              profile.cpu.tdp.sppl,
-              profile.cpu.tdp.fppl
-            );
-            await Backend.backend_call<[number, number, boolean], void>(
-              'enable_cores',
-              profile.cpu.pcores,
-              profile.cpu.ecores,
-              profile.cpu.smt
-            );
+
+            if (cpuChanged) {
+              const acpi = Acpi[Profiles.getAcpiProfile(profile.cpu.tdp.spl)]
+                .toLowerCase()
+                .replace('_', '-');
+              Logger.info('Setting CPU profile to "' + acpi + '" with:', {
+                mode: profile.mode,
+                cpu: profile.cpu
+              });
+              request.cpu = {
+                boost: profile.cpu.boost,
+                governor: Governor[profile.cpu.governor].toLowerCase(),
+                epp: Epp[profile.cpu.epp].toLowerCase(),
+                scheduler: profile.cpu.scheduler,
+                acpi,
+                tdp: profile.cpu.tdp,
+                pcores: profile.cpu.pcores,
+                ecores: profile.cpu.ecores,
+                smt: profile.cpu.smt,
+                adaptive_tdp: profile.cpu.adaptiveTdp ?? false,
+                core_parking: profile.cpu.coreParking ?? false,
+                parking_min_pcores:
+                  profile.cpu.parkingMinPcores ?? Constants.DEFAULT_PARKING_MIN_PCORES,
+                parking_min_ecores:
+                  profile.cpu.parkingMinEcores ?? Constants.DEFAULT_PARKING_MIN_ECORES,
+                pin_game: profile.cpu.pinGame ?? false
+              };
+            }
+
+            const result = await Backend.backend_call<
+              [profile: ApplyProfileRequest],
+              ApplyProfileResult
+            >('apply_profile', request);
+            result.steps
+              .filter((step) => step.error)
+              .forEach((step) =>
+                Logger.error("Profile step '" + step.step + "' failed: " + step.error)
+              );
+            Logger.info('Backend applied profile in ' + result.elapsed_ms + 'ms', result.steps);
           }
           Logger.info('Profile applied');
           BackendUtils.currentProfile = profile;
@@ -204,6 +227,10 @@ export class BackendUtils {
     }
   }
 
+  public static async onResume(): Promise<void> {
+    return Backend.backend_call<[], void>('on_resume');
+  }
+
   public static async renice(pid: number): Promise<void> {
     Logger.info('Renicing process ' + pid + ' and its children');
     return await Backend.backend_call<[number], void>('renice', pid);
@@ -276,8 +303,12 @@ export class BackendUtils {
     return Backend.backend_call<[appId: string], string>('get_icon_for_app', appId);
   }
 
-  public static setIconForApp(appId: string, img: string): Promise<string> {
-    return Backend.backend_call<[appId: string, img: string], string>(
+  public static async getIconsForApps(appIds: string[]): Promise<IconsForApps> {
+    return Backend.backend_call<[appIds: string[]], IconsForApps>('get_icons_for_apps', appIds);
+  }
+
+  public static setIconForApp(appId: string, img: string): Promise<boolean> {
+    return Backend.backend_call<[appId: string, img: string], boolean>(
       'save_icon_for_app',
       appId,
       img
@@ -29,6 +29,8 @@ export class Constants {
   public static DEFAULT_SMT = true;
   public static DEFAULT_EPP = Epp.BALANCE_POWER;
   public static DEFAULT_GOVERNOR = Governor.POWERSAVE;
+  public static DEFAULT_PARKING_MIN_PCORES = 2;
+  public static DEFAULT_PARKING_MIN_ECORES = 0;
 
   public static AllySilentSPL = 13;
   public static AllySilentSPPL = 15;
@@ -90,7 +90,8 @@ export class Listeners {
         });
       } else {
         Logger.info('Waiting for 10 seconds since resume to restore profile');
-        sleep(10000).then(() => {
+        sleep(10000).then(async () => {
+          await BackendUtils.onResume();
           Logger.info('Restoring profile');
           BackendUtils.applyProfile(Profiles.getProfileForId(WhiteBoardUtils.getRunningGameId()));
         });
@@ -62,6 +62,11 @@ export interface CpuProfile {
   smt: boolean;
   pcores: number;
   ecores: number;
+  adaptiveTdp?: boolean;
+  coreParking?: boolean;
+  parkingMinPcores?: number;
+  parkingMinEcores?: number;
+  pinGame?: boolean;
 }
 
 export enum Mode {
@@ -96,6 +101,7 @@ export interface GpuFreqProfile {
 
 export interface GpuProfile {
   frequency: GpuFreqProfile;
+  auto?: boolean;
 }
 
 export interface TdpCpuProfile {
@@ -104,6 +110,49 @@ export interface TdpCpuProfile {
   fppl: number;
 }
 
+export interface ApplyProfileRequest {
+  cpu?: {
+    boost: boolean;
+    governor: string;
+    epp: string;
+    scheduler: string;
+    acpi: string;
+    tdp: TdpCpuProfile;
+    pcores: number;
+    ecores: number;
+    smt: boolean;
+    adaptive_tdp: boolean;
+    core_parking: boolean;
+    parking_min_pcores: number;
+    parking_min_ecores: number;
+    pin_game: boolean;
+  };
+  gpu?: GpuFreqProfile & { auto: boolean };
+}
+
+export interface ApplyProfileStep {
+  step: string;
+  elapsed_ms: number;
+  error: string | null;
+}
+
+export interface ApplyProfileResult {
+  elapsed_ms: number;
+  steps: ApplyProfileStep[];
+  skipped: string[];
+}
+
+export interface PluginLogPage {
+  entries: string[];
+  offset: number;
+  next_offset: number | null;
+}
+
+export interface IconsForApps {
+  icons: Record<string, string>;
+  missing: string[];
+}
+
 export interface SdtdpSettingsTdpProfile {
   tdp: number;
   cpuBoost: boolean;
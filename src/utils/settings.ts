@@ -140,8 +140,14 @@ export class PluginSettings {
     prof.cpu.tdp.spl = profile.cpu.tdp.spl;
     prof.cpu.tdp.sppl = profile.cpu.tdp.sppl;
     prof.cpu.tdp.fppl = profile.cpu.tdp.fppl;
+    prof.cpu.adaptiveTdp = profile.cpu.adaptiveTdp;
+    prof.cpu.coreParking = profile.cpu.coreParking;
+    prof.cpu.parkingMinPcores = profile.cpu.parkingMinPcores;
+    prof.cpu.parkingMinEcores = profile.cpu.parkingMinEcores;
+    prof.cpu.pinGame = profile.cpu.pinGame;
     prof.gpu.frequency.min = profile.gpu.frequency.min;
     prof.gpu.frequency.max = profile.gpu.frequency.max;
+    prof.gpu.auto = profile.gpu.auto;
     prof.display.brightness = profile.display.brightness;
     prof.audio.devices = profile.audio.devices;
   }